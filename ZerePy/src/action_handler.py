@@ -1,20 +1,61 @@
+import inspect
 import logging
+from src.helpers.llm_cache import action_context
+from src.helpers.metrics import OUTCOME_ERROR, OUTCOME_OK, get_metrics
+from src.runtime import run_sync
 
 logger = logging.getLogger("action_handler")
 
 action_registry = {}    
+# Actions that publish what they generate, their LLM calls bypass the response cache
+content_actions = set()
 
-def register_action(action_name):
+def register_action(action_name, posts_content=False):
     def decorator(func):
         action_registry[action_name] = func
+        if posts_content:
+            content_actions.add(action_name)
+        else:
+            content_actions.discard(action_name)
         return func
     return decorator
 
 def execute_action(agent, action_name, **kwargs):
     if action_name in action_registry:
-       return action_registry[action_name](agent, **kwargs)
+        metrics = get_metrics().agent_actions
+        token = metrics.begin(agent.name, action_name)
+        result, outcome = None, OUTCOME_ERROR
+        try:
+            with action_context(action_name, action_name in content_actions):
+                result = action_registry[action_name](agent, **kwargs)
+            outcome = OUTCOME_OK
+            return result
+        finally:
+            metrics.end(token, result, outcome)
     else:
         logger.error(f"Action {action_name} not found")
         return None
+
+async def execute_action_async(agent, action_name, **kwargs):
+    """Run a registered action from the event loop. Coroutine handlers are awaited,
+    sync handlers run on the shared thread pool."""
+    if action_name not in action_registry:
+        logger.error(f"Action {action_name} not found")
+        return None
+
+    handler = action_registry[action_name]
+    metrics = get_metrics().agent_actions
+    token = metrics.begin(agent.name, action_name)
+    result, outcome = None, OUTCOME_ERROR
+    try:
+        with action_context(action_name, action_name in content_actions):
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(agent, **kwargs)
+            else:
+                result = await run_sync(handler, agent, **kwargs)
+        outcome = OUTCOME_OK
+        return result
+    finally:
+        metrics.end(token, result, outcome)
     
 
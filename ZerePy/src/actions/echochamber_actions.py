@@ -1,16 +1,19 @@
+import contextvars
 import time,random
+from concurrent.futures import ThreadPoolExecutor
 from src.action_handler import register_action
 from src.prompts import REPLY_ECHOCHAMBER_PROMPT, POST_ECHOCHAMBER_PROMPT
 
-@register_action("post-echochambers")
+# Replies generated at the same time when the room config does not set reply_parallelism
+DEFAULT_REPLY_PARALLELISM = 4
+
+@register_action("post-echochambers", posts_content=True)
 def post_echochambers(agent, **kwargs):
     current_time = time.time()
 
     # Initialize state
     if "echochambers_last_message" not in agent.state:
         agent.state["echochambers_last_message"] = 0
-    if "echochambers_replied_messages" not in agent.state:
-        agent.state["echochambers_replied_messages"] = set()
     
     if current_time - agent.state["echochambers_last_message"] > agent.echochambers_message_interval:
         agent.logger.info("\n📝 GENERATING NEW ECHOCHAMBERS MESSAGE")
@@ -39,66 +42,83 @@ def post_echochambers(agent, **kwargs):
             return True
     return False
 
-@register_action("reply-echochambers")
+def _generate_reply(agent, message):
+    sender_username = message['sender']['username']
+    agent.logger.info(f"\n💬 GENERATING REPLY to: @{sender_username} - {message['content'][:69]}...")
+
+    refer_username = random.random() < 0.7
+    username_prompt = f"Refer the sender by their @{sender_username}" if refer_username else "Respond without directly referring to the sender"
+    prompt = REPLY_ECHOCHAMBER_PROMPT.format(
+        content=message['content'],
+        sender_username=sender_username,
+        room_topic=agent.state['room_info']['topic'],
+        tags=", ".join(agent.state['room_info']['tags']),
+        username_prompt=username_prompt
+    )
+    return agent.prompt_llm(prompt)
+
+@register_action("reply-echochambers", posts_content=True)
 def reply_echochambers(agent, **kwargs):
+    """Reply to every message that arrived since the last pass, generating the replies concurrently"""
     agent.logger.info("\n🔍 CHECKING FOR MESSAGES TO REPLY TO")
-    
-    # Initialize replied messages set if not exists
-    if "echochambers_replied_messages" not in agent.state:
-        agent.state["echochambers_replied_messages"] = set()
-        
 
-    # Get recent messages
-    history = agent.connection_manager.perform_action(
+    connection = agent.connection_manager.connections["echochambers"]
+    agent.connection_manager.perform_action(
         connection_name="echochambers",
-        action_name="get-room-history",
+        action_name="process-room-history",
         params={}
     )
 
-    if history:
-        agent.logger.info(f"Found {len(history)} messages in history")
-        for message in history:
-            message_id = message.get('id')
-            sender = message.get('sender', {})
-            sender_username = sender.get('username')
-            content = message.get('content', '')
-            
-            if not message_id or not sender_username or not content:
-                agent.logger.warning(f"Skipping message with missing fields: {message}")
-                continue
-            
+    messages = []
+    for message in connection.drain_message_queue():
+        if not message.get('id') or not message['sender'].get('username') or not message.get('content'):
+            agent.logger.warning(f"Skipping message with missing fields: {message}")
+            continue
+        if message['id'] in connection.replied_messages:
+            continue
+        messages.append(message)
 
-            # Skip if:
-            # 1. It's our message
-            # 2. We've already replied to it
-            if (sender_username == agent.connection_manager.connections["echochambers"].config["sender_username"] or 
-                message_id in agent.state.get("echochambers_replied_messages", set())):
-                agent.logger.info(f"Skipping message from {sender_username} (already replied or own message)")
-                continue
-                
-            agent.logger.info(f"\n💬 GENERATING REPLY to: @{sender_username} - {content[:69]}...")
-            
-            refer_username = random.random() < 0.7
-            username_prompt = f"Refer the sender by their @{sender_username}" if refer_username else "Respond without directly referring to the sender"
-            prompt = REPLY_ECHOCHAMBER_PROMPT.format(
-                content=content,
-                sender_username=sender_username,
-                room_topic=agent.state['room_info']['topic'],
-                tags=", ".join(agent.state['room_info']['tags']),
-                username_prompt=username_prompt
-            )
-            reply = agent.prompt_llm(prompt)
-            
-            if reply:
-                agent.logger.info(f"\n🚀 Posting reply: '{reply[:69]}...'")
-                agent.connection_manager.perform_action(
-                    connection_name="echochambers",
-                    action_name="send-message",
-                    params=[reply]
-                )
-                agent.state["echochambers_replied_messages"].add(message_id)
-                agent.logger.info("✅ Reply posted successfully!")
-                return True
-    else:
-        agent.logger.info("No messages in history")
-    return False
\ No newline at end of file
+    if not messages:
+        connection.save_queue()
+        agent.logger.info("No new messages to reply to")
+        return False
+
+    # Generate every reply at once, each worker keeps the caller's context (current action)
+    parallelism = connection.config.get("reply_parallelism", DEFAULT_REPLY_PARALLELISM)
+    agent.logger.info(f"Generating replies to {len(messages)} messages, {parallelism} at a time")
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(messages))) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _generate_reply, agent, message)
+            for message in messages
+        ]
+
+    # Post in the order the messages arrived
+    posted, failed = 0, []
+    for message, future in zip(messages, futures):
+        try:
+            reply = future.result()
+        except Exception as e:
+            agent.logger.error(f"Failed to generate reply to {message['id']}: {e}")
+            reply = None
+        if not reply:
+            failed.append(message)
+            continue
+
+        agent.logger.info(f"\n🚀 Posting reply: '{reply[:69]}...'")
+        result = agent.connection_manager.perform_action(
+            connection_name="echochambers",
+            action_name="send-message",
+            params=[reply]
+        )
+        if result is None:
+            failed.append(message)
+            continue
+        connection.replied_messages.add(message['id'])
+        posted += 1
+
+    if failed:
+        connection.requeue_messages(failed)
+    # Only now drop the handled messages from the saved queue
+    connection.save_queue()
+    agent.logger.info(f"✅ Posted {posted} replies, {len(failed)} left for the next pass")
+    return posted > 0
@@ -1,10 +1,11 @@
-import time,threading
-from src.action_handler import register_action
+import time
+from src.action_handler import execute_action, register_action
 from src.helpers import print_h_bar
-from src.prompts import POST_TWEET_PROMPT, REPLY_TWEET_PROMPT
+from src.helpers.twitter_stream import DEFAULT_QUEUE_SIZE, DEFAULT_WORKERS, StreamConsumer
+from src.prompts import REPLY_TWEET_PROMPT
 
 
-@register_action("post-tweet")
+@register_action("post-tweet", posts_content=True)
 def post_tweet(agent, **kwargs):
     current_time = time.time()
 
@@ -17,8 +18,7 @@ def post_tweet(agent, **kwargs):
         agent.logger.info("\n📝 GENERATING NEW TWEET")
         print_h_bar()
 
-        prompt = POST_TWEET_PROMPT.format(agent_name = agent.name)
-        tweet_text = agent.prompt_llm(prompt)
+        tweet_text = agent.prompt_llm(agent.prompt_builder.post_tweet_prompt)
 
         if tweet_text:
             agent.logger.info("\n🚀 Posting tweet:")
@@ -36,10 +36,10 @@ def post_tweet(agent, **kwargs):
         return False
 
 
-@register_action("reply-to-tweet")
+@register_action("reply-to-tweet", posts_content=True)
 def reply_to_tweet(agent, **kwargs):
-    if "timeline_tweets" in agent.state and agent.state["timeline_tweets"] is not None and len(agent.state["timeline_tweets"]) > 0:
-        tweet = agent.state["timeline_tweets"].pop(0)
+    tweet = agent.timeline.pop()
+    if tweet is not None:
         tweet_id = tweet.get('id')
         if not tweet_id:
             return
@@ -65,8 +65,8 @@ def reply_to_tweet(agent, **kwargs):
 
 @register_action("like-tweet")
 def like_tweet(agent, **kwargs):
-    if "timeline_tweets" in agent.state and agent.state["timeline_tweets"] is not None and len(agent.state["timeline_tweets"]) > 0:
-        tweet = agent.state["timeline_tweets"].pop(0)
+    tweet = agent.timeline.pop()
+    if tweet is not None:
         tweet_id = tweet.get('id')
         if not tweet_id:
             return False
@@ -79,7 +79,7 @@ def like_tweet(agent, **kwargs):
                 params=[tweet.get('author_id')]
             )
             if replies:
-                agent.state["timeline_tweets"].extend(replies[:agent.own_tweet_replies_count])
+                agent.timeline.extend(replies[:agent.own_tweet_replies_count])
             return True 
 
         agent.logger.info(f"\n👍 LIKING TWEET: {tweet.get('text', '')[:50]}...")
@@ -95,21 +95,47 @@ def like_tweet(agent, **kwargs):
         agent.logger.info("\n👀 No tweets found to like...")
     return False
 
-@register_action("respond-to-mentions")
+@register_action("respond-to-mentions", posts_content=True)
 def respond_to_mentions(agent,**kwargs): #REQUIRES TWITTER PREMIUM PLAN
+    """Start (once) a background consumer that dispatches every mention to the configured action"""
+    if agent.mention_stream is not None and agent.mention_stream.running:
+        return True
 
+    twitter_config = agent.connection_manager.connections["twitter"].config
+    mention_action = twitter_config.get("mention_action", "reply-to-mention")
     filter_str = f"@{agent.username} -is:retweet"
-    stream_function = agent.connection_manager.perform_action(
+
+    def handle_mention(tweet_data):
+        agent.logger.info(f"Received a mention: {tweet_data.get('text', '')}")
+        execute_action(agent, mention_action, tweet=tweet_data)
+
+    agent.mention_stream = StreamConsumer(
+        connect=lambda: agent.connection_manager.connections["twitter"].stream_tweets(filter_str),
+        handler=handle_mention,
+        workers=twitter_config.get("mention_workers", DEFAULT_WORKERS),
+        queue_size=twitter_config.get("mention_queue_size", DEFAULT_QUEUE_SIZE),
+        name=f"{agent.name}-mentions"
+    )
+    agent.mention_stream.start()
+    return True
+
+@register_action("reply-to-mention", posts_content=True)
+def reply_to_mention(agent, tweet=None, **kwargs):
+    """Reply to a tweet delivered by the mention stream"""
+    if not tweet or not tweet.get('id'):
+        return False
+    if tweet.get('author_username', '').lower() == agent.username:
+        return False
+
+    base_prompt = REPLY_TWEET_PROMPT.format(tweet_text=tweet.get('text'))
+    reply_text = agent.prompt_llm(prompt=base_prompt, system_prompt=agent._construct_system_prompt())
+    if not reply_text:
+        return False
+
+    agent.logger.info(f"\n🚀 Replying to mention {tweet['id']}: '{reply_text}'")
+    agent.connection_manager.perform_action(
         connection_name="twitter",
-        action_name="stream-tweets",
-        params=[filter_str]
+        action_name="reply-to-tweet",
+        params=[tweet['id'], reply_text]
     )
-    def process_tweets():
-        for tweet_data in stream_function:
-            tweet_id = tweet_data["id"]
-            tweet_text = tweet_data["text"]
-            agent.logger.info(f"Received a mention: {tweet_text}")
-
-    processing_thread = threading.Thread(target=process_tweets)
-    processing_thread.daemon = True
-    processing_thread.start()
\ No newline at end of file
+    return True
@@ -1,34 +1,36 @@
-import json
-import random
+import asyncio
 import time
 import logging
 import os
-from pathlib import Path
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterator, Optional, Tuple
+from src.helpers.credentials import load_credentials
+from src.agent_catalog import get_agent_catalog
 from src.connection_manager import ConnectionManager
+from src.helpers.llm_cache import LLMResponseCache
+from src.prompt_builder import SystemPromptBuilder
+from src.scheduler import TaskScheduler
+from src.state_store import AgentState
+from src.helpers.timeline import DEFAULT_MIN_INTERVAL, TimelineQueue
 from src.helpers import print_h_bar
-from src.action_handler import execute_action
+from src.action_handler import execute_action, execute_action_async
+from src.runtime import run_sync
 import src.actions.twitter_actions  
 import src.actions.echochamber_actions
 import src.actions.solana_actions
 from datetime import datetime
 
-REQUIRED_FIELDS = ["name", "bio", "traits", "examples", "loop_delay", "config", "tasks"]
-
 logger = logging.getLogger("agent")
 
 class ZerePyAgent:
     def __init__(
             self,
-            agent_name: str
+            agent_name: str,
+            definition: Optional[Dict[str, Any]] = None
     ):
         try:
-            agent_path = Path("agents") / f"{agent_name}.json"
-            agent_dict = json.load(open(agent_path, "r"))
-
-            missing_fields = [field for field in REQUIRED_FIELDS if field not in agent_dict]
-            if missing_fields:
-                raise KeyError(f"Missing required fields: {', '.join(missing_fields)}")
+            # Parsed and validated once by the catalog, unless an already loaded definition is reused
+            agent_dict = definition if definition is not None else get_agent_catalog().get(agent_name)
+            self.definition = agent_dict
 
             self.name = agent_dict["name"]
             self.bio = agent_dict["bio"]
@@ -36,7 +38,10 @@ class ZerePyAgent:
             self.examples = agent_dict["examples"]
             self.example_accounts = agent_dict["example_accounts"]
             self.loop_delay = agent_dict["loop_delay"]
-            self.connection_manager = ConnectionManager(agent_dict["config"])
+            self.connection_manager = ConnectionManager(
+                agent_dict["config"],
+                llm_cache=LLMResponseCache.from_config(agent_dict.get("llm_cache"))
+            )
             self.use_time_based_weights = agent_dict["use_time_based_weights"]
             self.time_based_multipliers = agent_dict["time_based_multipliers"]
 
@@ -48,6 +53,19 @@ class ZerePyAgent:
                 self.tweet_interval = twitter_config.get("tweet_interval", 900)
                 self.own_tweet_replies_count = twitter_config.get("own_tweet_replies_count", 2)
 
+            # Unhandled timeline tweets, refilled in the background as actions consume them
+            timeline_read_count = (twitter_config or {}).get("timeline_read_count", 10)
+            self.timeline = TimelineQueue(
+                fetch=lambda since_id: self.connection_manager.perform_action(
+                    connection_name="twitter",
+                    action_name="read-timeline",
+                    params=[timeline_read_count, since_id] if since_id else [timeline_read_count]
+                ),
+                min_interval=(twitter_config or {}).get("timeline_refresh_interval", DEFAULT_MIN_INTERVAL),
+                # Handled tweets are persisted with the next flush, so a crash never replies to them again
+                on_change=lambda: self.state.mark_dirty("timeline")
+            )
+
             # Extract Echochambers config
             echochambers_config = next((config for config in agent_dict["config"] if config["name"] == "echochambers"), None)
             if echochambers_config:
@@ -56,16 +74,36 @@ class ZerePyAgent:
 
             self.is_llm_set = False
 
-            # Cache for system prompt
-            self._system_prompt = None
+            # Builds, caches and persists the system prompt
+            self.prompt_builder = SystemPromptBuilder(
+                agent_name=self.name,
+                bio=self.bio,
+                traits=self.traits,
+                examples=self.examples,
+                example_accounts=self.example_accounts,
+                connection_manager=self.connection_manager
+            )
+            self.prompt_builder.warm()
 
             # Extract loop tasks
             self.tasks = agent_dict.get("tasks", [])
             self.task_weights = [task.get("weight", 0) for task in self.tasks]
+            self.scheduler = TaskScheduler(
+                self.tasks,
+                eligible_in=self.task_eligible_in,
+                weights=self._current_task_weights
+            )
             self.logger = logging.getLogger("agent")
 
-            # Set up empty agent state
-            self.state = {}
+            # Agent state, restored from the previous run and persisted in the background
+            self.state = AgentState.from_config(self.name, agent_dict.get("state_store"))
+            self.timeline.restore(self.state.get("timeline"))
+            self.state.register_provider("timeline", self.timeline.dump)
+            self.state.start()
+
+            # Mention stream consumer, started by the respond-to-mentions action
+            self.mention_stream = None
+            self._closed = False
 
         except Exception as e:
             logger.error("Could not load ZerePy agent")
@@ -76,43 +114,20 @@ class ZerePyAgent:
         llm_providers = self.connection_manager.get_model_providers()
         if not llm_providers:
             raise ValueError("No configured LLM provider found")
-        self.model_provider = llm_providers[0]
+        # A configured router wraps the other providers, so it takes precedence
+        self.model_provider = "llm_router" if "llm_router" in llm_providers else llm_providers[0]
+        self.is_llm_set = True
 
         # Load Twitter username for self-reply detection if Twitter tasks exist
-        if any("tweet" in task["name"] for task in self.tasks):
-            load_dotenv()
+        if any("tweet" in task["name"] or "mention" in task["name"] for task in self.tasks):
+            load_credentials()
             self.username = os.getenv('TWITTER_USERNAME', '').lower()
             if not self.username:
                 logger.warning("Twitter username not found, some Twitter functionalities may be limited")
 
     def _construct_system_prompt(self) -> str:
         """Construct the system prompt from agent configuration"""
-        if self._system_prompt is None:
-            prompt_parts = []
-            prompt_parts.extend(self.bio)
-
-            if self.traits:
-                prompt_parts.append("\nYour key traits are:")
-                prompt_parts.extend(f"- {trait}" for trait in self.traits)
-
-            if self.examples or self.example_accounts:
-                prompt_parts.append("\nHere are some examples of your style (Please avoid repeating any of these):")
-                if self.examples:
-                    prompt_parts.extend(f"- {example}" for example in self.examples)
-
-                if self.example_accounts:
-                    for example_account in self.example_accounts:
-                        tweets = self.connection_manager.perform_action(
-                            connection_name="twitter",
-                            action_name="get-latest-tweets",
-                            params=[example_account]
-                        )
-                        if tweets:
-                            prompt_parts.extend(f"- {tweet['text']}" for tweet in tweets)
-
-            self._system_prompt = "\n".join(prompt_parts)
-
-        return self._system_prompt
+        return self.prompt_builder.get()
     
     def _adjust_weights_for_time(self, current_hour: int, task_weights: list) -> list:
         weights = task_weights.copy()
@@ -145,75 +160,192 @@ class ZerePyAgent:
             params=[prompt, system_prompt]
         )
 
+    def prompt_llm_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """
+        Generate text using the configured LLM provider, yielding chunks as they arrive.
+        Streamed responses always come from the provider, never from the LLM response cache.
+        """
+        system_prompt = system_prompt or self._construct_system_prompt()
+
+        connection = self.connection_manager.connections[self.model_provider]
+        if "generate-text-stream" not in connection.actions:
+            # Bypass the cache here too, so a streaming turn behaves the same whatever the provider
+            response = self.connection_manager.perform_action(
+                connection_name=self.model_provider,
+                action_name="generate-text",
+                params=[prompt, system_prompt],
+                use_cache=False
+            )
+            if response:
+                yield response
+            return
+
+        stream = self.connection_manager.perform_action(
+            connection_name=self.model_provider,
+            action_name="generate-text-stream",
+            params=[prompt, system_prompt]
+        )
+        if stream is not None:
+            yield from stream
+
+    async def prompt_llm_async(self, prompt: str, system_prompt: str = None) -> str:
+        """Async variant of prompt_llm for the agent runtime"""
+        system_prompt = system_prompt or await run_sync(self._construct_system_prompt)
+
+        return await self.connection_manager.perform_action_async(
+            connection_name=self.model_provider,
+            action_name="generate-text",
+            params=[prompt, system_prompt]
+        )
+
     def perform_action(self, connection: str, action: str, **kwargs) -> None:
         return self.connection_manager.perform_action(connection, action, **kwargs)
+
+    async def perform_action_async(self, connection: str, action: str, **kwargs):
+        return await self.connection_manager.perform_action_async(connection, action, **kwargs)
     
-    def select_action(self, use_time_based_weights: bool = False) -> dict:
+    def task_wait_time(self, task_name: str) -> float:
+        """Seconds until the rate-limited endpoint behind a task has budget again, 0 if it can run now"""
+        connections = self.connection_manager.connections
+        if "twitter" not in connections or not connections.is_loaded("twitter"):
+            return 0.0
+        return connections["twitter"].action_wait_time(task_name)
+
+    def task_eligible_in(self, task_name: str) -> float:
+        """Seconds until a task can do useful work: its interval has elapsed and its endpoint has budget"""
+        now = time.time()
+        waits = [self.task_wait_time(task_name)]
+        if task_name == "post-tweet":
+            waits.append(self.state.get("last_tweet_time", 0) + getattr(self, "tweet_interval", 0) - now)
+        elif task_name == "post-echochambers":
+            waits.append(
+                self.state.get("echochambers_last_message", 0)
+                + getattr(self, "echochambers_message_interval", 0) - now
+            )
+        return max(waits)
+
+    def _current_task_weights(self) -> list:
         task_weights = [weight for weight in self.task_weights.copy()]
-        
-        if use_time_based_weights:
+
+        if self.use_time_based_weights:
             current_hour = datetime.now().hour
             task_weights = self._adjust_weights_for_time(current_hour, task_weights)
-        
-        return random.choices(self.tasks, weights=task_weights, k=1)[0]
 
-    def loop(self):
-        """Main agent loop for autonomous behavior"""
-        if not self.is_llm_set:
-            self._setup_llm_provider()
+        return task_weights
 
-        logger.info("\n🚀 Starting agent loop...")
-        logger.info("Press Ctrl+C at any time to stop the loop.")
-        print_h_bar()
+    def select_action(self) -> Tuple[Optional[int], float]:
+        """Index of the next task to run, or None and the seconds until one becomes eligible"""
+        return self.scheduler.next_task()
 
-        time.sleep(2)
-        logger.info("Starting loop in 5 seconds...")
-        for i in range(5, 0, -1):
-            logger.info(f"{i}...")
-            time.sleep(1)
+    async def _refresh_room_info_async(self) -> None:
+        logger.info("\n👀 READING ECHOCHAMBERS ROOM INFO")
+        self.state["room_info"] = await self.connection_manager.perform_action_async(
+            connection_name="echochambers",
+            action_name="get-room-info",
+            params={}
+        )
 
-        try:
-            while True:
-                success = False
-                try:
-                    # REPLENISH INPUTS
-                    # TODO: Add more inputs to complexify agent behavior
-                    if "timeline_tweets" not in self.state or self.state["timeline_tweets"] is None or len(self.state["timeline_tweets"]) == 0:
-                        if any("tweet" in task["name"] for task in self.tasks):
-                            logger.info("\n👀 READING TIMELINE")
-                            self.state["timeline_tweets"] = self.connection_manager.perform_action(
-                                connection_name="twitter",
-                                action_name="read-timeline",
-                                params=[]
-                            )
-
-                    if "room_info" not in self.state or self.state["room_info"] is None:
-                        if any("echochambers" in task["name"] for task in self.tasks):
-                            logger.info("\n👀 READING ECHOCHAMBERS ROOM INFO")
-                            self.state["room_info"] = self.connection_manager.perform_action(
-                                connection_name="echochambers",
-                                action_name="get-room-info",
-                                params={}
-                            )
-
-                    # CHOOSE AN ACTION
-                    # TODO: Add agentic action selection
-                    
-                    action = self.select_action(use_time_based_weights=self.use_time_based_weights)
-                    action_name = action["name"]
+    async def _replenish_inputs_async(self) -> None:
+        """Refresh every exhausted input concurrently"""
+        # TODO: Add more inputs to complexify agent behavior
+        refreshes = []
+        if any("tweet" in task["name"] for task in self.tasks):
+            if not self.timeline.has_fetched:
+                # Nothing read yet, the first fill is awaited so the first action has input
+                logger.info("\n👀 READING TIMELINE")
+                refreshes.append(run_sync(self.timeline.refill))
+            else:
+                self.timeline.maybe_refill()
+
+        if "room_info" not in self.state or self.state["room_info"] is None:
+            if any("echochambers" in task["name"] for task in self.tasks):
+                refreshes.append(self._refresh_room_info_async())
+
+        if refreshes:
+            await asyncio.gather(*refreshes)
+
+    async def run_async(self, stop_event: asyncio.Event = None) -> None:
+        """
+        Async agent loop. Runs until stop_event is set, sleeping without blocking
+        the event loop so many agents can share one process (see AgentRuntime).
+        """
+        stop_event = stop_event or asyncio.Event()
+        if not self.is_llm_set:
+            await run_sync(self._setup_llm_provider)
+
+        while not stop_event.is_set():
+            delay = self.loop_delay
+            try:
+                # REPLENISH INPUTS
+                await self._replenish_inputs_async()
+
+                # CHOOSE AN ACTION
+                # TODO: Add agentic action selection
+                task_index, wait = self.select_action()
+                if task_index is None:
+                    # Nothing can do useful work yet, sleep until the first task becomes eligible
+                    delay = wait or self.loop_delay
+                    logger.info("\n💤 No task is eligible yet")
+                else:
+                    action_name = self.tasks[task_index]["name"]
 
                     # PERFORM ACTION
-                    success = execute_action(self, action_name)
+                    success = False
+                    try:
+                        success = await execute_action_async(self, action_name)
+                    finally:
+                        self.scheduler.complete(task_index, bool(success))
+
+                    # A failed task is backed off on its own, other eligible tasks may run right away
+                    next_eligible = self.scheduler.time_until_next()
+                    delay = max(self.loop_delay, next_eligible) if success else next_eligible
+                logger.info(f"\n⏳ Waiting {delay:.0f} seconds before next loop...")
+                print_h_bar()
+
+            except Exception as e:
+                logger.error(f"\n❌ Error in agent loop iteration: {e}")
+                logger.info(f"⏳ Waiting {self.loop_delay} seconds before retrying...")
+
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+        self.stop_streams()
+
+    def stop_streams(self) -> None:
+        """Stop background stream consumers started by actions"""
+        if self.mention_stream is not None:
+            self.mention_stream.stop()
+            self.mention_stream = None
+
+    def close(self) -> None:
+        """Stop background work, persist state and release every connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self.stop_streams()
+        self.state.close()
+        self.connection_manager.close()
+
+    def loop(self):
+        """Main agent loop for autonomous behavior, the agent is closed when it stops"""
+        try:
+            if not self.is_llm_set:
+                self._setup_llm_provider()
 
-                    logger.info(f"\n⏳ Waiting {self.loop_delay} seconds before next loop...")
-                    print_h_bar()
-                    time.sleep(self.loop_delay if success else 60)
+            logger.info("\n🚀 Starting agent loop...")
+            logger.info("Press Ctrl+C at any time to stop the loop.")
+            print_h_bar()
 
-                except Exception as e:
-                    logger.error(f"\n❌ Error in agent loop iteration: {e}")
-                    logger.info(f"⏳ Waiting {self.loop_delay} seconds before retrying...")
-                    time.sleep(self.loop_delay)
+            time.sleep(2)
+            logger.info("Starting loop in 5 seconds...")
+            for i in range(5, 0, -1):
+                logger.info(f"{i}...")
+                time.sleep(1)
 
+            asyncio.run(self.run_async())
         except KeyboardInterrupt:
             logger.info("\n🛑 Agent loop stopped by user.")
-            return
\ No newline at end of file
+        finally:
+            self.close()
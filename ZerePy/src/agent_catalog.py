@@ -0,0 +1,221 @@
+import copy
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("agent_catalog")
+
+try:
+    # inotify (or the platform equivalent) when watchdog is installed
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+REQUIRED_FIELDS = ["name", "bio", "traits", "examples", "loop_delay", "config", "tasks"]
+
+DEFAULT_AGENTS_DIR = Path(os.getenv("ZEREPY_AGENTS_DIR", "agents"))
+# Seconds between directory scans when watchdog is not available
+DEFAULT_POLL_INTERVAL = 2.0
+# Files in the agents directory that are not agent definitions
+NON_AGENT_FILES = ("general",)
+
+
+@dataclass
+class CatalogEntry:
+    """A parsed agent definition and the file stamp it was parsed from"""
+    definition: Optional[Dict[str, Any]]
+    stamp: tuple
+    error: Optional[str] = None
+
+
+def validate_definition(definition: Any) -> Optional[str]:
+    """Reason a parsed agent definition is unusable, None when it is valid"""
+    if not isinstance(definition, dict):
+        return "Agent definition must be a JSON object"
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in definition]
+    if missing_fields:
+        return f"Missing required fields: {', '.join(missing_fields)}"
+    return None
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, catalog: "AgentCatalog"):
+        self._catalog = catalog
+
+    def on_any_event(self, event) -> None:
+        if str(getattr(event, "src_path", "")).endswith(".json") or str(getattr(event, "dest_path", "")).endswith(".json"):
+            self._catalog.scan()
+
+
+class AgentCatalog:
+    """
+    In-memory index of the agent definitions in the agents directory.
+
+    Each file is parsed and validated once, and again only when its mtime or
+    size changes. Listing and loading agents are served from the index. While
+    watching, changes are picked up from filesystem events (watchdog, which
+    uses inotify on Linux) or, without watchdog, by a thread that re-stats the
+    directory every poll_interval seconds. Without a watcher every lookup
+    re-stats the directory instead, which is still cheaper than re-parsing.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_AGENTS_DIR, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._observer = None
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.scan()
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None or (self._poller is not None and self._poller.is_alive())
+
+    def path_for(self, name: str) -> Path:
+        if not name or Path(name).name != name or name.startswith("."):
+            raise ValueError(f"Invalid agent name: {name}")
+        return self.directory / f"{name}.json"
+
+    def _parse(self, path: Path, stamp: tuple) -> CatalogEntry:
+        try:
+            with open(path, "r") as f:
+                definition = json.load(f)
+        except (OSError, ValueError) as e:
+            return CatalogEntry(None, stamp, f"Could not read {path.name}: {e}")
+        error = validate_definition(definition)
+        return CatalogEntry(None if error else definition, stamp, error)
+
+    def scan(self) -> None:
+        """Re-parse added or modified definitions and drop deleted ones"""
+        stamps = {}
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.json"):
+                if path.stem in NON_AGENT_FILES:
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                stamps[path.stem] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            current = dict(self._entries)
+        changed = {
+            name: self._parse(self.directory / f"{name}.json", stamp)
+            for name, stamp in stamps.items()
+            if name not in current or current[name].stamp != stamp
+        }
+        with self._lock:
+            for name in list(self._entries):
+                if name not in stamps:
+                    del self._entries[name]
+                    logger.info(f"Agent definition removed: {name}")
+            for name, entry in changed.items():
+                self._entries[name] = entry
+                if entry.error:
+                    logger.warning(f"Invalid agent definition {name}: {entry.error}")
+                else:
+                    logger.debug(f"Indexed agent definition: {name}")
+
+    def _refresh(self) -> None:
+        if not self.watching:
+            self.scan()
+
+    def names(self) -> List[str]:
+        """Names of the valid agent definitions"""
+        self._refresh()
+        with self._lock:
+            return sorted(
+                name for name, entry in self._entries.items()
+                if entry.definition is not None
+            )
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """A copy of the agent definition, so callers can not alter the index"""
+        self._refresh()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            raise FileNotFoundError(f"Agent definition not found: {self.path_for(name)}")
+        if entry.error:
+            raise KeyError(entry.error)
+        return copy.deepcopy(entry.definition)
+
+    def save(self, definition: Dict[str, Any], overwrite: bool = False) -> Path:
+        """Validate and atomically write a definition, then index it"""
+        error = validate_definition(definition)
+        if error:
+            raise ValueError(error)
+        path = self.path_for(definition["name"])
+        if path.exists() and not overwrite:
+            raise FileExistsError(f"Agent {definition['name']} already exists")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(definition, f, indent=2)
+        os.replace(tmp_path, path)
+        self.scan()
+        return path
+
+    def delete(self, name: str) -> None:
+        path = self.path_for(name)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Agent definition not found: {path}")
+        self.scan()
+
+    def start_watching(self) -> None:
+        """Keep the index current in the background"""
+        if self.watching:
+            return
+        self._stop.clear()
+        if Observer is not None and self.directory.is_dir():
+            try:
+                observer = Observer()
+                observer.schedule(_ChangeHandler(self), str(self.directory), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                logger.info(f"Watching {self.directory} for agent changes")
+                return
+            except Exception as e:
+                logger.warning(f"Falling back to polling {self.directory}: {e}")
+        self._poller = threading.Thread(target=self._poll, name="agent-catalog", daemon=True)
+        self._poller.start()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.scan()
+            except Exception as e:
+                logger.warning(f"Scanning {self.directory} failed: {e}")
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        self._poller = None
+
+
+_catalog: Optional[AgentCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_agent_catalog() -> AgentCatalog:
+    """Get or create the shared agent catalog"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = AgentCatalog()
+        return _catalog
@@ -12,6 +12,7 @@ from prompt_toolkit.styles import Style
 from prompt_toolkit.formatted_text import HTML
 from prompt_toolkit.history import FileHistory
 from src.agent import ZerePyAgent
+from src.agent_catalog import get_agent_catalog
 from src.helpers import print_h_bar
 
 # Configure logging
@@ -34,6 +35,8 @@ class Command:
 class ZerePyCLI:
     def __init__(self):
         self.agent = None
+        # Name the current agent was loaded by, to load it again once it is closed
+        self.agent_file = None
         
         # Create config directory if it doesn't exist
         self.config_dir = Path.home() / '.zerepy'
@@ -337,10 +340,25 @@ class ZerePyCLI:
         else:
             logger.info(f"\nNo default agent is loaded, please use the load-agent command to do that.")
 
+    def _close_agent(self) -> None:
+        """Persist the loaded agent's state and release its connections"""
+        if self.agent is None:
+            return
+        try:
+            self.agent.close()
+        except Exception as e:
+            logger.error(f"Error closing agent: {e}")
+        self.agent = None
+
     def _load_agent_from_file(self, agent_name):
+        previous = self.agent_file
+        # Close first, the new agent restores from the state the previous one persists on close
+        self._close_agent()
         try: 
             self.agent = ZerePyAgent(agent_name)
+            self.agent_file = agent_name
             logger.info(f"\n✅ Successfully loaded agent: {self.agent.name}")
+            return
         except FileNotFoundError:
             logger.error(f"Agent file not found: {agent_name}")
             logger.info("Use 'list-agents' to see available agents.")
@@ -349,6 +367,14 @@ class ZerePyCLI:
         except Exception as e:
             logger.error(f"Error loading agent: {e}")
 
+        if previous is not None:
+            try:
+                self.agent = ZerePyAgent(previous)
+                logger.info(f"Keeping previously loaded agent: {self.agent.name}")
+            except Exception as e:
+                self.agent_file = None
+                logger.error(f"Could not reload agent {previous}: {e}")
+
     def _load_default_agent(self) -> None:
         """Load users default agent"""
         agent_general_config_path = Path("agents") / "general.json"
@@ -419,24 +445,26 @@ class ZerePyCLI:
             logger.info("\n🛑 Agent loop stopped by user.")
         except Exception as e:
             logger.error(f"Error in agent loop: {e}")
+        finally:
+            # The loop closes the agent when it stops, load it again for further commands
+            self.agent = None
+            self._load_agent_from_file(self.agent_file)
 
     def list_agents(self, input_list: List[str]) -> None:
         """Handle list agents command"""
         logger.info("\nAvailable Agents:")
-        agents_dir = Path("agents")
-        if not agents_dir.exists():
+        catalog = get_agent_catalog()
+        if not catalog.directory.exists():
             logger.info("No agents directory found.")
             return
 
-        agents = list(agents_dir.glob("*.json"))
+        agents = catalog.names()
         if not agents:
             logger.info("No agents found. Use 'create-agent' to create a new agent.")
             return
 
-        for agent_file in sorted(agents):
-            if agent_file.stem == "general":
-                continue
-            logger.info(f"- {agent_file.stem}")
+        for agent_name in agents:
+            logger.info(f"- {agent_name}")
 
     def load_agent(self, input_list: List[str]) -> None:
         """Handle load agent command"""
@@ -541,6 +569,7 @@ class ZerePyCLI:
 
     def exit(self, input_list: List[str]) -> None:
         """Exit the CLI gracefully"""
+        self._close_agent()
         logger.info("\nGoodbye! 👋")
         sys.exit(0)
 
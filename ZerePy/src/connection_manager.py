@@ -1,107 +1,158 @@
+import importlib
+import inspect
 import logging
-from typing import Any, List, Optional, Type, Dict
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Mapping, Optional, Tuple, Type, Dict
 from src.connections.base_connection import BaseConnection
-from src.connections.anthropic_connection import AnthropicConnection
-from src.connections.eternalai_connection import EternalAIConnection
-from src.connections.goat_connection import GoatConnection
-from src.connections.groq_connection import GroqConnection
-from src.connections.openai_connection import OpenAIConnection
-from src.connections.twitter_connection import TwitterConnection
-from src.connections.farcaster_connection import FarcasterConnection
-from src.connections.ollama_connection import OllamaConnection
-from src.connections.echochambers_connection import EchochambersConnection
-from src.connections.solana_connection import SolanaConnection
-from src.connections.hyperbolic_connection import HyperbolicConnection
-from src.connections.galadriel_connection import GaladrielConnection
-from src.connections.sonic_connection import SonicConnection
-from src.connections.discord_connection import DiscordConnection
-from src.connections.allora_connection import AlloraConnection
-from src.connections.xai_connection import XAIConnection
-from src.connections.ethereum_connection import EthereumConnection
-from src.connections.together_connection import TogetherAIConnection
-from src.connections.evm_connection import EVMConnection
-from src.connections.perplexity_connection import PerplexityConnection
-from src.connections.monad_connection import MonadConnection
-from src.connections.openrouter_connection import OpenRouterConnection
+from src.helpers.llm_cache import LLMResponseCache
+from src.helpers.metrics import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_REJECTED, get_metrics
+from src.runtime import run_sync
 
 logger = logging.getLogger("connection_manager")
 
 
+@dataclass(frozen=True)
+class ConnectionSpec:
+    """Where to find a connection class, resolved only when it is first used"""
+    path: str
+    is_llm_provider: bool = False
+
+
+CONNECTION_REGISTRY: Dict[str, ConnectionSpec] = {
+    "twitter": ConnectionSpec("src.connections.twitter_connection.TwitterConnection"),
+    "anthropic": ConnectionSpec("src.connections.anthropic_connection.AnthropicConnection", True),
+    "openai": ConnectionSpec("src.connections.openai_connection.OpenAIConnection", True),
+    "farcaster": ConnectionSpec("src.connections.farcaster_connection.FarcasterConnection"),
+    "groq": ConnectionSpec("src.connections.groq_connection.GroqConnection", True),
+    "eternalai": ConnectionSpec("src.connections.eternalai_connection.EternalAIConnection", True),
+    "ollama": ConnectionSpec("src.connections.ollama_connection.OllamaConnection", True),
+    "echochambers": ConnectionSpec("src.connections.echochambers_connection.EchochambersConnection"),
+    "goat": ConnectionSpec("src.connections.goat_connection.GoatConnection"),
+    "solana": ConnectionSpec("src.connections.solana_connection.SolanaConnection"),
+    "hyperbolic": ConnectionSpec("src.connections.hyperbolic_connection.HyperbolicConnection", True),
+    "galadriel": ConnectionSpec("src.connections.galadriel_connection.GaladrielConnection", True),
+    "sonic": ConnectionSpec("src.connections.sonic_connection.SonicConnection"),
+    "discord": ConnectionSpec("src.connections.discord_connection.DiscordConnection"),
+    "allora": ConnectionSpec("src.connections.allora_connection.AlloraConnection"),
+    "xai": ConnectionSpec("src.connections.xai_connection.XAIConnection", True),
+    "ethereum": ConnectionSpec("src.connections.ethereum_connection.EthereumConnection"),
+    "together": ConnectionSpec("src.connections.together_connection.TogetherAIConnection", True),
+    "evm": ConnectionSpec("src.connections.evm_connection.EVMConnection"),
+    "perplexity": ConnectionSpec("src.connections.perplexity_connection.PerplexityConnection"),
+    "monad": ConnectionSpec("src.connections.monad_connection.MonadConnection"),
+    "openrouter": ConnectionSpec("src.connections.openrouter_connection.OpenRouterConnection", True),
+    "llm_router": ConnectionSpec("src.connections.llm_router_connection.LLMRouterConnection", True),
+}
+
+_resolved_classes: Dict[str, Type[BaseConnection]] = {}
+
+# Seconds before construction of a connection that failed is attempted again
+DEFAULT_RETRY_AFTER = 30.0
+
+
+class LazyConnections(Mapping):
+    """
+    Mapping of connection name -> connection instance that only imports and
+    constructs a connection the first time it is looked up. A connection whose
+    construction fails raises KeyError, and is constructed again on a lookup
+    made more than retry_after seconds later, so transient failures (RPC or
+    network errors at startup) do not disable it for the process lifetime.
+    """
+
+    def __init__(self, retry_after: float = DEFAULT_RETRY_AFTER):
+        self.retry_after = retry_after
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._instances: Dict[str, BaseConnection] = {}
+        # name -> monotonic time of the last failed construction
+        self._failed_at: Dict[str, float] = {}
+
+    def register(self, name: str, config: Dict[str, Any]) -> None:
+        self._configs[name] = config
+        self._instances.pop(name, None)
+        self._failed_at.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def loaded(self) -> Dict[str, BaseConnection]:
+        """Connections that have already been constructed"""
+        return dict(self._instances)
+
+    def __getitem__(self, name: str) -> BaseConnection:
+        if name in self._instances:
+            return self._instances[name]
+        config = self._configs[name]
+        failed_at = self._failed_at.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            raise KeyError(name)
+        try:
+            connection_class = ConnectionManager._class_name_to_type(name)
+            connection = connection_class(config)
+            connection.bind_connections(self)
+        except Exception as e:
+            logger.error(f"Failed to initialize connection {name}, retrying in {self.retry_after:.0f}s: {e}")
+            self._failed_at[name] = time.monotonic()
+            raise KeyError(name) from e
+        self._failed_at.pop(name, None)
+        self._instances[name] = connection
+        return connection
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._configs))
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._configs
+
+    def items(self):
+        # Skip connections that fail to construct rather than aborting the iteration
+        for name in list(self._configs):
+            try:
+                yield name, self[name]
+            except KeyError:
+                continue
+
+
 class ConnectionManager:
-    def __init__(self, agent_config):
-        self.connections: Dict[str, BaseConnection] = {}
+    def __init__(self, agent_config, llm_cache: Optional[LLMResponseCache] = None):
+        self.connections = LazyConnections()
+        # Optional response cache in front of generate-text on LLM providers
+        self.llm_cache = llm_cache
         for config in agent_config:
             self._register_connection(config)
 
     @staticmethod
-    def _class_name_to_type(class_name: str) -> Type[BaseConnection]:
-        if class_name == "twitter":
-            return TwitterConnection
-        elif class_name == "anthropic":
-            return AnthropicConnection
-        elif class_name == "openai":
-            return OpenAIConnection
-        elif class_name == "farcaster":
-            return FarcasterConnection
-        elif class_name == "groq":
-            return GroqConnection
-        elif class_name == "eternalai":
-            return EternalAIConnection
-        elif class_name == "ollama":
-            return OllamaConnection
-        elif class_name == "echochambers":
-            return EchochambersConnection
-        elif class_name == "goat":
-            return GoatConnection
-        elif class_name == "solana":
-            return SolanaConnection
-        elif class_name == "hyperbolic":
-            return HyperbolicConnection
-        elif class_name == "galadriel":
-            return GaladrielConnection
-        elif class_name == "sonic":
-            return SonicConnection
-        elif class_name == "discord":
-            return DiscordConnection
-        elif class_name == "allora":
-            return AlloraConnection
-        elif class_name == "xai":
-            return XAIConnection
-        elif class_name == "ethereum":
-            return EthereumConnection
-        elif class_name == "together":
-            return TogetherAIConnection
-        elif class_name == "evm":
-            return EVMConnection
-        elif class_name == "perplexity":
-            return PerplexityConnection
-        elif class_name == "monad":
-            return MonadConnection
-        elif class_name == "openrouter":
-            return OpenRouterConnection
-        return None
+    def _class_name_to_type(class_name: str) -> Optional[Type[BaseConnection]]:
+        spec = CONNECTION_REGISTRY.get(class_name)
+        if spec is None:
+            return None
+        if spec.path not in _resolved_classes:
+            module_path, attr = spec.path.rsplit(".", 1)
+            module = importlib.import_module(module_path)
+            _resolved_classes[spec.path] = getattr(module, attr)
+        return _resolved_classes[spec.path]
 
     def _register_connection(self, config_dic: Dict[str, Any]) -> None:
         """
-        Create and register a new connection with configuration
+        Register a connection configuration. The connection class is imported and
+        instantiated the first time the connection is used.
 
         Args:
-            name: Identifier for the connection
-            connection_class: The connection class to instantiate
-            config: Configuration dictionary for the connection
+            config_dic: Configuration dictionary for the connection, keyed by "name"
         """
-        try:
-            name = config_dic["name"]
-            connection_class = self._class_name_to_type(name)
-            connection = connection_class(config_dic)
-            self.connections[name] = connection
-        except Exception as e:
-            logging.error(f"Failed to initialize connection {name}: {e}")
+        name = config_dic.get("name")
+        if name not in CONNECTION_REGISTRY:
+            logger.error(f"Failed to initialize connection {name}: unknown connection type")
+            return
+        self.connections.register(name, config_dic)
 
     def _check_connection(self, connection_string: str) -> bool:
         try:
             connection = self.connections[connection_string]
-            return connection.is_configured(verbose=True)
+            return connection.is_configured_cached(verbose=True)
         except KeyError:
             logging.error(
                 "\nUnknown connection. Try 'list-connections' to see all supported connections."
@@ -116,6 +167,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
             success = connection.configure()
+            connection.invalidate_configured()
 
             if success:
                 logging.info(
@@ -139,7 +191,7 @@ class ConnectionManager:
         logging.info("\nAVAILABLE CONNECTIONS:")
         for name, connection in self.connections.items():
             status = (
-                "✅ Configured" if connection.is_configured() else "❌ Not Configured"
+                "✅ Configured" if connection.is_configured_cached() else "❌ Not Configured"
             )
             logging.info(f"- {name}: {status}")
 
@@ -148,7 +200,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
 
-            if connection.is_configured():
+            if connection.is_configured_cached():
                 logging.info(
                     f"\n✅ {connection_name} is configured. You can use any of its actions."
                 )
@@ -172,62 +224,162 @@ class ConnectionManager:
         except Exception as e:
             logging.error(f"\nAn error occurred: {e}")
 
-    def perform_action(
+    def _prepare_action(
         self, connection_name: str, action_name: str, params: List[Any]
-    ) -> Optional[Any]:
-        """Perform an action on a specific connection with given parameters"""
-        try:
-            connection = self.connections[connection_name]
+    ) -> Optional[Tuple[BaseConnection, Dict[str, Any]]]:
+        """Resolve the connection and build the kwargs for an action, or return None if it cannot run"""
+        connection = self.connections[connection_name]
 
-            if not connection.is_configured():
-                logging.error(
-                    f"\nError: Connection '{connection_name}' is not configured"
-                )
-                return None
+        if not connection.is_configured_cached():
+            logging.error(
+                f"\nError: Connection '{connection_name}' is not configured"
+            )
+            return None
 
-            if action_name not in connection.actions:
-                logging.error(
-                    f"\nError: Unknown action '{action_name}' for connection '{connection_name}'"
-                )
-                return None
+        if action_name not in connection.actions:
+            logging.error(
+                f"\nError: Unknown action '{action_name}' for connection '{connection_name}'"
+            )
+            return None
 
-            action = connection.actions[action_name]
+        action = connection.actions[action_name]
 
-            # Convert list of params to kwargs dictionary, handling both required and optional params
-            kwargs = {}
-            param_index = 0
+        # Convert list of params to kwargs dictionary, handling both required and optional params
+        kwargs = {}
+        param_index = 0
 
-            # Add provided parameters up to the number provided
-            for i, param in enumerate(action.parameters):
-                if param_index < len(params):
-                    kwargs[param.name] = params[param_index]
-                    param_index += 1
+        # Add provided parameters up to the number provided
+        for i, param in enumerate(action.parameters):
+            if param_index < len(params):
+                kwargs[param.name] = params[param_index]
+                param_index += 1
 
-            # Validate all required parameters are present
-            missing_required = [
-                param.name
-                for param in action.parameters
-                if param.required and param.name not in kwargs
-            ]
+        # Validate all required parameters are present
+        missing_required = [
+            param.name
+            for param in action.parameters
+            if param.required and param.name not in kwargs
+        ]
 
-            if missing_required:
-                logging.error(
-                    f"\nError: Missing required parameters: {', '.join(missing_required)}"
-                )
+        if missing_required:
+            logging.error(
+                f"\nError: Missing required parameters: {', '.join(missing_required)}"
+            )
+            return None
+
+        return connection, kwargs
+
+    def _llm_cache_key(
+        self, connection_name: str, connection: BaseConnection, action_name: str, kwargs: Dict[str, Any]
+    ) -> Optional[str]:
+        """Response cache key for a generate-text call, None when the call should not be cached"""
+        if self.llm_cache is None or action_name != "generate-text" or not connection.is_llm_provider:
+            return None
+        return self.llm_cache.make_key(connection_name, connection.config.get("model"), kwargs)
+
+    def perform_action(
+        self, connection_name: str, action_name: str, params: List[Any], use_cache: bool = True
+    ) -> Optional[Any]:
+        """
+        Perform an action on a specific connection with given parameters.
+        With use_cache=False a generate-text call neither reads nor fills the LLM response cache.
+        """
+        metrics = get_metrics().connection_actions
+        token = metrics.begin(connection_name, action_name)
+        result, outcome = None, OUTCOME_ERROR
+        try:
+            prepared = self._prepare_action(connection_name, action_name, params)
+            if prepared is None:
+                outcome = OUTCOME_REJECTED
+                return None
+
+            connection, kwargs = prepared
+            cache_key = self._llm_cache_key(connection_name, connection, action_name, kwargs) if use_cache else None
+            if cache_key is not None:
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    result, outcome = cached, OUTCOME_OK
+                    return cached
+
+            result = connection.perform_action(action_name, kwargs)
+            outcome = OUTCOME_OK
+            if inspect.isgenerator(result):
+                # Streamed results are timed until the consumer is done with them
+                result = metrics.track_stream(token, result)
+                token = None
+            if cache_key is not None:
+                self.llm_cache.put(cache_key, result)
+            return result
+
+        except Exception as e:
+            logging.error(
+                f"\nAn error occurred while trying action {action_name} for {connection_name} connection: {e}"
+            )
+            return None
+        finally:
+            if token is not None:
+                metrics.end(token, result, outcome)
+
+    async def perform_action_async(
+        self, connection_name: str, action_name: str, params: List[Any], use_cache: bool = True
+    ) -> Optional[Any]:
+        """Async variant of perform_action, safe to await from the agent runtime's event loop"""
+        metrics = get_metrics().connection_actions
+        token = metrics.begin(connection_name, action_name)
+        result, outcome = None, OUTCOME_ERROR
+        try:
+            # Resolving a connection may construct it, which can block on imports or RPC setup
+            prepared = await run_sync(self._prepare_action, connection_name, action_name, params)
+            if prepared is None:
+                outcome = OUTCOME_REJECTED
                 return None
 
-            return connection.perform_action(action_name, kwargs)
+            connection, kwargs = prepared
+            cache_key = self._llm_cache_key(connection_name, connection, action_name, kwargs) if use_cache else None
+            if cache_key is not None:
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    result, outcome = cached, OUTCOME_OK
+                    return cached
+
+            result = await connection.perform_action_async(action_name, kwargs)
+            outcome = OUTCOME_OK
+            if inspect.isgenerator(result):
+                # Streamed results are timed until the consumer is done with them
+                result = metrics.track_stream(token, result)
+                token = None
+            if cache_key is not None:
+                self.llm_cache.put(cache_key, result)
+            return result
 
         except Exception as e:
             logging.error(
                 f"\nAn error occurred while trying action {action_name} for {connection_name} connection: {e}"
             )
             return None
+        finally:
+            if token is not None:
+                metrics.end(token, result, outcome)
 
     def get_model_providers(self) -> List[str]:
         """Get a list of all LLM provider connections"""
-        return [
-            name
-            for name, conn in self.connections.items()
-            if conn.is_configured() and getattr(conn, "is_llm_provider", lambda: False)
-        ]
+        providers = []
+        for name in self.connections:
+            if not CONNECTION_REGISTRY[name].is_llm_provider:
+                continue
+            try:
+                if self.connections[name].is_configured_cached():
+                    providers.append(name)
+            except KeyError:
+                continue
+        return providers
+
+    def close(self) -> None:
+        """Close every connection that has been instantiated"""
+        for name, connection in self.connections.loaded().items():
+            try:
+                connection.close()
+            except Exception as e:
+                logger.error(f"Failed to close connection {name}: {e}")
+        if self.llm_cache is not None:
+            self.llm_cache.close()
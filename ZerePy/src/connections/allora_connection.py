@@ -1,6 +1,6 @@
 import logging
 from typing import List, Dict, Any
-from dotenv import set_key
+from src.helpers.credentials import get_credentials_store
 from allora_sdk.v2.api_client import AlloraAPIClient, ChainSlug
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 import os
@@ -42,6 +42,12 @@ class AlloraConnection(BaseConnection):
             )
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "ALLORA_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def register_actions(self) -> None:
         """Register available Allora actions"""
         actions = [
@@ -112,7 +118,7 @@ class AlloraConnection(BaseConnection):
                 raise AlloraConfigurationError("API key cannot be empty")
 
             # Save to .env file
-            set_key('.env', 'ALLORA_API_KEY', api_key)
+            get_credentials_store().update({'ALLORA_API_KEY': api_key})
             print("\n✅ Allora API key saved successfully!")
             return True
             
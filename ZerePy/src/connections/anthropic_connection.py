@@ -1,7 +1,7 @@
 import logging
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from anthropic import Anthropic, NotFoundError
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -53,6 +53,15 @@ class AnthropicConnection(BaseConnection):
                 ],
                 description="Generate text using Anthropic models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from Anthropic models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -76,6 +85,12 @@ class AnthropicConnection(BaseConnection):
             self._client = Anthropic(api_key=api_key)
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "ANTHROPIC_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up Anthropic API authentication"""
         logger.info("\n🤖 ANTHROPIC API SETUP")
@@ -97,7 +112,7 @@ class AnthropicConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'ANTHROPIC_API_KEY', api_key)
+            get_credentials_store().update({'ANTHROPIC_API_KEY': api_key})
             
             # Validate the API key
             client = Anthropic(api_key=api_key)
@@ -114,7 +129,7 @@ class AnthropicConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if Anthropic API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if not api_key:
                 return False
@@ -159,6 +174,38 @@ class AnthropicConnection(BaseConnection):
         except Exception as e:
             raise AnthropicAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Anthropic models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            with client.messages.stream(
+                model=model,
+                max_tokens=1000,
+                temperature=0,
+                system=system_prompt,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": prompt
+                            }
+                        ]
+                    }
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+            
+        except Exception as e:
+            raise AnthropicAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
@@ -1,7 +1,17 @@
+import inspect
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Callable
+from typing import Any, Dict, List, Callable, Optional
 from dataclasses import dataclass
+from src.runtime import run_sync
+from src.helpers.credentials import get_credentials_store
+
+logger = logging.getLogger("connections.base_connection")
+
+# Seconds a cached is_configured() result is considered fresh
+DEFAULT_CONFIGURED_TTL = 300
 
 @dataclass
 class ActionParameter:
@@ -30,6 +40,13 @@ class Action:
 
 class BaseConnection(ABC):
     def __init__(self, config):
+        # Cached result of is_configured(), see is_configured_cached()
+        self._configured_state: Optional[bool] = None
+        self._configured_checked_at = 0.0
+        self._configured_lock = threading.Lock()
+        self._configured_refreshing = False
+        # Bumped on invalidation, results of checks started before it are thrown away
+        self._configured_generation = 0
         try:
             # Dictionary to store action name -> handler method mapping
             self.actions: Dict[str, Callable] = {}
@@ -37,6 +54,8 @@ class BaseConnection(ABC):
             self.config = self.validate_config(config) 
             # Register actions during initialization
             self.register_actions()
+            # Hear about credentials written by the server or another connection's configure()
+            get_credentials_store().subscribe(self.on_credentials_changed)
         except Exception as e:
             logging.error("Could not initialize the connection")
             raise e
@@ -84,6 +103,73 @@ class BaseConnection(ABC):
         """
         pass
 
+    @property
+    def configured_ttl(self) -> float:
+        """How long a cached is_configured() result stays fresh, overridable via "configured_ttl" in the agent config"""
+        config = getattr(self, "config", None) or {}
+        return float(config.get("configured_ttl", DEFAULT_CONFIGURED_TTL))
+
+    def is_configured_cached(self, verbose = False) -> bool:
+        """
+        Cached variant of is_configured() for hot paths.
+
+        The first call runs the real check. Afterwards the cached value is returned
+        immediately; once it is older than configured_ttl it is refreshed on a
+        background thread while the stale value keeps being served.
+        A verbose call always runs the real check.
+        """
+        if verbose or self._configured_state is None:
+            return self._refresh_configured(verbose)
+
+        if time.monotonic() - self._configured_checked_at >= self.configured_ttl:
+            with self._configured_lock:
+                start_refresh = not self._configured_refreshing
+                self._configured_refreshing = True
+            if start_refresh:
+                threading.Thread(target=self._refresh_configured, daemon=True).start()
+
+        return self._configured_state
+
+    def _refresh_configured(self, verbose = False) -> bool:
+        with self._configured_lock:
+            generation = self._configured_generation
+        try:
+            state = bool(self.is_configured(verbose=verbose))
+        except Exception as e:
+            logger.debug(f"Configuration check failed: {e}")
+            state = False
+        with self._configured_lock:
+            if generation != self._configured_generation:
+                # Invalidated while checking, e.g. credentials changed, the result may be stale
+                return state
+            self._configured_state = state
+            self._configured_checked_at = time.monotonic()
+            self._configured_refreshing = False
+        return state
+
+    def invalidate_configured(self) -> None:
+        """Drop the cached is_configured() result, e.g. after credentials change"""
+        with self._configured_lock:
+            self._configured_generation += 1
+            self._configured_state = None
+            self._configured_checked_at = 0.0
+            self._configured_refreshing = False
+
+    def on_credentials_changed(self, keys) -> None:
+        """Called with the changed keys after a credentials update, drops the cached is_configured() result"""
+        self.invalidate_configured()
+
+    def close(self) -> None:
+        """Release long-lived resources (clients, event loops). No-op by default"""
+        pass
+
+    def bind_connections(self, connections) -> None:
+        """
+        Receive the agent's connection mapping right after construction.
+        Only connections that compose other connections need it. No-op by default.
+        """
+        pass
+
     @abstractmethod
     def register_actions(self) -> None:
         """
@@ -112,3 +198,31 @@ class BaseConnection(ABC):
             
         handler = self.actions[action_name]
         return handler(**kwargs)
+
+    async def perform_action_async(self, action_name: str, kwargs: Dict[str, Any]) -> Any:
+        """
+        Awaitable counterpart of perform_action for the async agent runtime.
+
+        Connections can provide a native coroutine for an action by defining
+        `<action_name>_async` (dashes replaced by underscores). Every other action
+        falls back to the sync perform_action on the shared thread pool.
+
+        Args:
+            action_name: Name of the action to perform
+            kwargs: Parameters for the action
+
+        Returns:
+            Any: Result of the action
+        """
+        method = getattr(self, f"{action_name.replace('-', '_')}_async", None)
+        if method is None or not inspect.iscoroutinefunction(method):
+            return await run_sync(self.perform_action, action_name, kwargs)
+
+        if action_name not in self.actions:
+            raise KeyError(f"Unknown action: {action_name}")
+
+        errors = self.actions[action_name].validate_params(kwargs)
+        if errors:
+            raise ValueError(f"Invalid parameters: {', '.join(errors)}")
+
+        return await method(**kwargs)
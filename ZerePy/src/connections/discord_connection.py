@@ -1,10 +1,10 @@
 import os
 import logging
 from typing import Dict, Any
-from dotenv import set_key, load_dotenv
+from src.helpers.credentials import get_credentials_store, load_credentials
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 from src.helpers import print_h_bar
-import requests
+from src.helpers import http_pool
 import json
 
 logger = logging.getLogger("connections.discord_connection")
@@ -194,7 +194,7 @@ class DiscordConnection(BaseConnection):
                 with open(".env", "w") as f:
                     f.write("")
 
-            set_key(".env", "DISCORD_TOKEN", api_key)
+            get_credentials_store().update({"DISCORD_TOKEN": api_key})
 
             self._test_connection(api_key)
 
@@ -208,7 +208,7 @@ class DiscordConnection(BaseConnection):
     def is_configured(self, verbose=False) -> bool:
         """Check if Discord API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv("DISCORD_TOKEN")
             if not api_key:
                 return False
@@ -390,7 +390,7 @@ class DiscordConnection(BaseConnection):
             "Accept": "application/json",
             "Authorization": self._get_request_auth_token(),
         }
-        response = requests.request("PUT", url, headers=headers, data={})
+        response = http_pool.request("PUT", url, headers=headers, data={})
         if response.status_code != 204:
             raise DiscordAPIError(
                 f"Failed to called PUT to Discord: {response.status_code} - {response.text}"
@@ -405,7 +405,7 @@ class DiscordConnection(BaseConnection):
             "Accept": "application/json",
             "Authorization": self._get_request_auth_token(),
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
+        response = http_pool.request("POST", url, headers=headers, data=payload)
         if response.status_code != 200:
             raise DiscordAPIError(
                 f"Failed to call POST to Discord: {response.status_code} - {response.text}"
@@ -420,7 +420,7 @@ class DiscordConnection(BaseConnection):
             "Authorization": self._get_request_auth_token(),
         }
         print(headers)
-        response = requests.request("GET", url, headers=headers, data={})
+        response = http_pool.request("GET", url, headers=headers, data={})
         if response.status_code != 200:
             raise DiscordAPIError(
                 f"Failed to call GET to Discord: {response.status_code} - {response.text}"
@@ -435,7 +435,7 @@ class DiscordConnection(BaseConnection):
         try:
             url = f"{self.base_url}/users/@me"
             headers = {"Accept": "application/json", "Authorization": f"Bot {api_key}"}
-            response = requests.request("GET", url, headers=headers, data={})
+            response = http_pool.request("GET", url, headers=headers, data={})
             if response.status_code != 200:
                 raise DiscordAPIError(
                     f"Failed to call GET to Discord: {response.status_code} - {response.text}"
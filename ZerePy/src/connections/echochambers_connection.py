@@ -1,14 +1,23 @@
 import logging
+import re
 import time
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 from collections import deque
 
 import requests
-from dotenv import load_dotenv
+from src.helpers import http_pool
+from src.helpers.seen_index import SeenIndex
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.echochambers_connection")
 
+DEFAULT_STATE_DIR = Path.home() / ".zerepy" / "echochambers"
+# Message IDs remembered per room, older ones are forgotten
+DEFAULT_SEEN_CAPACITY = 10000
+# Extra history pages read in one pass when more than a page arrived since the last one
+MAX_CATCH_UP_PAGES = 10
+
 class EchochambersConnectionError(Exception):
     """Base exception for Echochambers connection errors"""
     pass
@@ -43,10 +52,24 @@ class EchochambersConnection(BaseConnection):
         logger.info(f"✨ Connected to: {self.api_url}")
         logger.info(f"✨ Entered room: {self.room}")
 
-        # Initialize message queue and tracking
-        self.message_queue: List[Dict[str, Any]] = []
-        self.processed_messages = set()
+        # Bounded and persisted, so restarts neither replay old messages nor grow memory forever
+        room_key = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{self.room}_{self.sender_username}")
+        self.processed_messages = SeenIndex(
+            DEFAULT_STATE_DIR / f"{room_key}.json",
+            capacity=config.get("seen_capacity", DEFAULT_SEEN_CAPACITY)
+        )
+        # Written on every reply, a restart must never reply to a message twice
+        self.replied_messages = SeenIndex(
+            DEFAULT_STATE_DIR / f"{room_key}_replied.json",
+            capacity=config.get("seen_capacity", DEFAULT_SEEN_CAPACITY),
+            flush_every=1
+        )
+
+        # Queued messages are saved with the cursor, so messages read but not replied to survive a restart
         self.max_queue_size = 100
+        self.message_queue: List[Dict[str, Any]] = list(
+            self.processed_messages.meta.get("queue", [])
+        )[:self.max_queue_size]
         
         # Keep track of our last messages to ensure uniqueness
         self.sent_messages = deque(maxlen=self.post_history_track)
@@ -55,7 +78,7 @@ class EchochambersConnection(BaseConnection):
         self.metrics = {
             'messages_sent': 0,
             'messages_failed': 0,
-            'api_latency': [],
+            'api_latency': deque(maxlen=100),
             'last_error': None,
             'last_metrics_log': time.time()
         }
@@ -77,6 +100,9 @@ class EchochambersConnection(BaseConnection):
         if not isinstance(config["history_read_count"], int) or config["history_read_count"] <= 0:
             raise ValueError("history_read_count must be a positive integer")
 
+        if "reply_parallelism" in config and (not isinstance(config["reply_parallelism"], int) or config["reply_parallelism"] <= 0):
+            raise ValueError("reply_parallelism must be a positive integer")
+
         return config
 
     def register_actions(self) -> None:
@@ -90,7 +116,20 @@ class EchochambersConnection(BaseConnection):
             Action(
                 name="get-room-history",
                 description="Get message history from the Echochambers room",
-                parameters=[]
+                parameters=[
+                    ActionParameter(
+                        name="since",
+                        description="Only return messages newer than this timestamp",
+                        required=False,
+                        type=str
+                    ),
+                    ActionParameter(
+                        name="before",
+                        description="Only return messages older than this timestamp",
+                        required=False,
+                        type=str
+                    )
+                ]
             ),
             Action(
                 name="send-message",
@@ -132,12 +171,30 @@ class EchochambersConnection(BaseConnection):
             self._handle_error("Failed to get room info", e)
             raise
 
-    def get_room_history(self) -> List[Dict[str, Any]]:
-        """Get message history from the room"""
+    def get_room_history(self, since: Optional[str] = None, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get message history from the room, newest first, optionally only messages between since and before"""
+        return self._read_history_page(since, before)[0]
+
+    def _read_history_page(self, since: Optional[str] = None, before: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page of history, newest first, and whether it reaches back to since.
+        A full page whose messages are all newer than since may have left older ones unread.
+        """
         try:
             url = f"{self.api_url}/api/rooms/{self.room}/history"
-            response = self._make_request("GET", url)
-            messages = response.get('messages', [])
+            # Servers that support them only send the matching messages, the filter below covers those that do not
+            params = {"limit": self.history_read_count}
+            if since:
+                params["since"] = since
+            if before:
+                params["before"] = before
+            response = self._make_request("GET", url, params=params)
+            messages = [msg for msg in response.get('messages', [])[:self.history_read_count] if isinstance(msg, dict)]
+            complete = (
+                not since
+                or len(messages) < self.history_read_count
+                or any(msg.get("timestamp") and msg["timestamp"] <= since for msg in messages)
+            )
             return [
                 {
                     "id": msg.get("id", ""),
@@ -149,8 +206,10 @@ class EchochambersConnection(BaseConnection):
                     "timestamp": msg.get("timestamp", ""),
                     "roomId": msg.get("roomId", "")
                 }
-                for msg in messages[:self.history_read_count] if isinstance(msg, dict)
-            ]
+                for msg in messages
+                if not (since and msg.get("timestamp") and msg["timestamp"] < since)
+                and not (before and msg.get("timestamp") and msg["timestamp"] > before)
+            ], complete
         except Exception as e:
             self._handle_error("Failed to get room history", e)
             raise
@@ -181,12 +240,29 @@ class EchochambersConnection(BaseConnection):
             self._handle_error("Failed to send message", e)
             raise
 
-    def process_room_history(self) -> None:
-        """Process and queue messages for replies"""
+    def process_room_history(self) -> int:
+        """Queue messages that arrived since the previous read, returns how many were queued"""
         try:
-            history = self.get_room_history()
+            since = self.processed_messages.meta.get("cursor")
+            history, complete = self._read_history_page(since=since)
+
+            # More than a page arrived since the last pass, page back towards the cursor
+            pages = 0
+            while not complete and history and pages < MAX_CATCH_UP_PAGES:
+                known = {message['id'] for message in history}
+                older, complete = self._read_history_page(since=since, before=history[-1]['timestamp'])
+                older = [message for message in older if message['id'] not in known]
+                if not older:
+                    # The server ignores "before", nothing more can be read
+                    break
+                history.extend(older)
+                pages += 1
+            if not complete:
+                logger.warning(f"Could not read back to {since}, messages before {history[-1]['timestamp']} may be missed")
 
             # Process messages in reverse (oldest first)
+            queued = 0
+            timestamps = []
             for message in reversed(history):
                 if len(self.message_queue) >= self.max_queue_size:
                     break
@@ -194,13 +270,43 @@ class EchochambersConnection(BaseConnection):
                         message['sender']['username'] != self.sender_username):
                     self.message_queue.append(message)
                     self.processed_messages.add(message['id'])
+                    queued += 1
+                if message['timestamp']:
+                    timestamps.append(message['timestamp'])
+
+            # Only move past messages that were looked at, a full queue leaves the rest for later.
+            # With unread messages behind the oldest one read, stay there so a later pass can reach them
+            if timestamps:
+                self.processed_messages.set_meta("cursor", timestamps[-1] if complete else timestamps[0])
+            self.save_queue()
 
             logger.info(f"Queued {len(self.message_queue)} messages for processing")
             self._log_metrics()
+            return queued
         except Exception as e:
             self._handle_error("Failed to process room history", e)
             raise
 
+    def save_queue(self) -> None:
+        """Persist the queue together with the cursor and processed IDs"""
+        self.processed_messages.set_meta("queue", list(self.message_queue))
+        self.processed_messages.flush()
+
+    def drain_message_queue(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Take up to limit queued messages off the queue, oldest first. The saved
+        queue keeps them until save_queue() is called once they are handled.
+        """
+        count = len(self.message_queue) if limit is None else min(limit, len(self.message_queue))
+        messages = self.message_queue[:count]
+        del self.message_queue[:count]
+        return messages
+
+    def requeue_messages(self, messages: List[Dict[str, Any]]) -> None:
+        """Put messages that could not be handled back at the front of the queue"""
+        self.message_queue[:0] = messages
+        del self.message_queue[self.max_queue_size:]
+
     def _make_request(self, method: str, url: str, **kwargs) -> Any:
         """Make HTTP request with retries and error handling"""
         headers = {
@@ -211,7 +317,9 @@ class EchochambersConnection(BaseConnection):
 
         for attempt in range(3):
             try:
-                response = requests.request(method, url, timeout=10, **kwargs)
+                start = time.monotonic()
+                response = http_pool.request(method, url, timeout=10, **kwargs)
+                self.metrics['api_latency'].append((time.monotonic() - start) * 1000)
                 if response.status_code == 429:  # Rate limit
                     retry_after = int(response.headers.get('Retry-After', 60))
                     logger.warning(f"Rate limit hit, waiting {retry_after}s")
@@ -284,6 +392,10 @@ class EchochambersConnection(BaseConnection):
                 logger.error(f"Echochambers connection test failed: {str(e)}")
             return False
 
+    def close(self) -> None:
+        self.processed_messages.close()
+        self.replied_messages.close()
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         """Execute an Echochambers action with validation"""
         action = self.actions.get(action_name)
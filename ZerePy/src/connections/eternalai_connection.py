@@ -1,12 +1,12 @@
 import logging
 import os
 import json
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 from web3 import Web3
-import requests
+from src.helpers import http_pool
 
 logger = logging.getLogger("connections.eternalai_connection")
 IPFS = "ipfs://"
@@ -63,6 +63,15 @@ class EternalAIConnection(BaseConnection):
                 ],
                 description="Generate text using EternalAI models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from EternalAI models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -87,6 +96,12 @@ class EternalAIConnection(BaseConnection):
             self._client = OpenAI(api_key=api_key, base_url=api_url)
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if keys & {"EternalAI_API_KEY", "EternalAI_API_URL"}:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up EternalAI API authentication"""
         logger.info("\n🤖 EternalAI API SETUP")
@@ -110,8 +125,7 @@ class EternalAIConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'EternalAI_API_KEY', api_key)
-            set_key('.env', 'EternalAI_API_URL', api_url)
+            get_credentials_store().update({'EternalAI_API_KEY': api_key, 'EternalAI_API_URL': api_url})
 
             # Validate credentials
             client = OpenAI(api_key=api_key, base_url=api_url)
@@ -128,7 +142,7 @@ class EternalAIConnection(BaseConnection):
     def is_configured(self, verbose=False) -> bool:
         """Check if EternalAI API credentials are configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('EternalAI_API_KEY')
             api_url = os.getenv('EternalAI_API_URL')
             if not api_key or not api_url:
@@ -147,12 +161,12 @@ class EternalAIConnection(BaseConnection):
     def get_on_chain_system_prompt_content(on_chain_data: str) -> str:
         if IPFS in on_chain_data:
             light_house = on_chain_data.replace(IPFS, LIGHTHOUSE_IPFS)
-            response = requests.get(light_house)
+            response = http_pool.get(light_house)
             if response.status_code == 200:
                 return response.text
             else:
                 gcs = on_chain_data.replace(IPFS, GCS_ETERNAL_AI_BASE_URL)
-                response = requests.get(gcs)
+                response = http_pool.get(gcs)
                 if response.status_code == 200:
                     return response.text
                 else:
@@ -163,39 +177,49 @@ class EternalAIConnection(BaseConnection):
             else:
                 raise Exception(f"invalid on-chain system prompt")
 
+    def _prepare_completion(self, system_prompt: str, model: str = None, chain_id: str = None):
+        """Resolve client, model, chain and the (possibly on-chain) system prompt for a completion"""
+        client = self._get_client()
+        model = model or self.config["model"]
+        logger.info(f"model {model}")
+
+        chain_id = chain_id or self.config["chain_id"]
+        if not chain_id or chain_id == "":
+            chain_id = "45762"
+        logger.info(f"chain_id {chain_id}")
+
+        agent_id = self.config["agent_id"] or None
+        contract_address = self.config["contract_address"] or None
+        rpc = self.config["rpc_url"] or None
+
+        if agent_id and contract_address and rpc:
+            logger.info(f"agent_id: {agent_id}, contract_address: {contract_address}")
+            # call on-chain system prompt
+            web3 = Web3(Web3.HTTPProvider(rpc))
+            logger.info(f"web3 connected to {rpc} {web3.is_connected()}")
+            contract = web3.eth.contract(address=contract_address, abi=AGENT_CONTRACT_ABI)
+            result = contract.functions.getAgentSystemPrompt(agent_id).call()
+            logger.info(f"on-chain system_prompt: {result}")
+            if len(result) > 0:
+                try:
+                    system_prompt = self.get_on_chain_system_prompt_content(result[0].decode("utf-8"))
+                    logging.info(f"new system_prompt: {system_prompt}")
+                except Exception as e:
+                    logger.error(f"get on-chain system_prompt fail {e}")
+
+        return client, model, chain_id, system_prompt
+
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, chain_id: str = None, **kwargs) -> str:
         """Generate text using EternalAI models"""
         try:
-            client = self._get_client()
-            model = model or self.config["model"]
-            logger.info(f"model {model}")
-
-            chain_id = chain_id or self.config["chain_id"]
-            if not chain_id or chain_id == "":
-                chain_id = "45762"
-            logger.info(f"chain_id {chain_id}")
-
-            agent_id = self.config["agent_id"] or None
-            contract_address = self.config["contract_address"] or None
-            rpc = self.config["rpc_url"] or None
-
-            if agent_id and contract_address and rpc:
-                logger.info(f"agent_id: {agent_id}, contract_address: {contract_address}")
-                # call on-chain system prompt
-                web3 = Web3(Web3.HTTPProvider(rpc))
-                logger.info(f"web3 connected to {rpc} {web3.is_connected()}")
-                contract = web3.eth.contract(address=contract_address, abi=AGENT_CONTRACT_ABI)
-                result = contract.functions.getAgentSystemPrompt(agent_id).call()
-                logger.info(f"on-chain system_prompt: {result}")
-                if len(result) > 0:
-                    try:
-                        system_prompt = self.get_on_chain_system_prompt_content(result[0].decode("utf-8"))
-                        logging.info(f"new system_prompt: {system_prompt}")
-                    except Exception as e:
-                        logger.error(f"get on-chain system_prompt fail {e}")
-
             stream = self.config["stream"]
             logger.info(f"call completions api stream {stream}")
+            if stream:
+                content = "".join(self.generate_text_stream(prompt, system_prompt, model, chain_id))
+                logger.info(f"end call completions api with content:\n\n {content} \n\n\n\n")
+                return content
+
+            client, model, chain_id, system_prompt = self._prepare_completion(system_prompt, model, chain_id)
             completion = client.chat.completions.create(
                 model=model,
                 messages=[
@@ -203,41 +227,52 @@ class EternalAIConnection(BaseConnection):
                     {"role": "user", "content": prompt},
                 ],
                 extra_body={"chain_id": chain_id},
-                stream=stream,
+                stream=False,
             )
-            if not stream:
-                if completion.choices is None:
-                    raise EternalAIAPIError(f"Text generation failed: completion.choices is None")
-                try:
-                    if completion.onchain_data is not None:
-                        logger.info(f"response onchain data: {json.dumps(completion.onchain_data, indent=4)}")
-                except:
-                    logger.info(f"response onchain data object: {completion.onchain_data}", )
-                logger.info(
-                    f"end call completions api with content:\n\n {completion.choices[0].message.content} \n\n\n\n")
-                return completion.choices[0].message.content
-            else:
-                content = ""
-                # logger.info(f"completion {str(completion)}")
-                for chunk in completion:
-                    if chunk.choices is not None:
-                        delta = chunk.choices[0].delta
-                        if delta is not None and delta.content is not None:
-                            content += delta.content
-                            # logger.info(f"content -> {delta.content}")
-                    else:
-                        try:
-                            if chunk.onchain_data is not None and chunk.onchain_data.infer_id is not None and chunk.onchain_data.infer_id != "":
-                                logger.info(f"response onchain data: {json.dumps(chunk.onchain_data, indent=4)}")
-                        except:
-                            logger.info(f"response onchain data object: {chunk.onchain_data}", )
-                        break
-                logger.info(f"end call completions api with content:\n\n {content} \n\n\n\n")
-                return content
+            if completion.choices is None:
+                raise EternalAIAPIError(f"Text generation failed: completion.choices is None")
+            try:
+                if completion.onchain_data is not None:
+                    logger.info(f"response onchain data: {json.dumps(completion.onchain_data, indent=4)}")
+            except:
+                logger.info(f"response onchain data object: {completion.onchain_data}", )
+            logger.info(
+                f"end call completions api with content:\n\n {completion.choices[0].message.content} \n\n\n\n")
+            return completion.choices[0].message.content
 
         except Exception as e:
             raise EternalAIAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, chain_id: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from EternalAI models, yielding chunks as they arrive"""
+        try:
+            client, model, chain_id, system_prompt = self._prepare_completion(system_prompt, model, chain_id)
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                extra_body={"chain_id": chain_id},
+                stream=True,
+            )
+            for chunk in completion:
+                if chunk.choices is not None:
+                    delta = chunk.choices[0].delta
+                    if delta is not None and delta.content is not None:
+                        yield delta.content
+                else:
+                    # The final chunk carries the on-chain inference data instead of choices
+                    try:
+                        if chunk.onchain_data is not None and chunk.onchain_data.infer_id is not None and chunk.onchain_data.infer_id != "":
+                            logger.info(f"response onchain data: {json.dumps(chunk.onchain_data, indent=4)}")
+                    except:
+                        logger.info(f"response onchain data object: {chunk.onchain_data}", )
+                    break
+
+        except Exception as e:
+            raise EternalAIAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
@@ -1,13 +1,17 @@
 import logging
 import os
 import time
-import requests
-from typing import Dict, Any, Optional, Union
-from dotenv import load_dotenv, set_key
+from src.helpers import http_pool
+from typing import Dict, Any, Optional, Union, List
+from src.helpers.credentials import get_credentials_store, load_credentials
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from src.constants.networks import EVM_NETWORKS
 from src.constants.abi import ERC20_ABI
+from src.helpers.evm.token_cache import get_token_cache
+from src.helpers.evm.nonce_manager import TransactionReverted, confirm_transaction, get_nonce_manager, send_transaction
+from src.helpers.evm.multicall import address_list, get_token_balance, get_token_balance_entry, portfolio_balances
+from src.helpers.ticker_cache import rank_by_liquidity_volume, resolve_ticker
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.ethereum_connection")
@@ -93,6 +97,19 @@ class EthereumConnection(BaseConnection):
                 ],
                 description="Get ETH or token balance"
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter("token_addresses", True, address_list, "Comma-separated token addresses (native token address for the native balance)"),
+                    ActionParameter("holders", False, address_list, "Comma-separated holder addresses (defaults to your wallet)")
+                ],
+                description="Get balances of many tokens in a single RPC call"
+            ),
+            "get-pending-transactions": Action(
+                name="get-pending-transactions",
+                parameters=[],
+                description="List transactions sent from your wallet that are not mined yet"
+            ),
             "transfer": Action(
                 name="transfer", 
                 parameters=[
@@ -151,9 +168,10 @@ class EthereumConnection(BaseConnection):
             explorer_key = input("\nEnter your block explorer API key (optional, press Enter to skip): ")
             
             # Save credentials
-            set_key('.env', 'ETH_PRIVATE_KEY', private_key)
+            credentials = {'ETH_PRIVATE_KEY': private_key}
             if explorer_key:
-                set_key('.env', f'ETH_EXPLORER_KEY', explorer_key)
+                credentials['ETH_EXPLORER_KEY'] = explorer_key
+            get_credentials_store().update(credentials)
 
             logger.info("\n✅ Ethereum configuration saved successfully!")
             return True
@@ -165,7 +183,7 @@ class EthereumConnection(BaseConnection):
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Ethereum connection is properly configured"""
         try:
-            load_dotenv()
+            load_credentials()
             
             # Check private key exists
             private_key = os.getenv('ETH_PRIVATE_KEY')
@@ -202,35 +220,7 @@ class EthereumConnection(BaseConnection):
     def _get_token_address(self, ticker: str) -> Optional[str]:
         """Helper function to get token address from DEXScreener"""
         try:
-            response = requests.get(
-                f"https://api.dexscreener.com/latest/dex/search?q={ticker}"
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            if not data.get('pairs'):
-                return None
-
-            # Filter pairs for Ethereum network
-            eth_pairs = [
-                pair for pair in data["pairs"] 
-                if pair.get("chainId", "").lower() == "ethereum"
-            ]
-            
-            # Sort by liquidity/volume
-            eth_pairs.sort(
-                key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0) * 
-                            float(x.get('volume', {}).get('h24', 0) or 0),
-                reverse=True
-            )
-
-            # Find exact ticker match
-            for pair in eth_pairs:
-                base_token = pair.get("baseToken", {})
-                if base_token.get("symbol", "").lower() == ticker.lower():
-                    return base_token.get("address")
-            
-            return None
+            return resolve_ticker("ethereum", ticker, rank_by_liquidity_volume)
 
         except Exception as error:
             logger.error(f"Error fetching token address: {str(error)}")
@@ -252,20 +242,40 @@ class EthereumConnection(BaseConnection):
         """Helper function to get raw balance value"""
         if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
             # Get ERC20 token balance
-            contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
-            )
-            balance = contract.functions.balanceOf(
-                Web3.to_checksum_address(address)
-            ).call()
-            decimals = contract.functions.decimals().call()
-            return balanqce / (10 ** decimals)
+            return get_token_balance(self._web3, token_address, address)
         else:
             # Get native ETH balance
             balance = self._web3.eth.get_balance(Web3.to_checksum_address(address))
             return self._web3.from_wei(balance, 'ether')
 
+    def get_balances(self, token_addresses: List[str], holders: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get balances of many tokens for one or more holders.
+        Balances and decimals are resolved in one Multicall3 call (or one JSON-RPC batch).
+        """
+        try:
+            if not holders:
+                private_key = os.getenv('ETH_PRIVATE_KEY')
+                if not private_key:
+                    raise ValueError("No wallet private key configured")
+                holders = [self._web3.eth.account.from_key(private_key).address]
+            return portfolio_balances(self._web3, address_list(token_addresses), address_list(holders))
+        except Exception as e:
+            logger.error(f"Failed to get balances: {e}")
+            raise
+
+    def get_pending_transactions(self) -> Dict[int, Dict[str, Any]]:
+        """Transactions sent through the local nonce manager that are not mined yet, keyed by nonce"""
+        try:
+            private_key = os.getenv('ETH_PRIVATE_KEY')
+            if not private_key:
+                raise ValueError("No wallet private key configured")
+            account = self._web3.eth.account.from_key(private_key)
+            return get_nonce_manager(self._web3, account.address).pending()
+        except Exception as e:
+            logger.error(f"Failed to get pending transactions: {e}")
+            raise
+
     def get_balance(self, token_address: str | None = None) -> float:
         """
         Get  balance and value for the configured wallet.
@@ -291,24 +301,17 @@ class EthereumConnection(BaseConnection):
                 raw_balance = self._web3.eth.get_balance(account.address)
                 return self._web3.from_wei(raw_balance, 'ether')
             
-            # Get token contract
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address), 
-                abi=ERC20_ABI 
-            )
-            
-            # Get token info
-            symbol = token_contract.functions.symbol().call()
-            decimals = token_contract.functions.decimals().call()
-            
-            # Get balance
-            raw_balance = token_contract.functions.balanceOf(account.address).call()
-            token_balance = raw_balance / (10 ** decimals)
+            # Read balanceOf and decimals in one round-trip
+            entry = get_token_balance_entry(self._web3, token_address, account.address)
+            if entry["raw"] is None or entry["decimals"] is None:
+                return False
+            raw_balance = entry["raw"]
+            token_balance = entry["balance"]
             
             # Try to get ETH value using Kyberswap price API
             try:
                 kyber_url = f"{self.aggregator_api}/tokens/rates"
-                response = requests.get(kyber_url, params={
+                response = http_pool.get(kyber_url, params={
                     "tokenIn": token_address, 
                     "tokenOut": self.NATIVE_TOKEN, 
                     "amount": str(raw_balance) 
@@ -340,16 +343,12 @@ class EthereumConnection(BaseConnection):
             account = self._web3.eth.account.from_key(private_key)
             
             # Get latest nonce and gas price
-            nonce = self._web3.eth.get_transaction_count(account.address)
             gas_price = self._web3.eth.gas_price
             
             if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
                 # Prepare ERC20 transfer
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
-                decimals = contract.functions.decimals().call()
+                contract = get_token_cache().contract(self._web3, token_address)
+                decimals = get_token_cache().decimals(self._web3, token_address)
                 amount_raw = int(amount * (10 ** decimals))
                 
                 tx = contract.functions.transfer(
@@ -357,14 +356,12 @@ class EthereumConnection(BaseConnection):
                     amount_raw
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': nonce,
                     'gasPrice': gas_price,
                     'chainId': self.chain_id
                 })
             else:
                 # Prepare native ETH transfer
                 tx = {
-                    'nonce': nonce,
                     'to': Web3.to_checksum_address(to_address),
                     'value': self._web3.to_wei(amount, 'ether'),
                     'gas': 21000,  # Standard ETH transfer gas
@@ -398,8 +395,7 @@ class EthereumConnection(BaseConnection):
             private_key = os.getenv('ETH_PRIVATE_KEY')
             account = self._web3.eth.account.from_key(private_key)
             
-            signed = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
             
             # Return explorer link
             tx_url = self._get_explorer_link(tx_hash.hex())
@@ -424,11 +420,7 @@ class EthereumConnection(BaseConnection):
             if token_in.lower() == self.NATIVE_TOKEN.lower():
                 amount_raw = self._web3.to_wei(amount, 'ether')
             else:
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_in),
-                    abi=ERC20_ABI
-                )
-                decimals = token_contract.functions.decimals().call()
+                decimals = get_token_cache().decimals(self._web3, token_in)
                 amount_raw = int(amount * (10 ** decimals))
             
             # Prepare API request
@@ -441,7 +433,7 @@ class EthereumConnection(BaseConnection):
                 "gasInclude": "true"
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            response = http_pool.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -460,7 +452,8 @@ class EthereumConnection(BaseConnection):
         token_out: str,
         amount: float,
         slippage: float,
-        route_data: Dict
+        route_data: Dict,
+        approval_pending: bool = False
     ) -> Dict[str, Any]:
         """Build swap transaction using route data"""
         try:
@@ -479,7 +472,7 @@ class EthereumConnection(BaseConnection):
                 "source": "zerepy"
             }
             
-            response = requests.post(url, headers=headers, json=payload)
+            response = http_pool.post(url, headers=headers, json=payload)
             response.raise_for_status()
             
             data = response.json()
@@ -492,14 +485,13 @@ class EthereumConnection(BaseConnection):
                 'to': Web3.to_checksum_address(route_data["routerAddress"]),
                 'data': data["data"]["data"],
                 'value': self._web3.to_wei(amount, 'ether') if token_in.lower() == self.NATIVE_TOKEN.lower() else 0,
-                'nonce': self._web3.eth.get_transaction_count(account.address),
                 'gasPrice': self._web3.eth.gas_price,
                 'chainId': self.chain_id
             }
             
-            # Estimate gas
+            # Estimate gas, against the pending block while the approval is not mined yet
             try:
-                gas_estimate = self._web3.eth.estimate_gas(tx)
+                gas_estimate = self._web3.eth.estimate_gas(tx, "pending" if approval_pending else "latest")
                 tx['gas'] = int(gas_estimate * 1.2)  # Add 20% buffer
             except Exception as e:
                 logger.warning(f"Gas estimation failed: {e}, using default gas limit")
@@ -511,64 +503,56 @@ class EthereumConnection(BaseConnection):
             logger.error(f"Failed to build swap transaction: {str(e)}")
             raise
 
-        def _handle_token_approval(
-            self,
-            token_address: str,
-            spender_address: str,
-            amount: int
-        ) -> Optional[str]:
-            """Handle token approval for spender, returns tx hash if approval needed"""
-            try:
-                private_key = os.getenv('ETH_PRIVATE_KEY')
-                account = self._web3.eth.account.from_key(private_key)
+    def _handle_token_approval(
+        self,
+        token_address: str,
+        spender_address: str,
+        amount: int
+    ) -> Optional[str]:
+        """Handle token approval for spender, returns tx hash if approval needed"""
+        try:
+            private_key = os.getenv('ETH_PRIVATE_KEY')
+            account = self._web3.eth.account.from_key(private_key)
+            
+            token_contract = get_token_cache().contract(self._web3, token_address)
+            
+            # Check current allowance
+            current_allowance = token_contract.functions.allowance(
+                account.address,
+                spender_address
+            ).call()
+            
+            if current_allowance < amount:
+                # Prepare approval transaction
+                approve_tx = token_contract.functions.approve(
+                    spender_address,
+                    amount
+                ).build_transaction({
+                    'from': account.address,
+                    'gasPrice': self._web3.eth.gas_price,
+                    'chainId': self.chain_id
+                })
                 
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
+                # Estimate gas for approval
+                try:
+                    gas_estimate = self._web3.eth.estimate_gas(approve_tx)
+                    approve_tx['gas'] = int(gas_estimate * 1.1)  # Add 10% buffer
+                except Exception as e:
+                    logger.warning(f"Approval gas estimation failed: {e}, using default")
+                    approve_tx['gas'] = 100000  # Default gas for approvals
                 
-                # Check current allowance
-                current_allowance = token_contract.functions.allowance(
-                    account.address,
-                    spender_address
-                ).call()
+                # Sign and send approval transaction
+                tx_hash = send_transaction(self._web3, account, approve_tx)
+
+                # Not waiting for the receipt: the swap takes the next nonce and
+                # is mined after the approval, swap() checks the receipt once both are sent
+                return tx_hash.hex()
                 
-                if current_allowance < amount:
-                    # Prepare approval transaction
-                    approve_tx = token_contract.functions.approve(
-                        spender_address,
-                        amount
-                    ).build_transaction({
-                        'from': account.address,
-                        'nonce': self._web3.eth.get_transaction_count(account.address),
-                        'gasPrice': self._web3.eth.gas_price,
-                        'chainId': self.chain_id
-                    })
-                    
-                    # Estimate gas for approval
-                    try:
-                        gas_estimate = self._web3.eth.estimate_gas(approve_tx)
-                        approve_tx['gas'] = int(gas_estimate * 1.1)  # Add 10% buffer
-                    except Exception as e:
-                        logger.warning(f"Approval gas estimation failed: {e}, using default")
-                        approve_tx['gas'] = 100000  # Default gas for approvals
-                    
-                    # Sign and send approval transaction
-                    signed_approve = account.sign_transaction(approve_tx)
-                    tx_hash = self._web3.eth.send_raw_transaction(signed_approve.rawTransaction)
-                    
-                    # Wait for approval to be mined
-                    receipt = self._web3.eth.wait_for_transaction_receipt(tx_hash)
-                    if receipt['status'] != 1:
-                        raise ValueError("Token approval failed")
-                    
-                    return tx_hash.hex()
-                    
-                return None
+            return None
 
-            except Exception as e:
-                logger.error(f"Token approval failed: {str(e)}")
-                raise
+        except Exception as e:
+            logger.error(f"Token approval failed: {str(e)}")
+            raise
 
     def swap(
         self,
@@ -598,17 +582,14 @@ class EthereumConnection(BaseConnection):
             )
             
             # Handle token approval if needed
+            approval_hash = None
             if token_in.lower() != self.NATIVE_TOKEN.lower():
                 router_address = route_data["routerAddress"]
                 
                 if token_in.lower() == "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2".lower():  # WETH
                     amount_raw = self._web3.to_wei(amount, 'ether')
                 else:
-                    token_contract = self._web3.eth.contract(
-                        address=Web3.to_checksum_address(token_in),
-                        abi=ERC20_ABI
-                    )
-                    decimals = token_contract.functions.decimals().call()
+                    decimals = get_token_cache().decimals(self._web3, token_in)
                     amount_raw = int(amount * (10 ** decimals))
                     
                 approval_hash = self._handle_token_approval(token_in, router_address, amount_raw)
@@ -616,11 +597,17 @@ class EthereumConnection(BaseConnection):
                     logger.info(f"Token approval transaction: {self._get_explorer_link(approval_hash)}")
             
             # Build and send swap transaction
-            swap_tx = self._build_swap_tx(token_in, token_out, amount, slippage, route_data)
-            signed_tx = account.sign_transaction(swap_tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            swap_tx = self._build_swap_tx(token_in, token_out, amount, slippage, route_data, approval_pending=bool(approval_hash))
+            tx_hash = send_transaction(self._web3, account, swap_tx)
 
             tx_url = self._get_explorer_link(tx_hash.hex())
+
+            if approval_hash:
+                # The swap was sent right behind the approval, it only goes through if the approval did
+                try:
+                    confirm_transaction(self._web3, account.address, approval_hash)
+                except TransactionReverted:
+                    raise ValueError(f"Token approval {self._get_explorer_link(approval_hash)} reverted, swap {tx_url} will revert too")
             
             return (f"Swap transaction sent!(allow time for scanner to populate it):\n"
                     f"Transaction: {tx_url}")
@@ -633,7 +620,7 @@ class EthereumConnection(BaseConnection):
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
 
-        load_dotenv()
+        load_credentials()
         
         if not self.is_configured(verbose=True):
             raise EthereumConnectionError("Ethereum connection is not properly configured")
@@ -1,13 +1,17 @@
 import logging
 import os
 import time
-import requests
-from typing import Dict, Any, Optional, Union
-from dotenv import load_dotenv, set_key
+from src.helpers import http_pool
+from typing import Dict, Any, Optional, Union, List
+from src.helpers.credentials import get_credentials_store, load_credentials
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from src.constants.networks import EVM_NETWORKS
 from src.constants.abi import ERC20_ABI
+from src.helpers.evm.token_cache import get_token_cache
+from src.helpers.evm.nonce_manager import TransactionReverted, confirm_transaction, get_nonce_manager, send_transaction
+from src.helpers.evm.multicall import address_list, get_token_balance, portfolio_balances
+from src.helpers.ticker_cache import rank_by_liquidity_volume, resolve_ticker
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.evm_connection")
@@ -100,6 +104,19 @@ class EVMConnection(BaseConnection):
                 ],
                 description="Get ETH or token balance"
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter("token_addresses", True, address_list, "Comma-separated token addresses (native token address for the native balance)"),
+                    ActionParameter("holders", False, address_list, "Comma-separated holder addresses (defaults to your wallet)")
+                ],
+                description="Get balances of many tokens in a single RPC call"
+            ),
+            "get-pending-transactions": Action(
+                name="get-pending-transactions",
+                parameters=[],
+                description="List transactions sent from your wallet that are not mined yet"
+            ),
             "transfer": Action(
                 name="transfer", 
                 parameters=[
@@ -158,9 +175,10 @@ class EVMConnection(BaseConnection):
             explorer_key = input("\nEnter your block explorer API key (optional, press Enter to skip): ")
             
             # Save credentials using the unified EVM_PRIVATE_KEY variable
-            set_key('.env', 'EVM_PRIVATE_KEY', private_key)
+            credentials = {'EVM_PRIVATE_KEY': private_key}
             if explorer_key:
-                set_key('.env', 'ETH_EXPLORER_KEY', explorer_key)
+                credentials['ETH_EXPLORER_KEY'] = explorer_key
+            get_credentials_store().update(credentials)
 
             logger.info("\n✅ Ethereum configuration saved successfully!")
             return True
@@ -172,7 +190,7 @@ class EVMConnection(BaseConnection):
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Ethereum connection is properly configured"""
         try:
-            load_dotenv()
+            load_credentials()
             private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
             if not private_key:
                 if verbose:
@@ -205,32 +223,7 @@ class EVMConnection(BaseConnection):
     def _get_token_address(self, ticker: str) -> Optional[str]:
         """Helper function to get token address from DEXScreener"""
         try:
-            response = requests.get(f"https://api.dexscreener.com/latest/dex/search?q={ticker}")
-            response.raise_for_status()
-            data = response.json()
-            if not data.get('pairs'):
-                return None
-
-            # Filter pairs for the current network (using lowercase for comparison)
-            network_pairs = [
-                pair for pair in data["pairs"] 
-                if pair.get("chainId", "").lower() == self.network.lower()
-            ]
-            
-            # Sort by liquidity/volume
-            network_pairs.sort(
-                key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0) * 
-                            float(x.get('volume', {}).get('h24', 0) or 0),
-                reverse=True
-            )
-
-            # Find exact ticker match
-            for pair in network_pairs:
-                base_token = pair.get("baseToken", {})
-                if base_token.get("symbol", "").lower() == ticker.lower():
-                    return base_token.get("address")
-            
-            return None
+            return resolve_ticker(self.network, ticker, rank_by_liquidity_volume)
 
         except Exception as error:
             logger.error(f"Error fetching token address: {str(error)}")
@@ -249,17 +242,39 @@ class EVMConnection(BaseConnection):
     def _get_raw_balance(self, address: str, token_address: Optional[str] = None) -> float:
         """Helper function to get raw balance value"""
         if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
-            contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
-            )
-            balance = contract.functions.balanceOf(Web3.to_checksum_address(address)).call()
-            decimals = contract.functions.decimals().call()
-            return balance / (10 ** decimals)
+            return get_token_balance(self._web3, token_address, address)
         else:
             balance = self._web3.eth.get_balance(Web3.to_checksum_address(address))
             return self._web3.from_wei(balance, 'ether')
 
+    def get_balances(self, token_addresses: List[str], holders: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get balances of many tokens for one or more holders.
+        Balances and decimals are resolved in one Multicall3 call (or one JSON-RPC batch).
+        """
+        try:
+            if not holders:
+                private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
+                if not private_key:
+                    raise ValueError("No wallet private key configured")
+                holders = [self._web3.eth.account.from_key(private_key).address]
+            return portfolio_balances(self._web3, address_list(token_addresses), address_list(holders))
+        except Exception as e:
+            logger.error(f"Failed to get balances: {e}")
+            raise
+
+    def get_pending_transactions(self) -> Dict[int, Dict[str, Any]]:
+        """Transactions sent through the local nonce manager that are not mined yet, keyed by nonce"""
+        try:
+            private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
+            if not private_key:
+                raise ValueError("No wallet private key configured")
+            account = self._web3.eth.account.from_key(private_key)
+            return get_nonce_manager(self._web3, account.address).pending()
+        except Exception as e:
+            logger.error(f"Failed to get pending transactions: {e}")
+            raise
+
     def get_balance(self, token_address: Optional[str] = None) -> float:
         """
         Get balance for the configured wallet.
@@ -276,14 +291,7 @@ class EVMConnection(BaseConnection):
                 raw_balance = self._web3.eth.get_balance(account.address)
                 return self._web3.from_wei(raw_balance, 'ether')
             
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address), 
-                abi=ERC20_ABI 
-            )
-            decimals = token_contract.functions.decimals().call()
-            raw_balance = token_contract.functions.balanceOf(account.address).call()
-            token_balance = raw_balance / (10 ** decimals)
-            return token_balance
+            return get_token_balance(self._web3, token_address, account.address)
         
         except Exception as e:
             return False
@@ -293,28 +301,22 @@ class EVMConnection(BaseConnection):
         try:
             private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
             account = self._web3.eth.account.from_key(private_key)
-            nonce = self._web3.eth.get_transaction_count(account.address)
             gas_price = self._web3.eth.gas_price
             
             if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
-                decimals = contract.functions.decimals().call()
+                contract = get_token_cache().contract(self._web3, token_address)
+                decimals = get_token_cache().decimals(self._web3, token_address)
                 amount_raw = int(amount * (10 ** decimals))
                 tx = contract.functions.transfer(
                     Web3.to_checksum_address(to_address),
                     amount_raw
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': nonce,
                     'gasPrice': gas_price,
                     'chainId': self.chain_id
                 })
             else:
                 tx = {
-                    'nonce': nonce,
                     'to': Web3.to_checksum_address(to_address),
                     'value': self._web3.to_wei(amount, 'ether'),
                     'gas': 21000,
@@ -336,8 +338,7 @@ class EVMConnection(BaseConnection):
             tx = self._prepare_transfer_tx(to_address, amount, token_address)
             private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
             account = self._web3.eth.account.from_key(private_key)
-            signed = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
             tx_url = self._get_explorer_link(tx_hash.hex())
             return tx_url
 
@@ -352,11 +353,7 @@ class EVMConnection(BaseConnection):
             if token_in.lower() == self.NATIVE_TOKEN.lower():
                 amount_raw = self._web3.to_wei(amount, 'ether')
             else:
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_in),
-                    abi=ERC20_ABI
-                )
-                decimals = token_contract.functions.decimals().call()
+                decimals = get_token_cache().decimals(self._web3, token_in)
                 amount_raw = int(amount * (10 ** decimals))
             
             headers = {"x-client-id": "zerepy"}
@@ -367,7 +364,7 @@ class EVMConnection(BaseConnection):
                 "to": sender,
                 "gasInclude": "true"
             }
-            response = requests.get(url, headers=headers, params=params)
+            response = http_pool.get(url, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
             if data.get("code") != 0:
@@ -378,7 +375,7 @@ class EVMConnection(BaseConnection):
             logger.error(f"Failed to get swap route: {str(e)}")
             raise
 
-    def _build_swap_tx(self, token_in: str, token_out: str, amount: float, slippage: float, route_data: Dict) -> Dict[str, Any]:
+    def _build_swap_tx(self, token_in: str, token_out: str, amount: float, slippage: float, route_data: Dict, approval_pending: bool = False) -> Dict[str, Any]:
         """Build swap transaction using route data"""
         try:
             private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
@@ -393,7 +390,7 @@ class EVMConnection(BaseConnection):
                 "deadline": int(time.time() + 1200),
                 "source": "zerepy"
             }
-            response = requests.post(url, headers=headers, json=payload)
+            response = http_pool.post(url, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             if data.get("code") != 0:
@@ -403,12 +400,12 @@ class EVMConnection(BaseConnection):
                 'to': Web3.to_checksum_address(route_data["routerAddress"]),
                 'data': data["data"]["data"],
                 'value': self._web3.to_wei(amount, 'ether') if token_in.lower() == self.NATIVE_TOKEN.lower() else 0,
-                'nonce': self._web3.eth.get_transaction_count(account.address),
                 'gasPrice': self._web3.eth.gas_price,
                 'chainId': self.chain_id
             }
             try:
-                gas_estimate = self._web3.eth.estimate_gas(tx)
+                # With the approval still unmined only the pending block has the allowance
+                gas_estimate = self._web3.eth.estimate_gas(tx, "pending" if approval_pending else "latest")
                 tx['gas'] = int(gas_estimate * 1.2)
             except Exception as e:
                 logger.warning(f"Gas estimation failed: {e}, using default gas limit")
@@ -424,10 +421,7 @@ class EVMConnection(BaseConnection):
         try:
             private_key = os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY')
             account = self._web3.eth.account.from_key(private_key)
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
-            )
+            token_contract = get_token_cache().contract(self._web3, token_address)
             current_allowance = token_contract.functions.allowance(account.address, spender_address).call()
             if current_allowance < amount:
                 approve_tx = token_contract.functions.approve(
@@ -435,7 +429,6 @@ class EVMConnection(BaseConnection):
                     amount
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': self._web3.eth.get_transaction_count(account.address),
                     'gasPrice': self._web3.eth.gas_price,
                     'chainId': self.chain_id
                 })
@@ -445,11 +438,9 @@ class EVMConnection(BaseConnection):
                 except Exception as e:
                     logger.warning(f"Approval gas estimation failed: {e}, using default")
                     approve_tx['gas'] = 100000
-                signed_approve = account.sign_transaction(approve_tx)
-                tx_hash = self._web3.eth.send_raw_transaction(signed_approve.rawTransaction)
-                receipt = self._web3.eth.wait_for_transaction_receipt(tx_hash)
-                if receipt['status'] != 1:
-                    raise ValueError("Token approval failed")
+                # Not waiting for the receipt: the swap takes the next nonce and
+                # is mined after the approval, swap() checks the receipt once both are sent
+                tx_hash = send_transaction(self._web3, account, approve_tx)
                 return tx_hash.hex()
             return None
 
@@ -473,19 +464,22 @@ class EVMConnection(BaseConnection):
                 if token_in.lower() == "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2".lower():
                     amount_raw = self._web3.to_wei(amount, 'ether')
                 else:
-                    token_contract = self._web3.eth.contract(
-                        address=Web3.to_checksum_address(token_in),
-                        abi=ERC20_ABI
-                    )
-                    decimals = token_contract.functions.decimals().call()
+                    decimals = get_token_cache().decimals(self._web3, token_in)
                     amount_raw = int(amount * (10 ** decimals))
                 approval_hash = self._handle_token_approval(token_in, router_address, amount_raw)
                 if approval_hash:
                     logger.info(f"Token approval transaction: {self._get_explorer_link(approval_hash)}")
-            swap_tx = self._build_swap_tx(token_in, token_out, amount, slippage, route_data)
-            signed_tx = account.sign_transaction(swap_tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            else:
+                approval_hash = None
+            swap_tx = self._build_swap_tx(token_in, token_out, amount, slippage, route_data, approval_pending=bool(approval_hash))
+            tx_hash = send_transaction(self._web3, account, swap_tx)
             tx_url = self._get_explorer_link(tx_hash.hex())
+            if approval_hash:
+                # The swap was sent right behind the approval, it only goes through if the approval did
+                try:
+                    confirm_transaction(self._web3, account.address, approval_hash)
+                except TransactionReverted:
+                    raise ValueError(f"Token approval {self._get_explorer_link(approval_hash)} reverted, swap {tx_url} will revert too")
             return (f"Swap transaction sent! (allow time for scanner to populate it):\nTransaction: {tx_url}")
                 
         except Exception as e:
@@ -495,7 +489,7 @@ class EVMConnection(BaseConnection):
         """Execute an Ethereum action with validation"""
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
-        load_dotenv()
+        load_credentials()
         if not self.is_configured(verbose=True):
             raise EthereumConnectionError("Ethereum connection is not properly configured")
         action = self.actions[action_name]
@@ -1,7 +1,7 @@
 import os
 import logging
 from typing import Dict, Any, List, Optional
-from dotenv import set_key, load_dotenv
+from src.helpers.credentials import get_credentials_store, load_credentials
 from farcaster import Warpcast
 from farcaster.models import CastContent, CastHash, IterableCastsResult, Parent, ReactionsPutResult
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
@@ -112,7 +112,7 @@ class FarcasterConnection(BaseConnection):
     def _get_credentials(self) -> Dict[str, str]:
         """Get Farcaster credentials from environment with validation"""
         logger.debug("Retrieving Farcaster credentials")
-        load_dotenv()
+        load_credentials()
 
         required_vars = {
             'FARCASTER_MNEMONIC': 'recovery phrase',
@@ -158,7 +158,7 @@ class FarcasterConnection(BaseConnection):
                     f.write('')
 
             logger.info("Saving recovery phrase to .env file...")
-            set_key('.env', 'FARCASTER_MNEMONIC', recovery_phrase)
+            get_credentials_store().update({'FARCASTER_MNEMONIC': recovery_phrase})
 
             # Simple validation of token format
             if not recovery_phrase.strip():
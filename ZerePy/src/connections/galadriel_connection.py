@@ -1,9 +1,9 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 
-import requests
-from dotenv import load_dotenv, set_key
+from src.helpers import http_pool
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -58,6 +58,15 @@ class GaladrielConnection(BaseConnection):
                 ],
                 description="Generate text using Galadriel models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from Galadriel models as it is generated"
+            ),
         }
 
     def _get_client(self) -> OpenAI:
@@ -73,6 +82,12 @@ class GaladrielConnection(BaseConnection):
             self._client = OpenAI(api_key=api_key, base_url=API_BASE_URL, default_headers=headers)
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if keys & {"GALADRIEL_API_KEY", "GALADRIEL_FINE_TUNE_API_KEY"}:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up Galadriel API authentication"""
         logger.info("\n🤖 GALADRIEL API SETUP")
@@ -95,9 +110,10 @@ class GaladrielConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'GALADRIEL_API_KEY', api_key)
+            credentials = {'GALADRIEL_API_KEY': api_key}
             if fine_tune_api_key:
-                set_key('.env', 'GALADRIEL_FINE_TUNE_API_KEY', fine_tune_api_key)
+                credentials['GALADRIEL_FINE_TUNE_API_KEY'] = fine_tune_api_key
+            get_credentials_store().update(credentials)
 
             # Validate the API key by trying to list models
             if not self._is_api_key_valid(api_key):
@@ -115,7 +131,7 @@ class GaladrielConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if Galadriel API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('GALADRIEL_API_KEY')
             if not api_key:
                 return False
@@ -127,7 +143,7 @@ class GaladrielConnection(BaseConnection):
             return False
 
     def _is_api_key_valid(self, api_key):
-        response = requests.get(
+        response = http_pool.get(
             f"{API_BASE_URL}/chat/completions",
             headers={
                 "Authorization": f"Bearer {api_key}"
@@ -158,6 +174,31 @@ class GaladrielConnection(BaseConnection):
         except Exception as e:
             raise GaladrielAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Galadriel models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=True,
+            )
+
+            for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            raise GaladrielAPIError(f"Text streaming failed: {e}")
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         """Execute an action with validation"""
         if action_name not in self.actions:
@@ -6,7 +6,7 @@ from dataclasses import is_dataclass
 from eth_account import Account
 from pydantic import BaseModel
 from web3 import Web3
-from dotenv import set_key, load_dotenv
+from src.helpers.credentials import get_credentials_store, load_credentials
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 from src.helpers import print_h_bar
 from src.action_handler import register_action
@@ -264,7 +264,7 @@ class GoatConnection(BaseConnection):
     def _create_wallet(self) -> bool:
         """Create wallet from environment variables"""
         try:
-            load_dotenv()
+            load_credentials()
             rpc_url = os.getenv("GOAT_RPC_PROVIDER_URL")
             private_key = os.getenv("GOAT_WALLET_PRIVATE_KEY")
 
@@ -369,9 +369,8 @@ class GoatConnection(BaseConnection):
                 "GOAT_WALLET_PRIVATE_KEY": private_key,
             }
 
-            for key, value in env_vars.items():
-                set_key(".env", key, value)
-                logger.debug(f"Saved {key} to .env")
+            get_credentials_store().update(env_vars)
+            logger.debug(f"Saved {', '.join(env_vars)} to .env")
 
             # Initialize wallet client
             w3.eth.default_account = account.address
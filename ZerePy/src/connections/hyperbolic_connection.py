@@ -1,7 +1,7 @@
 import logging
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -55,6 +55,16 @@ class HyperbolicConnection(BaseConnection):
                 ],
                 description="Generate text using Hyperbolic models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation"),
+                    ActionParameter("temperature", False, float, "A decimal number that determines the degree of randomness in the response.")
+                ],
+                description="Stream text from Hyperbolic models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -81,6 +91,12 @@ class HyperbolicConnection(BaseConnection):
             )
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "HYPERBOLIC_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up Hyperbolic API authentication"""
         logger.info("\n🤖 HYPERBOLIC API SETUP")
@@ -104,7 +120,7 @@ class HyperbolicConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'HYPERBOLIC_API_KEY', api_key)
+            get_credentials_store().update({'HYPERBOLIC_API_KEY': api_key})
             
             # Validate the API key by trying to list models
             client = OpenAI(
@@ -124,7 +140,7 @@ class HyperbolicConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if Hyperbolic API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('HYPERBOLIC_API_KEY')
             if not api_key:
                 return False
@@ -163,6 +179,31 @@ class HyperbolicConnection(BaseConnection):
         except Exception as e:
             raise HyperbolicAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Hyperbolic models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=True,
+            )
+
+            for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise HyperbolicAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
@@ -200,7 +241,7 @@ class HyperbolicConnection(BaseConnection):
             raise KeyError(f"Unknown action: {action_name}")
 
         # Explicitly reload environment variables
-        load_dotenv()
+        load_credentials()
         
         if not self.is_configured(verbose=True):
             raise HyperbolicConfigurationError("Hyperbolic is not properly configured")
@@ -0,0 +1,340 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional
+
+from src.connections.base_connection import BaseConnection, Action, ActionParameter
+
+logger = logging.getLogger("connections.llm_router_connection")
+
+
+class LLMRouterConnectionError(Exception):
+    """Base exception for LLM router errors"""
+    pass
+
+
+class LLMRouterAPIError(LLMRouterConnectionError):
+    """Raised when every routed provider failed"""
+    pass
+
+
+# Samples kept per provider for latency percentiles and error rate
+DEFAULT_WINDOW = 100
+# Hedge after this many seconds when a provider has too few samples for a p95
+DEFAULT_HEDGE_AFTER = 5.0
+# Samples needed before a provider's own p95 is used as its hedge delay
+MIN_SAMPLES_FOR_P95 = 5
+# Seconds a provider is skipped after a failure, doubled per consecutive failure
+BASE_COOLDOWN = 5.0
+MAX_COOLDOWN = 300.0
+
+
+class ProviderStats:
+    """Rolling latency and error statistics for one provider"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._lock = threading.Lock()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.cooldown_until = 0.0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            cooldown = min(BASE_COOLDOWN * 2 ** (self.consecutive_failures - 1), MAX_COOLDOWN)
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is better. Untried providers score 0 so they get sampled"""
+        p50 = self.percentile(0.5)
+        if p50 is None:
+            return 0.0
+        return p50 * (1 + 4 * self.error_rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "error_rate": self.error_rate,
+            "samples": len(self.outcomes),
+            "cooling_down": self.cooling_down
+        }
+
+
+class LLMRouterConnection(BaseConnection):
+    """
+    Routes generate-text across several configured LLM connections.
+
+    Providers are ranked by rolling p50 latency weighted by error rate. A
+    request goes to the best provider; if it has not answered after its p95
+    (or hedge_after seconds) the same request is also sent to the next one and
+    the first answer wins. Failed providers are skipped for a growing cooldown
+    and the request falls through to the remaining ones.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self._connections: Mapping[str, BaseConnection] = {}
+        self._providers: List[str] = list(config.get("providers", []))
+        self._stats: Dict[str, ProviderStats] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def is_llm_provider(self) -> bool:
+        return True
+
+    def validate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate LLM router configuration from JSON"""
+        providers = config.get("providers", [])
+        if not isinstance(providers, list) or not all(isinstance(p, str) for p in providers):
+            raise ValueError("providers must be a list of connection names")
+        if "llm_router" in providers:
+            raise ValueError("llm_router cannot route to itself")
+        for field in ("hedge_after", "timeout"):
+            if field in config and not isinstance(config[field], (int, float)):
+                raise ValueError(f"{field} must be a number of seconds")
+        return config
+
+    def bind_connections(self, connections: Mapping[str, BaseConnection]) -> None:
+        """Receive the agent's connections; without explicit providers, route to every LLM connection"""
+        from src.connection_manager import CONNECTION_REGISTRY
+
+        self._connections = connections
+        if not self._providers:
+            self._providers = [
+                name for name in connections
+                if name != "llm_router" and CONNECTION_REGISTRY.get(name) and CONNECTION_REGISTRY[name].is_llm_provider
+            ]
+        self._stats = {name: ProviderStats(self.config.get("window", DEFAULT_WINDOW)) for name in self._providers}
+
+    def register_actions(self) -> None:
+        """Register available LLM router actions"""
+        self.actions = {
+            "generate-text": Action(
+                name="generate-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model")
+                ],
+                description="Generate text with the fastest healthy LLM provider"
+            ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model")
+                ],
+                description="Stream text from the fastest healthy LLM provider"
+            ),
+            "provider-stats": Action(
+                name="provider-stats",
+                parameters=[],
+                description="Show rolling latency and error rate for each routed provider"
+            ),
+        }
+
+    def configure(self) -> bool:
+        """The router has no credentials of its own, configure the routed providers instead"""
+        logger.info("\nThe LLM router uses the credentials of its providers: " + ", ".join(self._providers))
+        return self.is_configured(verbose=True)
+
+    def is_configured(self, verbose = False) -> bool:
+        """Configured when at least one routed provider is"""
+        configured = self._available_providers(include_cooling=True)
+        if not configured and verbose:
+            logger.error("No configured provider available for the LLM router")
+        return bool(configured)
+
+    def _available_providers(self, include_cooling: bool = False) -> List[str]:
+        """Configured providers, best first, optionally including ones in cooldown as a last resort"""
+        ready, cooling = [], []
+        for name in self._providers:
+            try:
+                if not self._connections[name].is_configured_cached():
+                    continue
+            except KeyError:
+                continue
+            (cooling if self._stats[name].cooling_down else ready).append(name)
+
+        order = {name: i for i, name in enumerate(self._providers)}
+        ready.sort(key=lambda name: (self._stats[name].score(), order[name]))
+        return ready + cooling if include_cooling or not ready else ready
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Own pool so routed calls never wait on the shared pool the router itself may be running in
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(2, 2 * len(self._providers)),
+                    thread_name_prefix="llm-router"
+                )
+            return self._executor
+
+    def _hedge_delay(self, name: str) -> float:
+        hedge_after = self.config.get("hedge_after")
+        if hedge_after is not None:
+            return float(hedge_after)
+        stats = self._stats[name]
+        if len(stats.latencies) >= MIN_SAMPLES_FOR_P95:
+            return stats.percentile(0.95)
+        return DEFAULT_HEDGE_AFTER
+
+    def _call(self, name: str, prompt: str, system_prompt: str) -> str:
+        start = time.monotonic()
+        try:
+            result = self._connections[name].perform_action(
+                "generate-text", {"prompt": prompt, "system_prompt": system_prompt}
+            )
+            if not result:
+                raise LLMRouterAPIError(f"{name} returned an empty response")
+        except Exception:
+            self._stats[name].record_failure()
+            raise
+        self._stats[name].record_success(time.monotonic() - start)
+        return result
+
+    def generate_text(self, prompt: str, system_prompt: str, **kwargs) -> str:
+        """Generate text, hedging slow requests and falling back on failures"""
+        candidates = self._available_providers()
+        if not candidates:
+            raise LLMRouterAPIError("No configured LLM provider available")
+
+        executor = self._get_executor()
+        timeout = self.config.get("timeout")
+        deadline = time.monotonic() + timeout if timeout else None
+        in_flight: Dict[Future, str] = {}
+        errors: Dict[str, str] = {}
+
+        def launch() -> bool:
+            if not candidates:
+                return False
+            name = candidates.pop(0)
+            in_flight[executor.submit(self._call, name, prompt, system_prompt)] = name
+            return True
+
+        launch()
+        while in_flight:
+            # Hedge based on the slowest-to-answer request still pending
+            wait_for = min(self._hedge_delay(name) for name in in_flight.values()) if candidates else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+            done, _ = wait(list(in_flight), timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                if candidates:
+                    logger.info(f"Hedging slow request to {candidates[0]}")
+                    launch()
+                continue
+
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"Provider {name} failed: {e}")
+                    errors[name] = str(e)
+                    launch()
+                    continue
+                logger.debug(f"Routed request answered by {name}")
+                return result
+
+        if in_flight:
+            raise LLMRouterAPIError(f"No provider answered within {timeout}s")
+        raise LLMRouterAPIError(f"All providers failed: {errors}")
+
+    def generate_text_stream(self, prompt: str, system_prompt: str, **kwargs) -> Iterator[str]:
+        """Stream from the best provider, falling back to the next one if it fails before its first chunk"""
+        candidates = self._available_providers()
+        if not candidates:
+            raise LLMRouterAPIError("No configured LLM provider available")
+
+        errors: Dict[str, str] = {}
+        for name in candidates:
+            connection = self._connections[name]
+            if "generate-text-stream" not in connection.actions:
+                continue
+            start = time.monotonic()
+            started = False
+            try:
+                stream = connection.perform_action(
+                    "generate-text-stream", {"prompt": prompt, "system_prompt": system_prompt}
+                )
+                for chunk in stream:
+                    if not started:
+                        # Time to first chunk is what matters for streaming
+                        self._stats[name].record_success(time.monotonic() - start)
+                        started = True
+                    yield chunk
+                if started:
+                    return
+            except Exception as e:
+                self._stats[name].record_failure()
+                if started:
+                    raise LLMRouterAPIError(f"Stream from {name} failed midway: {e}")
+                logger.warning(f"Provider {name} failed: {e}")
+                errors[name] = str(e)
+
+        raise LLMRouterAPIError(f"All providers failed: {errors}")
+
+    def provider_stats(self, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Rolling latency and error statistics per provider"""
+        stats = {name: self._stats[name].snapshot() for name in self._providers}
+        for name, entry in stats.items():
+            logger.info(
+                f"{name}: p50={entry['p50']} p95={entry['p95']} "
+                f"error_rate={entry['error_rate']:.2f} samples={entry['samples']}"
+            )
+        return stats
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def perform_action(self, action_name: str, kwargs) -> Any:
+        """Execute an LLM router action with validation"""
+        if action_name not in self.actions:
+            raise KeyError(f"Unknown action: {action_name}")
+
+        action = self.actions[action_name]
+        errors = action.validate_params(kwargs)
+        if errors:
+            raise ValueError(f"Invalid parameters: {', '.join(errors)}")
+
+        method_name = action_name.replace('-', '_')
+        method = getattr(self, method_name)
+        return method(**kwargs)
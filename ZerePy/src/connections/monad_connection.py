@@ -1,13 +1,16 @@
 import logging
 import os
 import time
-import requests
-from typing import Dict, Any, Optional, Union
-from dotenv import load_dotenv, set_key
+from src.helpers import http_pool
+from typing import Dict, Any, Optional, Union, List
+from src.helpers.credentials import get_credentials_store, load_credentials
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from src.constants.networks import EVM_NETWORKS
 from src.constants.abi import ERC20_ABI
+from src.helpers.evm.token_cache import get_token_cache
+from src.helpers.evm.nonce_manager import TransactionReverted, confirm_transaction, get_nonce_manager, send_transaction
+from src.helpers.evm.multicall import address_list, get_token_balance, portfolio_balances
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.monad_connection")
@@ -87,6 +90,19 @@ class MonadConnection(BaseConnection):
                 ],
                 description="Get native or token balance"
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter("token_addresses", True, address_list, "Comma-separated token addresses (native token address for the native balance)"),
+                    ActionParameter("holders", False, address_list, "Comma-separated holder addresses (defaults to your wallet)")
+                ],
+                description="Get balances of many tokens in a single RPC call"
+            ),
+            "get-pending-transactions": Action(
+                name="get-pending-transactions",
+                parameters=[],
+                description="List transactions sent from your wallet that are not mined yet"
+            ),
             "transfer": Action(
                 name="transfer", 
                 parameters=[
@@ -152,13 +168,14 @@ class MonadConnection(BaseConnection):
             if not self._web3.is_connected():
                 raise MonadConnectionError("Failed to connect to Monad network")
             
-            # Save credentials
-            set_key('.env', 'MONAD_PRIVATE_KEY', private_key)
-
             # Get optional 0x API key
             zeroex_key = input("\nEnter your 0x API key (optional, press Enter to skip): ")
+
+            # Save credentials
+            credentials = {'MONAD_PRIVATE_KEY': private_key}
             if zeroex_key.strip():
-                set_key('.env', 'ZEROEX_API_KEY', zeroex_key)
+                credentials['ZEROEX_API_KEY'] = zeroex_key
+            get_credentials_store().update(credentials)
 
             logger.info("\n✅ Monad configuration saved successfully!")
             return True
@@ -170,7 +187,7 @@ class MonadConnection(BaseConnection):
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Monad connection is properly configured"""
         try:
-            load_dotenv()
+            load_credentials()
             
             if not os.getenv('MONAD_PRIVATE_KEY'):
                 if verbose:
@@ -201,6 +218,28 @@ class MonadConnection(BaseConnection):
         except Exception as e:
             return f"Failed to get address: {str(e)}"
 
+    def get_balances(self, token_addresses: List[str], holders: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get balances of many tokens for one or more holders.
+        Balances and decimals are resolved in one Multicall3 call (or one JSON-RPC batch).
+        """
+        try:
+            if not holders:
+                holders = [self._get_current_account().address]
+            return portfolio_balances(self._web3, address_list(token_addresses), address_list(holders))
+        except Exception as e:
+            logger.error(f"Failed to get balances: {e}")
+            raise
+
+    def get_pending_transactions(self) -> Dict[int, Dict[str, Any]]:
+        """Transactions sent through the local nonce manager that are not mined yet, keyed by nonce"""
+        try:
+            account = self._get_current_account()
+            return get_nonce_manager(self._web3, account.address).pending()
+        except Exception as e:
+            logger.error(f"Failed to get pending transactions: {e}")
+            raise
+
     def get_balance(self, token_address: Optional[str] = None) -> float:
         """Get native or token balance for the configured wallet"""
         try:
@@ -210,13 +249,7 @@ class MonadConnection(BaseConnection):
                 raw_balance = self._web3.eth.get_balance(account.address)
                 return self._web3.from_wei(raw_balance, 'ether')
             
-            contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address), 
-                abi=ERC20_ABI 
-            )
-            decimals = contract.functions.decimals().call()
-            raw_balance = contract.functions.balanceOf(account.address).call()
-            return raw_balance / (10 ** decimals)
+            return get_token_balance(self._web3, token_address, account.address)
             
         except Exception as e:
             logger.error(f"Failed to get balance: {str(e)}")
@@ -232,19 +265,13 @@ class MonadConnection(BaseConnection):
         try:
             account = self._get_current_account()
             
-            # Get latest nonce
-            nonce = self._web3.eth.get_transaction_count(account.address)
-            
             # Use fixed gas price for testnet
             gas_price = Web3.to_wei(MONAD_BASE_GAS_PRICE, 'gwei')
             
             if token_address and token_address.lower() != self.NATIVE_TOKEN.lower():
                 # Prepare ERC20 transfer
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
-                decimals = contract.functions.decimals().call()
+                contract = get_token_cache().contract(self._web3, token_address)
+                decimals = get_token_cache().decimals(self._web3, token_address)
                 amount_raw = int(amount * (10 ** decimals))
                 
                 # Monad charges based on gas limit, not usage
@@ -253,14 +280,12 @@ class MonadConnection(BaseConnection):
                     amount_raw
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': nonce,
                     'gasPrice': gas_price,
                     'chainId': self.chain_id
                 })
             else:
                 # Prepare native token transfer
                 tx = {
-                    'nonce': nonce,
                     'to': Web3.to_checksum_address(to_address),
                     'value': self._web3.to_wei(amount, 'ether'),
                     'gas': 21000,  # Standard ETH transfer gas
@@ -297,8 +322,7 @@ class MonadConnection(BaseConnection):
 
             # Prepare and send transaction
             tx = self._prepare_transfer_tx(to_address, amount, token_address)
-            signed = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
             
             tx_url = self._get_explorer_link(tx_hash.hex())
             return f"Transaction sent: {tx_url}"
@@ -310,7 +334,7 @@ class MonadConnection(BaseConnection):
     def _get_swap_quote(self, token_in: str, token_out: str, amount: float, sender: str) -> Dict:
         """Get swap quote from 0x API using v2 endpoints"""
         try:
-            load_dotenv()
+            load_credentials()
             
             # Use 0x API's native token identifier for ETH
             if token_in == "0x0000000000000000000000000000000000000000" or token_in.lower() == self.NATIVE_TOKEN.lower():
@@ -318,11 +342,7 @@ class MonadConnection(BaseConnection):
                 token_in = self.NATIVE_TOKEN
                 logger.debug(f"Using native token identifier: {token_in}")
             else:
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_in),
-                    abi=ERC20_ABI
-                )
-                decimals = token_contract.functions.decimals().call()
+                decimals = get_token_cache().decimals(self._web3, token_in)
                 amount_raw = int(amount * (10 ** decimals))
 
             # Set up API request according to v2 spec
@@ -346,7 +366,7 @@ class MonadConnection(BaseConnection):
             logger.debug(params)
             logger.debug("\nURL ")
             logger.debug(url)
-            response = requests.get(
+            response = http_pool.get(
                 url,
                 headers=headers,
                 params=params
@@ -408,6 +428,7 @@ class MonadConnection(BaseConnection):
                 raise ValueError("Invalid transaction data in quote")
                 
             # Handle token approval if needed for non-native tokens
+            approval_hash = None
             if not is_native:
                 spender_address = quote_data.get("allowanceTarget")
                 amount_raw = int(quote_data.get("sellAmount"))
@@ -416,8 +437,6 @@ class MonadConnection(BaseConnection):
                     approval_hash = self._handle_token_approval(token_in, spender_address, amount_raw)
                     if approval_hash:
                         logger.info(f"Token approval transaction: {self._get_explorer_link(approval_hash)}")
-                        # Wait for approval confirmation
-                        self._web3.eth.wait_for_transaction_receipt(approval_hash)
             
             # Prepare swap transaction using quote data
             tx = {
@@ -425,88 +444,87 @@ class MonadConnection(BaseConnection):
                 'to': Web3.to_checksum_address(transaction["to"]),
                 'data': transaction["data"],
                 'value': self._web3.to_wei(amount, 'ether') if is_native else 0,
-                'nonce': self._web3.eth.get_transaction_count(account.address),
                 'gasPrice': Web3.to_wei(MONAD_BASE_GAS_PRICE, 'gwei'),
                 'chainId': self.chain_id,
             }
 
             # Estimate gas or use quote's gas estimate
             try:
-                tx['gas'] = int(transaction.get("gas", 0)) or self._web3.eth.estimate_gas(tx)
+                # Against the pending block while the approval is not mined yet
+                tx['gas'] = int(transaction.get("gas", 0)) or self._web3.eth.estimate_gas(
+                    tx, "pending" if approval_hash else "latest"
+                )
             except Exception as e:
                 logger.warning(f"Gas estimation failed: {e}, using default gas limit")
                 tx['gas'] = 500000  # Default gas limit for swaps
 
             # Sign and send transaction
-            signed_tx = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
 
             tx_url = self._get_explorer_link(tx_hash.hex())
+            if approval_hash:
+                # The swap was sent right behind the approval, it only goes through if the approval did
+                try:
+                    confirm_transaction(self._web3, account.address, approval_hash)
+                except TransactionReverted:
+                    raise MonadConnectionError(f"Token approval {self._get_explorer_link(approval_hash)} reverted, swap {tx_url} will revert too")
             return f"Swap transaction sent: {tx_url}"
                 
         except Exception as e:
             logger.error(f"Swap failed: {str(e)}")
             raise
 
-        def _handle_token_approval(
-            self,
-            token_address: str,
-            spender_address: str,
-            amount: int
-        ) -> Optional[str]:
-            """Handle token approval for spender, returns tx hash if approval needed"""
-            try:
-                account = self._get_current_account()
+    def _handle_token_approval(
+        self,
+        token_address: str,
+        spender_address: str,
+        amount: int
+    ) -> Optional[str]:
+        """Handle token approval for spender, returns tx hash if approval needed"""
+        try:
+            account = self._get_current_account()
+            
+            token_contract = get_token_cache().contract(self._web3, token_address)
+            
+            # Check current allowance
+            current_allowance = token_contract.functions.allowance(
+                account.address,
+                spender_address
+            ).call()
+            
+            if current_allowance < amount:
+                # Prepare approval transaction with fixed gas price
+                approve_tx = token_contract.functions.approve(
+                    spender_address,
+                    amount
+                ).build_transaction({
+                    'from': account.address,
+                    'gasPrice': Web3.to_wei(MONAD_BASE_GAS_PRICE, 'gwei'),
+                    'chainId': self.chain_id
+                })
                 
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=ERC20_ABI
-                )
+                # Set fixed gas for approval on Monad
+                approve_tx['gas'] = 100000  # Standard approval gas
                 
-                # Check current allowance
-                current_allowance = token_contract.functions.allowance(
-                    account.address,
-                    spender_address
-                ).call()
+                # Sign and send approval transaction
+                tx_hash = send_transaction(self._web3, account, approve_tx)
+
+                # Not waiting for the receipt: the swap takes the next nonce and
+                # is mined after the approval, swap() checks the receipt once both are sent
+                return tx_hash.hex()
                 
-                if current_allowance < amount:
-                    # Prepare approval transaction with fixed gas price
-                    approve_tx = token_contract.functions.approve(
-                        spender_address,
-                        amount
-                    ).build_transaction({
-                        'from': account.address,
-                        'nonce': self._web3.eth.get_transaction_count(account.address),
-                        'gasPrice': Web3.to_wei(MONAD_BASE_GAS_PRICE, 'gwei'),
-                        'chainId': self.chain_id
-                    })
-                    
-                    # Set fixed gas for approval on Monad
-                    approve_tx['gas'] = 100000  # Standard approval gas
-                    
-                    # Sign and send approval transaction
-                    signed_approve = account.sign_transaction(approve_tx)
-                    tx_hash = self._web3.eth.send_raw_transaction(signed_approve.rawTransaction)
-                    
-                    # Wait for approval to be mined
-                    receipt = self._web3.eth.wait_for_transaction_receipt(tx_hash)
-                    if receipt['status'] != 1:
-                        raise ValueError("Token approval failed")
-                    
-                    return tx_hash.hex()
-                    
-                return None
+            return None
 
-            except Exception as e:
-                logger.error(f"Token approval failed: {str(e)}")
-                raise
+        except Exception as e:
+            logger.error(f"Token approval failed: {str(e)}")
+            raise
 
     def perform_action(self, action_name: str, kwargs: Dict[str, Any]) -> Any:
         """Execute a Monad action with validation"""
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
 
-        load_dotenv()
+        load_credentials()
         
         if not self.is_configured(verbose=True):
             raise MonadConnectionError("Monad connection is not properly configured")
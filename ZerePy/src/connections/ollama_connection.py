@@ -1,7 +1,7 @@
 import logging
-import requests
+from src.helpers import http_pool
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.ollama_connection")
@@ -53,6 +53,15 @@ class OllamaConnection(BaseConnection):
                 ],
                 description="Generate text using Ollama's running model"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation"),
+                ],
+                description="Stream text from Ollama's running model as it is generated"
+            ),
         }
 
     def configure(self) -> bool:
@@ -79,7 +88,7 @@ class OllamaConnection(BaseConnection):
         """Test if Ollama is reachable"""
         try:
             url = f"{self.base_url}/v1/models"
-            response = requests.get(url)
+            response = http_pool.get(url)
             if response.status_code != 200:
                 raise OllamaAPIError(f"Failed to connect to Ollama: {response.status_code} - {response.text}")
         except Exception as e:
@@ -97,6 +106,10 @@ class OllamaConnection(BaseConnection):
 
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Ollama API with streaming support"""
+        return "".join(self.generate_text_stream(prompt, system_prompt, model, **kwargs))
+
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Ollama's running model, yielding each chunk as it arrives"""
         try:
             url = f"{self.base_url}/api/generate"
             payload = {
@@ -104,26 +117,21 @@ class OllamaConnection(BaseConnection):
                 "prompt": prompt,
                 "system": system_prompt,
             }
-            response = requests.post(url, json=payload, stream=True)
+            response = http_pool.post(url, json=payload, stream=True)
 
             if response.status_code != 200:
                 raise OllamaAPIError(f"API error: {response.status_code} - {response.text}")
 
-            # Initialize an empty string to store the complete response
-            full_response = ""
-
-            # Process each line of the response as a JSON object
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        # Parse the JSON object
-                        data = json.loads(line.decode("utf-8"))
-                        # Append the "response" field to the full response
-                        full_response += data.get("response", "")
-                    except json.JSONDecodeError as e:
-                        raise OllamaAPIError(f"Failed to parse JSON: {e}")
-
-            return full_response
+            # Each line of the response is a JSON object carrying the next chunk
+            with response:
+                for line in response.iter_lines():
+                    if line:
+                        try:
+                            data = json.loads(line.decode("utf-8"))
+                        except json.JSONDecodeError as e:
+                            raise OllamaAPIError(f"Failed to parse JSON: {e}")
+                        if data.get("response"):
+                            yield data["response"]
 
         except Exception as e:
             raise OllamaAPIError(f"Text generation failed: {e}")
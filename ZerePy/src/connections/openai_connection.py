@@ -1,7 +1,7 @@
 import logging
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -54,6 +54,15 @@ class OpenAIConnection(BaseConnection):
                 ],
                 description="Generate text using OpenAI models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from OpenAI models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -77,6 +86,12 @@ class OpenAIConnection(BaseConnection):
             self._client = OpenAI(api_key=api_key)
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "OPENAI_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up OpenAI API authentication"""
         logger.info("\n🤖 OPENAI API SETUP")
@@ -99,7 +114,7 @@ class OpenAIConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'OPENAI_API_KEY', api_key)
+            get_credentials_store().update({'OPENAI_API_KEY': api_key})
             
             # Validate the API key by trying to list models
             client = OpenAI(api_key=api_key)
@@ -116,7 +131,7 @@ class OpenAIConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if OpenAI API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key:
                 return False
@@ -152,6 +167,31 @@ class OpenAIConnection(BaseConnection):
         except Exception as e:
             raise OpenAIAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from OpenAI models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=True,
+            )
+
+            for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise OpenAIAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model, **kwargs):
         try:
             client = self._get_client()
@@ -1,7 +1,7 @@
 import logging
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -53,6 +53,15 @@ class OpenRouterConnection(BaseConnection):
                 ],
                 description="Generate text using OpenRouter models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from OpenRouter models as it is generated"
+            ),
             "list-models": Action(
                 name="list-models",
                 parameters=[],
@@ -73,6 +82,12 @@ class OpenRouterConnection(BaseConnection):
             )
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "OPENROUTER_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up OpenRouter API authentication"""
         logger.info("\n🤖 OPENROUTER API SETUP")
@@ -95,7 +110,7 @@ class OpenRouterConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'OPENROUTER_API_KEY', api_key)
+            get_credentials_store().update({'OPENROUTER_API_KEY': api_key})
             
             # Validate the API key by trying to list models
             client = OpenAI(
@@ -115,7 +130,7 @@ class OpenRouterConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if OpenRouter API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('OPENROUTER_API_KEY')
             if not api_key:
                 return False
@@ -154,6 +169,31 @@ class OpenRouterConnection(BaseConnection):
         except Exception as e:
             raise OpenRouterAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from OpenRouter models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=True,
+            )
+
+            for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise OpenRouterAPIError(f"Text streaming failed: {e}")
+
     def list_models(self, **kwargs) -> None:
         """List all available OpenRouter models"""
         try:
@@ -1,7 +1,7 @@
 import logging
 import os
 from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from src.helpers.credentials import get_credentials_store, load_credentials
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
@@ -58,6 +58,12 @@ class PerplexityConnection(BaseConnection):
             )
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "PERPLEXITY_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def register_actions(self) -> None:
         """Register available Perplexity actions"""
         self.actions = {
@@ -92,7 +98,7 @@ class PerplexityConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'PERPLEXITY_API_KEY', api_key)
+            get_credentials_store().update({'PERPLEXITY_API_KEY': api_key})
             
             # Test the configuration
             client = self._get_client()
@@ -108,7 +114,7 @@ class PerplexityConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if Perplexity API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('PERPLEXITY_API_KEY')
             if not api_key:
                 return False
@@ -2,7 +2,9 @@ import logging
 import os
 import requests
 import asyncio
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Dict, Any, Optional
 
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 from src.types import JupiterTokenData
@@ -18,7 +20,7 @@ from src.helpers.solana.transfer import SolanaTransferHelper
 from src.helpers.solana.read import SolanaReadHelper
 
 
-from dotenv import load_dotenv, set_key
+from src.helpers.credentials import get_credentials_store, load_credentials
 
 from jupiter_python_sdk.jupiter import Jupiter
 
@@ -47,14 +49,46 @@ class SolanaConnection(BaseConnection):
     def __init__(self, config: Dict[str, Any]):
         logger.info("Initializing Solana connection...")
         super().__init__(config)
+        # Long-lived event loop owning the RPC client, started on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._async_client: Optional[AsyncClient] = None
+        self._jupiter: Optional[Jupiter] = None
 
     @property
     def is_llm_provider(self) -> bool:
         return False
 
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Get or start the background event loop all Solana I/O runs on"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="solana-connection-loop",
+                    daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _submit(self, coro: Awaitable) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _run(self, coro: Awaitable) -> Any:
+        """Run a coroutine on the background loop and block until it completes"""
+        return self._submit(coro).result()
+
+    async def _await(self, coro: Awaitable) -> Any:
+        """Await a coroutine on the background loop from any other event loop"""
+        return await asyncio.wrap_future(self._submit(coro))
+
     def _get_connection_async(self) -> AsyncClient:
-        conn = AsyncClient(self.config["rpc"])
-        return conn
+        """Shared RPC client, must only be used from the background loop"""
+        if self._async_client is None:
+            self._async_client = AsyncClient(self.config["rpc"])
+        return self._async_client
 
     def _get_wallet(self):
         creds = self._get_credentials()
@@ -63,7 +97,7 @@ class SolanaConnection(BaseConnection):
     def _get_credentials(self) -> Dict[str, str]:
         """Get Solana credentials from environment with validation"""
         logger.debug("Retrieving Solana Credentials")
-        load_dotenv()
+        load_credentials()
         required_vars = {"SOLANA_PRIVATE_KEY": "solana wallet private key"}
         credentials = {}
         missing = []
@@ -83,7 +117,9 @@ class SolanaConnection(BaseConnection):
         return credentials
 
     def _get_jupiter(self, keypair, async_client):
-        jupiter = Jupiter(
+        if self._jupiter is not None and self._jupiter.keypair.pubkey() == keypair.pubkey():
+            return self._jupiter
+        self._jupiter = Jupiter(
             async_client=async_client,
             keypair=keypair,
             quote_api_url="https://quote-api.jup.ag/v6/quote?",
@@ -94,7 +130,27 @@ class SolanaConnection(BaseConnection):
             query_order_history_api_url="https://jup.ag/api/limit/v1/orderHistory",
             query_trade_history_api_url="https://jup.ag/api/limit/v1/tradeHistory",
         )
-        return jupiter
+        return self._jupiter
+
+    def close(self) -> None:
+        """Close the RPC client and stop the background loop"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop, self._loop_thread = None, None
+        if loop is None:
+            return
+
+        if self._async_client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._async_client.close(), loop).result(timeout=5)
+            except Exception as e:
+                logger.debug(f"Failed to close Solana RPC client: {e}")
+        self._async_client = None
+        self._jupiter = None
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
 
     def validate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Validate Solana configuration from JSON"""
@@ -243,8 +299,7 @@ class SolanaConnection(BaseConnection):
                 with open(".env", "w") as f:
                     f.write("")
 
-            set_key(".env", "SOLANA_PRIVATE_KEY", private_key)
-            load_dotenv(override=True)
+            get_credentials_store().update({"SOLANA_PRIVATE_KEY": private_key})
 
             logger.info("\n✅ Solana configuration successfully saved!")
             logger.info("Your private key has been stored in the .env file.")
@@ -258,7 +313,7 @@ class SolanaConnection(BaseConnection):
         """Check if Solana credentials are configured and valid"""
         try:
             # First check if credentials exist and key is valid
-            load_dotenv(override=True)
+            load_credentials()
             private_key = os.getenv("SOLANA_PRIVATE_KEY")
             if not private_key:
                 if verbose:
@@ -283,22 +338,30 @@ class SolanaConnection(BaseConnection):
                 logger.debug(f"Solana Configuration validation failed: {error_msg}")
             return False
 
-    def transfer(
+    async def _transfer(
         self, to_address: str, amount: float, token_mint: Optional[str] = None
     ) -> str:
-        res = SolanaTransferHelper.transfer(
+        res = await SolanaTransferHelper.transfer(
             self._get_connection_async(),
             self._get_wallet(),
             to_address,
             amount,
             token_mint,
         )
-        res = asyncio.run(res)
         logger.debug(f"Transferred {amount} to {to_address}\nTransaction ID: {res}")
         return res
 
-    # todo: test on mainnet
-    def trade(
+    def transfer(
+        self, to_address: str, amount: float, token_mint: Optional[str] = None
+    ) -> str:
+        return self._run(self._transfer(to_address, amount, token_mint))
+
+    async def transfer_async(
+        self, to_address: str, amount: float, token_mint: Optional[str] = None
+    ) -> str:
+        return await self._await(self._transfer(to_address, amount, token_mint))
+
+    async def _trade(
         self,
         output_mint: str,
         input_amount: float,
@@ -309,7 +372,7 @@ class SolanaConnection(BaseConnection):
         wallet = self._get_wallet()
         async_client = self._get_connection_async()
         jupiter = self._get_jupiter(wallet, async_client)
-        res = TradeManager.trade(
+        return await TradeManager.trade(
             async_client,
             wallet,
             jupiter,
@@ -318,29 +381,55 @@ class SolanaConnection(BaseConnection):
             input_mint,
             slippage_bps,
         )
-        res = asyncio.run(res)
-        return res
 
-    def get_balance(self, token_address: str = None) -> float:
+    # todo: test on mainnet
+    def trade(
+        self,
+        output_mint: str,
+        input_amount: float,
+        input_mint: Optional[str] = SPL_TOKENS["USDC"],
+        slippage_bps: int = 100,
+    ) -> str:
+        return self._run(self._trade(output_mint, input_amount, input_mint, slippage_bps))
+
+    async def trade_async(
+        self,
+        output_mint: str,
+        input_amount: float,
+        input_mint: Optional[str] = SPL_TOKENS["USDC"],
+        slippage_bps: int = 100,
+    ) -> str:
+        return await self._await(self._trade(output_mint, input_amount, input_mint, slippage_bps))
+
+    async def _get_balance(self, token_address: str = None) -> float:
         if not token_address:
             logger.info("Getting SOL balance")
         else:
             logger.info(f"Getting balance for {token_address}")
-        res = SolanaReadHelper.get_balance(
+        return await SolanaReadHelper.get_balance(
             self._get_connection_async(), self._get_wallet(), token_address
         )
-        res = asyncio.run(res)
-        return res
 
-    def stake(self, amount: float) -> str:
+    def get_balance(self, token_address: str = None) -> float:
+        return self._run(self._get_balance(token_address))
+
+    async def get_balance_async(self, token_address: str = None) -> float:
+        return await self._await(self._get_balance(token_address))
+
+    async def _stake(self, amount: float) -> str:
         logger.info(f"Staking {amount} SOL")
-        res = StakeManager.stake_with_jup(
+        res = await StakeManager.stake_with_jup(
             self._get_connection_async(), self._get_wallet(), amount
         )
-        res = asyncio.run(res)
         logger.debug(f"Staked {amount} SOL\nTransaction ID: {res}")
         return res
 
+    def stake(self, amount: float) -> str:
+        return self._run(self._stake(amount))
+
+    async def stake_async(self, amount: float) -> str:
+        return await self._await(self._stake(amount))
+
     # todo: test on mainnet
     def lend_assets(self, amount: float) -> str:
         return "Not implemented"
@@ -348,24 +437,31 @@ class SolanaConnection(BaseConnection):
         # res = AssetLender.lend_asset(
         #     self._get_connection_async(), self._get_wallet(), amount
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(f"Lent {amount} USDC\nTransaction ID: {res}")
         # return res
 
-    def request_faucet(self) -> str:
+    async def _request_faucet(self) -> str:
         logger.info("Requesting faucet funds")
-        res = FaucetManager.request_faucet_funds(self)
-        res = asyncio.run(res)
+        res = await FaucetManager.request_faucet_funds(
+            self._get_connection_async(), self._get_wallet()
+        )
         logger.debug(f"Requested faucet funds\nTransaction ID: {res}")
         return res
 
+    def request_faucet(self) -> str:
+        return self._run(self._request_faucet())
+
+    async def request_faucet_async(self) -> str:
+        return await self._await(self._request_faucet())
+
     def deploy_token(self, decimals: int = 9) -> str:
         return "Not implemented"
         # logger.info(f"STUB: Deploy token with {decimals} decimals")
         # res = TokenDeploymentManager.deploy_token(
         #     self._get_connection_async(), self._get_wallet(), decimals
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(
         #     f"Deployed token with {decimals} decimals\nToken Mint: {res['mint']}"
         # )
@@ -374,11 +470,15 @@ class SolanaConnection(BaseConnection):
     def fetch_price(self, token_id: str) -> float:
         return SolanaReadHelper.fetch_price(token_id)
 
+    async def _get_tps(self) -> int:
+        return await SolanaPerformanceTracker.fetch_current_tps(self._get_connection_async())
+
     # todo: test on mainnet
     def get_tps(self) -> int:
-        res = SolanaPerformanceTracker.fetch_current_tps(self._get_connection_async())
-        res = asyncio.run(res)
-        return res
+        return self._run(self._get_tps())
+
+    async def get_tps_async(self) -> int:
+        return await self._await(self._get_tps())
 
     def get_token_by_ticker(self, ticker: str) -> str:
         ticker = ticker.upper()
@@ -409,7 +509,7 @@ class SolanaConnection(BaseConnection):
         #    image_url,
         #    options,
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(
         #    f"Launched Pump & Fun token {token_ticker}\nToken Mint: {res['mint']}"
         # )
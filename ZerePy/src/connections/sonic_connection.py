@@ -1,12 +1,16 @@
 import logging
 import os
-import requests
+from src.helpers import http_pool
 import time
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Optional, List
+from src.helpers.credentials import get_credentials_store, load_credentials
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from src.constants.abi import ERC20_ABI
+from src.helpers.evm.token_cache import get_token_cache
+from src.helpers.evm.nonce_manager import TransactionReverted, confirm_transaction, get_nonce_manager, send_transaction
+from src.helpers.evm.multicall import address_list, get_token_balance, portfolio_balances
+from src.helpers.ticker_cache import resolve_ticker
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 from src.constants.networks import SONIC_NETWORKS
 
@@ -78,29 +82,7 @@ class SonicConnection(BaseConnection):
             if ticker.lower() in ["s", "S"]:
                 return "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
                 
-            response = requests.get(
-                f"https://api.dexscreener.com/latest/dex/search?q={ticker}"
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            if not data.get('pairs'):
-                return None
-
-            sonic_pairs = [
-                pair for pair in data["pairs"] if pair.get("chainId") == "sonic"
-            ]
-            sonic_pairs.sort(key=lambda x: x.get("fdv", 0), reverse=True)
-
-            sonic_pairs = [
-                pair
-                for pair in sonic_pairs
-                if pair.get("baseToken", {}).get("symbol", "").lower() == ticker.lower()
-            ]
-
-            if sonic_pairs:
-                return sonic_pairs[0].get("baseToken", {}).get("address")
-            return None
+            return resolve_ticker("sonic", ticker)
 
         except Exception as error:
             logger.error(f"Error fetching token address: {str(error)}")
@@ -123,6 +105,19 @@ class SonicConnection(BaseConnection):
                 ],
                 description="Get $S or token balance"
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter("token_addresses", True, address_list, "Comma-separated token addresses (native token address for the native balance)"),
+                    ActionParameter("holders", False, address_list, "Comma-separated holder addresses (defaults to your wallet)")
+                ],
+                description="Get balances of many tokens in a single RPC call"
+            ),
+            "get-pending-transactions": Action(
+                name="get-pending-transactions",
+                parameters=[],
+                description="List transactions sent from your wallet that are not mined yet"
+            ),
             "transfer": Action(
                 name="transfer",
                 parameters=[
@@ -160,7 +155,7 @@ class SonicConnection(BaseConnection):
             private_key = input("\nEnter your wallet private key: ")
             if not private_key.startswith('0x'):
                 private_key = '0x' + private_key
-            set_key('.env', 'SONIC_PRIVATE_KEY', private_key)
+            get_credentials_store().update({'SONIC_PRIVATE_KEY': private_key})
 
             if not self._web3.is_connected():
                 raise SonicConnectionError("Failed to connect to Sonic network")
@@ -175,7 +170,7 @@ class SonicConnection(BaseConnection):
 
     def is_configured(self, verbose: bool = False) -> bool:
         try:
-            load_dotenv()
+            load_credentials()
             if not os.getenv('SONIC_PRIVATE_KEY'):
                 if verbose:
                     logger.error("Missing SONIC_PRIVATE_KEY in .env")
@@ -192,6 +187,34 @@ class SonicConnection(BaseConnection):
                 logger.error(f"Configuration check failed: {e}")
             return False
 
+    def get_balances(self, token_addresses: List[str], holders: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get balances of many tokens for one or more holders.
+        Balances and decimals are resolved in one Multicall3 call (or one JSON-RPC batch).
+        """
+        try:
+            if not holders:
+                private_key = os.getenv('SONIC_PRIVATE_KEY')
+                if not private_key:
+                    raise ValueError("No wallet private key configured")
+                holders = [self._web3.eth.account.from_key(private_key).address]
+            return portfolio_balances(self._web3, address_list(token_addresses), address_list(holders))
+        except Exception as e:
+            logger.error(f"Failed to get balances: {e}")
+            raise
+
+    def get_pending_transactions(self) -> Dict[int, Dict[str, Any]]:
+        """Transactions sent through the local nonce manager that are not mined yet, keyed by nonce"""
+        try:
+            private_key = os.getenv('SONIC_PRIVATE_KEY')
+            if not private_key:
+                raise ValueError("No wallet private key configured")
+            account = self._web3.eth.account.from_key(private_key)
+            return get_nonce_manager(self._web3, account.address).pending()
+        except Exception as e:
+            logger.error(f"Failed to get pending transactions: {e}")
+            raise
+
     def get_balance(self, address: Optional[str] = None, token_address: Optional[str] = None) -> float:
         """Get balance for an address or the configured wallet"""
         try:
@@ -203,13 +226,7 @@ class SonicConnection(BaseConnection):
                 address = account.address
 
             if token_address:
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=self.ERC20_ABI
-                )
-                balance = contract.functions.balanceOf(address).call()
-                decimals = contract.functions.decimals().call()
-                return balance / (10 ** decimals)
+                return get_token_balance(self._web3, token_address, address)
             else:
                 balance = self._web3.eth.get_balance(address)
                 return self._web3.from_wei(balance, 'ether')
@@ -226,11 +243,8 @@ class SonicConnection(BaseConnection):
             chain_id = self._web3.eth.chain_id
             
             if token_address:
-                contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=self.ERC20_ABI
-                )
-                decimals = contract.functions.decimals().call()
+                contract = get_token_cache().contract(self._web3, token_address)
+                decimals = get_token_cache().decimals(self._web3, token_address)
                 amount_raw = int(amount * (10 ** decimals))
                 
                 tx = contract.functions.transfer(
@@ -238,13 +252,11 @@ class SonicConnection(BaseConnection):
                     amount_raw
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': self._web3.eth.get_transaction_count(account.address),
                     'gasPrice': self._web3.eth.gas_price,
                     'chainId': chain_id
                 })
             else:
                 tx = {
-                    'nonce': self._web3.eth.get_transaction_count(account.address),
                     'to': Web3.to_checksum_address(to_address),
                     'value': self._web3.to_wei(amount, 'ether'),
                     'gas': 21000,
@@ -252,8 +264,7 @@ class SonicConnection(BaseConnection):
                     'chainId': chain_id
                 }
 
-            signed = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
 
             # Log and return explorer link immediately
             tx_link = self._get_explorer_link(tx_hash.hex())
@@ -272,11 +283,7 @@ class SonicConnection(BaseConnection):
             if token_in.lower() == self.NATIVE_TOKEN.lower():
                 amount_raw = self._web3.to_wei(amount_in, 'ether')
             else:
-                token_contract = self._web3.eth.contract(
-                    address=Web3.to_checksum_address(token_in),
-                    abi=self.ERC20_ABI
-                )
-                decimals = token_contract.functions.decimals().call()
+                decimals = get_token_cache().decimals(self._web3, token_in)
                 amount_raw = int(amount_in * (10 ** decimals))
             
             # Set up API request
@@ -289,7 +296,7 @@ class SonicConnection(BaseConnection):
                 "gasInclude": "true"
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            response = http_pool.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -320,7 +327,7 @@ class SonicConnection(BaseConnection):
                 "source": "ZerePyBot"
             }
             
-            response = requests.post(url, headers=headers, json=payload)
+            response = http_pool.post(url, headers=headers, json=payload)
             response.raise_for_status()
             
             data = response.json()
@@ -333,16 +340,13 @@ class SonicConnection(BaseConnection):
             logger.error(f"Failed to encode swap data: {e}")
             raise
     
-    def _handle_token_approval(self, token_address: str, spender_address: str, amount: int) -> None:
-        """Handle token approval for spender"""
+    def _handle_token_approval(self, token_address: str, spender_address: str, amount: int) -> Optional[str]:
+        """Handle token approval for spender, returns tx hash if approval needed"""
         try:
             private_key = os.getenv('SONIC_PRIVATE_KEY')
             account = self._web3.eth.account.from_key(private_key)
             
-            token_contract = self._web3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=self.ERC20_ABI
-            )
+            token_contract = get_token_cache().contract(self._web3, token_address)
             
             # Check current allowance
             current_allowance = token_contract.functions.allowance(
@@ -356,17 +360,16 @@ class SonicConnection(BaseConnection):
                     amount
                 ).build_transaction({
                     'from': account.address,
-                    'nonce': self._web3.eth.get_transaction_count(account.address),
                     'gasPrice': self._web3.eth.gas_price,
                     'chainId': self._web3.eth.chain_id
                 })
                 
-                signed_approve = account.sign_transaction(approve_tx)
-                tx_hash = self._web3.eth.send_raw_transaction(signed_approve.rawTransaction)
+                tx_hash = send_transaction(self._web3, account, approve_tx)
                 logger.info(f"Approval transaction sent: {self._get_explorer_link(tx_hash.hex())}")
-                
-                # Wait for approval to be mined
-                self._web3.eth.wait_for_transaction_receipt(tx_hash)
+                # Not waiting for the receipt: the swap takes the next nonce and
+                # is mined after the approval, swap() checks the receipt once both are sent
+                return tx_hash.hex()
+            return None
                 
         except Exception as e:
             logger.error(f"Approval failed: {e}")
@@ -397,42 +400,44 @@ class SonicConnection(BaseConnection):
             router_address = route_data["routerAddress"]
             
             # Handle token approval if not using native token
+            approval_hash = None
             if token_in.lower() != self.NATIVE_TOKEN.lower():
                 if token_in.lower() == "0x039e2fb66102314ce7b64ce5ce3e5183bc94ad38".lower():  # $S token
                     amount_raw = self._web3.to_wei(amount, 'ether')
                 else:
-                    token_contract = self._web3.eth.contract(
-                        address=Web3.to_checksum_address(token_in),
-                        abi=self.ERC20_ABI
-                    )
-                    decimals = token_contract.functions.decimals().call()
+                    decimals = get_token_cache().decimals(self._web3, token_in)
                     amount_raw = int(amount * (10 ** decimals))
-                self._handle_token_approval(token_in, router_address, amount_raw)
+                approval_hash = self._handle_token_approval(token_in, router_address, amount_raw)
             
             # Prepare transaction
             tx = {
                 'from': account.address,
                 'to': Web3.to_checksum_address(router_address),
                 'data': encoded_data,
-                'nonce': self._web3.eth.get_transaction_count(account.address),
                 'gasPrice': self._web3.eth.gas_price,
                 'chainId': self._web3.eth.chain_id,
                 'value': self._web3.to_wei(amount, 'ether') if token_in.lower() == self.NATIVE_TOKEN.lower() else 0
             }
             
-            # Estimate gas
+            # Estimate gas, against the pending block while the approval is not mined yet
             try:
-                tx['gas'] = self._web3.eth.estimate_gas(tx)
+                tx['gas'] = self._web3.eth.estimate_gas(tx, "pending" if approval_hash else "latest")
             except Exception as e:
                 logger.warning(f"Gas estimation failed: {e}, using default gas limit")
                 tx['gas'] = 500000  # Default gas limit
             
             # Sign and send transaction
-            signed_tx = account.sign_transaction(tx)
-            tx_hash = self._web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = send_transaction(self._web3, account, tx)
             
-            # Log and return explorer link immediately
             tx_link = self._get_explorer_link(tx_hash.hex())
+            if approval_hash:
+                # The swap was sent right behind the approval, it only goes through if the approval did
+                try:
+                    confirm_transaction(self._web3, account.address, approval_hash)
+                except TransactionReverted:
+                    raise SonicConnectionError(f"Token approval {self._get_explorer_link(approval_hash)} reverted, swap {tx_link} will revert too")
+
+            # Log and return explorer link
             return f"🔄 Swap transaction sent: {tx_link}"
                 
         except Exception as e:
@@ -443,7 +448,7 @@ class SonicConnection(BaseConnection):
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
 
-        load_dotenv()
+        load_credentials()
         
         if not self.is_configured(verbose=True):
             raise SonicConnectionError("Sonic is not properly configured")
@@ -1,7 +1,7 @@
 import logging
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv, set_key
+from typing import Dict, Any, Iterator
+from src.helpers.credentials import get_credentials_store, load_credentials
 from together import Together
 from together.types.models import ModelObject, ModelType
 
@@ -55,6 +55,15 @@ class TogetherAIConnection(BaseConnection):
                 ],
                 description="Generate text using Together AI models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from Together AI models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -78,6 +87,12 @@ class TogetherAIConnection(BaseConnection):
             self._client = Together(api_key=api_key)
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "TOGETHER_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up Together AI API authentication"""
         logger.info("\n🤖 TOGETHER AI API SETUP")
@@ -100,7 +115,7 @@ class TogetherAIConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'TOGETHER_API_KEY', api_key)
+            get_credentials_store().update({'TOGETHER_API_KEY': api_key})
             
             # Validate the API key by trying to list models
             client = Together(api_key=api_key)
@@ -116,7 +131,7 @@ class TogetherAIConnection(BaseConnection):
     def is_configured(self, verbose=False) -> bool:
         """Check if Together AI API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('TOGETHER_API_KEY')
             if not api_key:
                 return False
@@ -151,6 +166,30 @@ class TogetherAIConnection(BaseConnection):
         except Exception as e:
             raise TogetherAIAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Together AI models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            messages = [{"role": "user", "content": prompt},{"role": "system", "content": system_prompt},] 
+
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+            )
+
+            for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise TogetherAIAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         try:
             client = self._get_client()
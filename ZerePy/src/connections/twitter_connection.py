@@ -1,11 +1,12 @@
 import os
 import logging
-from typing import Dict, Any, List, Tuple, Iterator
+from typing import Dict, Any, List, Optional, Tuple, Iterator
 from requests_oauthlib import OAuth1Session
-from dotenv import set_key, load_dotenv
+from src.helpers.credentials import get_credentials_store, load_credentials
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
-from src.helpers import print_h_bar
-import json,requests
+from src.helpers import print_h_bar, http_pool
+from src.helpers.rate_limiter import RateLimiter, RateLimitExceeded
+import json
 
 logger = logging.getLogger("connections.twitter_connection")
 
@@ -21,10 +22,28 @@ class TwitterAPIError(TwitterConnectionError):
     """Raised when Twitter API requests fail"""
     pass
 
+class TwitterRateLimitError(TwitterAPIError):
+    """Raised when an endpoint's rate limit is exhausted for longer than the allowed wait"""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# Rate-limited endpoint behind each action, as RateLimiter.endpoint_key names it
+ACTION_ENDPOINTS = {
+    "get-latest-tweets": "GET tweets/search/recent",
+    "get-tweet-replies": "GET tweets/search/recent",
+    "post-tweet": "POST tweets",
+    "reply-to-tweet": "POST tweets",
+    "read-timeline": "GET users/:id/timelines/reverse_chronological",
+    "like-tweet": "POST users/:id/likes",
+    "stream-tweets": "GET tweets/search/stream",
+}
+
 class TwitterConnection(BaseConnection):
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self._oauth_session = None
+        self._rate_limiter = RateLimiter(config.get("rate_limit_max_wait", 60))
 
     @property
     def is_llm_provider(self) -> bool:
@@ -43,6 +62,9 @@ class TwitterConnection(BaseConnection):
 
         if not isinstance(config["tweet_interval"], int) or config["tweet_interval"] <= 0:
             raise ValueError("tweet_interval must be a positive integer")
+
+        if "rate_limit_max_wait" in config and not isinstance(config["rate_limit_max_wait"], (int, float)):
+            raise ValueError("rate_limit_max_wait must be a number of seconds")
             
         return config
 
@@ -67,7 +89,8 @@ class TwitterConnection(BaseConnection):
             "read-timeline": Action(
                 name="read-timeline",
                 parameters=[
-                    ActionParameter("count", False, int, "Number of tweets to read from timeline")
+                    ActionParameter("count", False, int, "Number of tweets to read from timeline"),
+                    ActionParameter("since_id", False, str, "Only return tweets newer than this tweet ID")
                 ],
                 description="Read tweets from user's timeline"
             ),
@@ -99,13 +122,18 @@ class TwitterConnection(BaseConnection):
                     ActionParameter("filter_string", True, str, "Filter string for rules of the stream , e.g @username")
                 ],
                 description="Stream tweets based on filter rule"
+            ),
+            "get-rate-limits": Action(
+                name="get-rate-limits",
+                parameters=[],
+                description="Show the remaining rate-limit budget of each Twitter endpoint used so far"
             )
         }
 
     def _get_credentials(self) -> Dict[str, str]:
         """Get Twitter credentials from environment with validation"""
         logger.debug("Retrieving Twitter credentials")
-        load_dotenv()
+        load_credentials()
 
         required_vars = {
             'TWITTER_CONSUMER_KEY': 'consumer key',
@@ -140,6 +168,11 @@ class TwitterConnection(BaseConnection):
         """
         Make a request to the Twitter API with error handling
 
+        Calls against an endpoint whose rate-limit window is exhausted wait
+        for the reset (up to rate_limit_max_wait seconds) instead of failing
+        with a 429. A 429 that still arrives is retried once after the reset
+        when that is within the same wait.
+
         Args:
             method: HTTP method ('get', 'post', etc.)
             endpoint: API endpoint path
@@ -149,20 +182,31 @@ class TwitterConnection(BaseConnection):
             Dict containing the API response (or raw response if stream=True)
         """
         logger.debug(f"Making {method.upper()} request to {endpoint}")
+        key = RateLimiter.endpoint_key(method, endpoint)
         try:
             full_url = f"https://api.twitter.com/2/{endpoint.lstrip('/')}"
 
-            if use_bearer:
-                response = requests.request(
-                    method=method.lower(),
-                    url=full_url,
-                    auth=self._bearer_oauth,
-                    stream=stream,
-                    **kwargs
-                )
-            else:
-                oauth = self._get_oauth()
-                response = getattr(oauth, method.lower())(full_url, **kwargs)
+            for attempt in range(2):
+                self._rate_limiter.acquire(key)
+                if use_bearer:
+                    response = http_pool.request(
+                        method=method.lower(),
+                        url=full_url,
+                        auth=self._bearer_oauth,
+                        stream=stream,
+                        **kwargs
+                    )
+                else:
+                    oauth = self._get_oauth()
+                    response = getattr(oauth, method.lower())(full_url, **kwargs)
+
+                if response.status_code != 429:
+                    self._rate_limiter.update(key, response.headers)
+                    break
+                retry_after = self._rate_limiter.exhaust(key, response.headers)
+                if attempt or retry_after > self._rate_limiter.max_wait:
+                    raise RateLimitExceeded(key, retry_after)
+                response.close()
 
             if not stream and response.status_code not in [200, 201]:
                 logger.error(
@@ -179,9 +223,22 @@ class TwitterConnection(BaseConnection):
         
             return response.json()
 
+        except RateLimitExceeded as e:
+            logger.warning(str(e))
+            raise TwitterRateLimitError(f"API request failed with status 429: {e}", e.retry_after)
         except Exception as e:
             raise TwitterAPIError(f"API request failed: {str(e)}")
 
+    def action_wait_time(self, action_name: str) -> float:
+        """Seconds until the endpoint behind action_name has budget again, 0 when it has budget now"""
+        key = ACTION_ENDPOINTS.get(action_name)
+        return self._rate_limiter.wait_time(key) if key else 0.0
+
+    def action_remaining(self, action_name: str) -> Optional[int]:
+        """Calls left for action_name in the current window, None while its limit is unknown"""
+        key = ACTION_ENDPOINTS.get(action_name)
+        return self._rate_limiter.remaining(key) if key else None
+
     def _get_oauth(self) -> OAuth1Session:
         """Get or create OAuth session using stored credentials"""
         if self._oauth_session is None:
@@ -337,9 +394,8 @@ class TwitterConnection(BaseConnection):
             if bearer_token:
                 env_vars['TWITTER_BEARER_TOKEN'] = bearer_token
 
-            for key, value in env_vars.items():
-                set_key('.env', key, value)
-                logger.debug(f"Saved {key} to .env")
+            get_credentials_store().update(env_vars)
+            logger.debug(f"Saved {', '.join(env_vars)} to .env")
 
             logger.info("\n✅ Twitter authentication successfully set up!")
             logger.info(
@@ -393,8 +449,8 @@ class TwitterConnection(BaseConnection):
         method = getattr(self, method_name)
         return method(**kwargs)
 
-    def read_timeline(self, count: int = None, **kwargs) -> list:
-        """Read tweets from the user's timeline"""
+    def read_timeline(self, count: int = None, since_id: str = None, **kwargs) -> list:
+        """Read tweets from the user's timeline, optionally only those newer than since_id"""
         if count is None:
             count = self.config["timeline_read_count"]
             
@@ -407,6 +463,8 @@ class TwitterConnection(BaseConnection):
             "user.fields": "name,username",
             "max_results": count
         }
+        if since_id:
+            params["since_id"] = since_id
 
         response = self._make_request(
             'get',
@@ -518,6 +576,13 @@ class TwitterConnection(BaseConnection):
         logger.info(f"Retrieved {len(replies)} replies")
         return replies
     
+    def get_rate_limits(self, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Remaining budget per endpoint as learned from response headers"""
+        limits = self._rate_limiter.snapshot()
+        for key, entry in limits.items():
+            logger.info(f"{key}: {entry['remaining']}/{entry['limit']} remaining, resets in {entry['resets_in']}s")
+        return limits
+
     def _bearer_oauth(self,r):
         bearer_token = self._get_credentials().get("TWITTER_BEARER_TOKEN")
         if not bearer_token:
@@ -532,38 +597,61 @@ class TwitterConnection(BaseConnection):
         logger.debug("Getting stream rules")
         return self._make_request('get', 'tweets/search/stream/rules', use_bearer=True)
     
-    def _delete_rules(self,rules) -> None:
-        """Delete stream rules"""
-        if rules is None or "data" not in rules:
+    def _delete_rules(self, ids: List[str]):
+        """Delete stream rules by ID"""
+        if not ids:
             return None
-
-        ids = list(map(lambda rule: rule["id"], rules["data"]))
         payload = {"delete": {"ids": ids}}
         return self._make_request('post', 'tweets/search/stream/rules', use_bearer=True, json=payload)
 
-    
-    def _build_rule(self, filter_string, **kwargs) -> None:
-        """Build a rule for the stream"""
-        rule = [{"value":filter_string }]
-        payload = {"add": rule}
+    def _add_rules(self, values: List[str]):
+        """Add stream rules"""
+        if not values:
+            return None
+        payload = {"add": [{"value": value} for value in values]}
         return self._make_request('post', 'tweets/search/stream/rules', use_bearer=True, json=payload)
-    
+
+    def _sync_rules(self, filter_strings: List[str]) -> None:
+        """Make the stream rules match filter_strings, only touching rules that differ"""
+        existing = {rule["value"]: rule["id"] for rule in (self._get_rules() or {}).get("data", [])}
+        wanted = set(filter_strings)
+        stale = [rule_id for value, rule_id in existing.items() if value not in wanted]
+        missing = [value for value in filter_strings if value not in existing]
+        if stale or missing:
+            logger.debug(f"Updating stream rules: -{len(stale)} +{len(missing)}")
+        self._delete_rules(stale)
+        self._add_rules(missing)
+
     def stream_tweets(self, filter_string:str,**kwargs) ->Iterator[Dict[str, Any]]:
         """Stream tweets. Requires Twitter Premium Plan and Bearer Token"""
-        rules = self._get_rules()
-        self._delete_rules(rules)
-        self._build_rule(filter_string)
+        self._sync_rules([filter_string])
         logger.info("Starting Twitter stream")
         try:
             response = self._make_request('get', 'tweets/search/stream', 
-                                        use_bearer=True, stream=True)
+                                        use_bearer=True, stream=True,
+                                        params={
+                                            "tweet.fields": "author_id,created_at,conversation_id",
+                                            "expansions": "author_id",
+                                            "user.fields": "username"
+                                        })
             
             if response.status_code != 200:
                 raise TwitterAPIError(f"Stream connection failed with status {response.status_code}: {response.text}")
-                
-            for line in response.iter_lines():
-                if line:
-                    tweet_data = json.loads(line)['data']
+
+            with response:
+                # Blank lines are keep-alives sent every ~20 seconds
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    message = json.loads(line)
+                    if "data" not in message:
+                        logger.warning(f"Stream message without data: {message}")
+                        continue
+                    tweet_data = message["data"]
+                    users = message.get("includes", {}).get("users", [])
+                    author = next((user for user in users if user["id"] == tweet_data.get("author_id")), None)
+                    if author:
+                        tweet_data["author_username"] = author["username"]
                     yield tweet_data
                 
         except Exception as e:
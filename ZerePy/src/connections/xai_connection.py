@@ -1,8 +1,8 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from openai import OpenAI
-from dotenv import set_key, load_dotenv
+from src.helpers.credentials import get_credentials_store, load_credentials
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
 
 logger = logging.getLogger("connections.XAI_connection")
@@ -53,6 +53,15 @@ class XAIConnection(BaseConnection):
                 ],
                 description="Generate text using XAI models"
             ),
+            "generate-text-stream": Action(
+                name="generate-text-stream",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", False, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream text from XAI models as it is generated"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -79,6 +88,12 @@ class XAIConnection(BaseConnection):
             )
         return self._client
 
+    def on_credentials_changed(self, keys) -> None:
+        """Drop the client so the next call is made with the new credentials"""
+        if "XAI_API_KEY" in keys:
+            self._client = None
+        super().on_credentials_changed(keys)
+
     def configure(self) -> bool:
         """Sets up XAI API authentication"""
         logger.info("\n🤖 XAI API SETUP")
@@ -100,7 +115,7 @@ class XAIConnection(BaseConnection):
                 with open('.env', 'w') as f:
                     f.write('')
 
-            set_key('.env', 'XAI_API_KEY', api_key)
+            get_credentials_store().update({'XAI_API_KEY': api_key})
             
             # Validate the API key by trying to list models
             client = OpenAI(api_key=api_key, base_url="https://api.x.ai/v1")
@@ -117,7 +132,7 @@ class XAIConnection(BaseConnection):
     def is_configured(self, verbose = False) -> bool:
         """Check if XAI API key is configured and valid"""
         try:
-            load_dotenv()
+            load_credentials()
             api_key = os.getenv('XAI_API_KEY')
             if not api_key:
                 return False
@@ -152,6 +167,30 @@ class XAIConnection(BaseConnection):
         except Exception as e:
             raise XAIAPIError(f"Text generation failed: {e}")
 
+    def generate_text_stream(self, prompt: str, system_prompt: str = None, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from XAI models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            
+            # Use configured model if none provided
+            if not model:
+                model = self.config["model"]
+
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt} if system_prompt else {"role": "system", "content": ""},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=True,
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise XAIAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
@@ -0,0 +1,149 @@
+import inspect
+import logging
+import os
+import re
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from dotenv import dotenv_values, find_dotenv
+
+logger = logging.getLogger("helpers.credentials")
+
+
+def default_env_path() -> Path:
+    """
+    ZEREPY_ENV_FILE if set, else the .env found by searching up from this
+    package as load_dotenv() does, so the CLI and server find it from any
+    working directory. Falls back to .env in the working directory.
+    """
+    configured = os.getenv("ZEREPY_ENV_FILE")
+    if configured:
+        return Path(configured)
+    found = find_dotenv()
+    return Path(found) if found else Path(".env")
+
+
+def _quote(value: str) -> str:
+    # Same quoting as python-dotenv's set_key
+    return "'{}'".format(value.replace("'", "\\'"))
+
+
+class CredentialsStore:
+    """
+    In-memory view of the .env file, shared by every connection.
+
+    The file is read once. Values are exported to os.environ the way
+    load_dotenv does (without overriding variables that were already set),
+    so connections keep using os.getenv without touching the disk. update()
+    writes a batch of keys to the file in one atomic replace, applies them to
+    the environment, and notifies subscribers of the keys that changed.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else default_env_path()
+        self._lock = threading.RLock()
+        self._values: Dict[str, str] = {}
+        self._loaded = False
+        self._subscribers: List[weakref.ref] = []
+
+    def load(self, force: bool = False) -> None:
+        """Read the file once, or again when force is set"""
+        if self._loaded and not force:
+            return
+        with self._lock:
+            if self._loaded and not force:
+                return
+            values = {}
+            if self.path.exists():
+                values = {key: value for key, value in dotenv_values(self.path).items() if value is not None}
+            changed = {key for key in set(values) | set(self._values) if values.get(key) != self._values.get(key)}
+            for key, value in values.items():
+                if force and key in changed:
+                    os.environ[key] = value
+                else:
+                    os.environ.setdefault(key, value)
+            self._values = values
+            self._loaded = True
+        if force and changed:
+            self._notify(changed)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        self.load()
+        return os.environ.get(key, self._values.get(key, default))
+
+    def update(self, values: Dict[str, str]) -> Set[str]:
+        """Write several keys at once and notify subscribers, returns the keys whose value changed"""
+        values = {key: str(value) for key, value in values.items()}
+        with self._lock:
+            self.load()
+            changed = {key for key, value in values.items() if os.environ.get(key) != value}
+            self._write(values)
+            self._values.update(values)
+            os.environ.update(values)
+        if changed:
+            logger.debug(f"Credentials updated: {', '.join(sorted(changed))}")
+            self._notify(changed)
+        return changed
+
+    def _write(self, values: Dict[str, str]) -> None:
+        lines = self.path.read_text().splitlines() if self.path.exists() else []
+        pending = dict(values)
+        output = []
+        for line in lines:
+            match = re.match(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.]*)\s*=", line)
+            if match and match.group(1) in values:
+                key = match.group(1)
+                if key in pending:
+                    output.append(f"{key}={_quote(pending.pop(key))}")
+                continue
+            output.append(line)
+        output.extend(f"{key}={_quote(value)}" for key, value in pending.items())
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(output) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def subscribe(self, callback: Callable[[Set[str]], None]) -> None:
+        """Call callback with the changed keys after every update. Bound methods are held weakly"""
+        # Builtin methods (list.append, ...) have __self__ too but can not be weakly referenced
+        ref = weakref.WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback)
+        with self._lock:
+            self._prune()
+            self._subscribers.append(ref)
+
+    def _prune(self) -> None:
+        """Drop subscribers whose owner was garbage collected, call with the lock held"""
+        self._subscribers = [ref for ref in self._subscribers if ref() is not None]
+
+    def _notify(self, changed: Set[str]) -> None:
+        with self._lock:
+            self._prune()
+            callbacks = [ref() for ref in self._subscribers]
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.warning(f"Credentials change handler failed: {e}")
+
+
+_store: Optional[CredentialsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_credentials_store() -> CredentialsStore:
+    """Get or create the shared credentials store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CredentialsStore()
+        return _store
+
+
+def load_credentials() -> None:
+    """Make .env values available through os.getenv. Reads the file only the first time"""
+    get_credentials_store().load()
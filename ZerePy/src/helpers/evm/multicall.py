@@ -0,0 +1,234 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from web3 import Web3
+
+from src.constants.abi import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from src.helpers import http_pool
+from src.helpers.evm.token_cache import get_token_cache
+
+logger = logging.getLogger("helpers.evm.multicall")
+
+NATIVE_TOKEN = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+# Function selectors, encoded by hand so no contract object is built per token
+BALANCE_OF_SELECTOR = "0x70a08231"
+DECIMALS_SELECTOR = "0x313ce567"
+GET_ETH_BALANCE_SELECTOR = "0x4d2301cc"
+
+# Whether Multicall3 is deployed, keyed by RPC endpoint
+_multicall_available: Dict[str, bool] = {}
+
+
+@dataclass
+class _Read:
+    """One value to read: an eth_call, or a native balance lookup when target is None"""
+    target: Optional[str]
+    data: Optional[str]
+    holder: Optional[str] = None
+
+
+def address_list(value: Union[str, Iterable[str]]) -> List[str]:
+    """Accept a comma-separated string (CLI/HTTP params) or a list of addresses"""
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return [str(item).strip() for item in value]
+
+
+def _is_native(token_address: Optional[str]) -> bool:
+    return not token_address or token_address.lower() == NATIVE_TOKEN.lower()
+
+
+def _encode_address_call(selector: str, address: str) -> str:
+    return selector + address[2:].lower().rjust(64, "0")
+
+
+def _endpoint(web3: Web3) -> str:
+    return getattr(web3.provider, "endpoint_uri", None) or str(id(web3.provider))
+
+
+def has_multicall(web3: Web3) -> bool:
+    """Check once per RPC endpoint whether Multicall3 is deployed"""
+    endpoint = _endpoint(web3)
+    if endpoint not in _multicall_available:
+        try:
+            code = web3.eth.get_code(Web3.to_checksum_address(MULTICALL3_ADDRESS))
+            _multicall_available[endpoint] = len(code) > 0
+        except Exception as e:
+            logger.warning(f"Could not check for Multicall3: {e}")
+            _multicall_available[endpoint] = False
+    return _multicall_available[endpoint]
+
+
+def _aggregate(web3: Web3, reads: List[_Read]) -> List[Optional[bytes]]:
+    """Resolve every read with a single Multicall3 aggregate3 eth_call"""
+    multicall = web3.eth.contract(
+        address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+        abi=MULTICALL3_ABI
+    )
+    calls = []
+    for read in reads:
+        if read.target is None:
+            calls.append((
+                multicall.address,
+                True,
+                _encode_address_call(GET_ETH_BALANCE_SELECTOR, read.holder)
+            ))
+        else:
+            calls.append((read.target, True, read.data))
+
+    results = multicall.functions.aggregate3(calls).call()
+    return [bytes(data) if success and data else None for success, data in results]
+
+
+def _batch(web3: Web3, reads: List[_Read]) -> List[Optional[bytes]]:
+    """Resolve every read with one JSON-RPC batch request, for chains without Multicall3"""
+    payload = []
+    for i, read in enumerate(reads):
+        if read.target is None:
+            payload.append({"jsonrpc": "2.0", "id": i, "method": "eth_getBalance", "params": [read.holder, "latest"]})
+        else:
+            payload.append({
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "eth_call",
+                "params": [{"to": read.target, "data": read.data}, "latest"]
+            })
+
+    response = http_pool.post(web3.provider.endpoint_uri, json=payload)
+    response.raise_for_status()
+    items = response.json()
+    if not isinstance(items, list):
+        # Nodes without batch support answer the whole batch with a single error object
+        error = items.get("error") if isinstance(items, dict) else None
+        message = error.get("message") if isinstance(error, dict) else error or items
+        raise ValueError(f"Node rejected JSON-RPC batch request: {message}")
+    by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+
+    results = []
+    for i, read in enumerate(reads):
+        result = by_id.get(i, {}).get("result")
+        if not result or result == "0x":
+            results.append(None)
+        elif read.target is None:
+            # eth_getBalance returns a quantity, not 32-byte ABI data
+            results.append(int(result, 16).to_bytes(32, "big"))
+        else:
+            results.append(bytes.fromhex(result[2:]))
+    return results
+
+
+def execute_reads(web3: Web3, reads: List[_Read]) -> List[Optional[bytes]]:
+    """Run reads in one round-trip: Multicall3 when deployed, a JSON-RPC batch otherwise"""
+    if not reads:
+        return []
+    if has_multicall(web3):
+        try:
+            return _aggregate(web3, reads)
+        except Exception as e:
+            logger.warning(f"Multicall3 aggregate failed, falling back to JSON-RPC batch: {e}")
+    return _batch(web3, reads)
+
+
+def _decode_uint(web3: Web3, data: Optional[bytes]) -> Optional[int]:
+    if not data:
+        return None
+    try:
+        return web3.codec.decode(["uint256"], data)[0]
+    except Exception:
+        return None
+
+
+def get_token_balances(
+    web3: Web3,
+    token_addresses: List[str],
+    holders: List[str],
+    known_decimals: Optional[Dict[str, int]] = None
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Read balances and decimals for every (holder, token) pair in one round-trip.
+
+    Args:
+        web3: Connected Web3 instance
+        token_addresses: ERC20 addresses, NATIVE_TOKEN (or None) for the native coin
+        holders: Addresses whose balances are read
+        known_decimals: Decimals already known by checksum token address, skipped in the call
+
+    Returns:
+        {holder: {token: {"raw": int, "decimals": int, "balance": float}}} with
+        checksum addresses as keys. Values are None for reads that failed.
+    """
+    known_decimals = dict(known_decimals or {})
+    tokens = [NATIVE_TOKEN if _is_native(token) else Web3.to_checksum_address(token) for token in token_addresses]
+    tokens = list(dict.fromkeys(tokens))
+    holders = list(dict.fromkeys(Web3.to_checksum_address(holder) for holder in holders))
+
+    reads: List[_Read] = []
+    decimals_index: Dict[str, int] = {}
+    for token in tokens:
+        if token == NATIVE_TOKEN:
+            known_decimals[token] = 18
+        elif token not in known_decimals:
+            decimals_index[token] = len(reads)
+            reads.append(_Read(token, DECIMALS_SELECTOR))
+
+    balance_index: Dict[tuple, int] = {}
+    for holder in holders:
+        for token in tokens:
+            balance_index[(holder, token)] = len(reads)
+            if token == NATIVE_TOKEN:
+                reads.append(_Read(None, None, holder))
+            else:
+                reads.append(_Read(token, _encode_address_call(BALANCE_OF_SELECTOR, holder)))
+
+    results = execute_reads(web3, reads)
+
+    for token, index in decimals_index.items():
+        known_decimals[token] = _decode_uint(web3, results[index])
+
+    balances: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (holder, token), index in balance_index.items():
+        raw = _decode_uint(web3, results[index])
+        decimals = known_decimals.get(token)
+        balances.setdefault(holder, {})[token] = {
+            "raw": raw,
+            "decimals": decimals,
+            "balance": raw / (10 ** decimals) if raw is not None and decimals is not None else None
+        }
+    return balances
+
+
+def _cached_token_balances(web3: Web3, token_addresses: List[str], holders: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """get_token_balances that skips decimals already in the token metadata cache and stores new ones"""
+    cache = get_token_cache()
+    erc20_tokens = [token for token in token_addresses if not _is_native(token)]
+    balances = get_token_balances(web3, token_addresses, holders, cache.known_decimals(web3, erc20_tokens))
+    learned = {
+        token: entry["decimals"]
+        for tokens in balances.values()
+        for token, entry in tokens.items()
+        if token != NATIVE_TOKEN
+    }
+    cache.remember_decimals(web3, learned)
+    return balances
+
+
+def get_token_balance_entry(web3: Web3, token_address: str, holder: str) -> Dict[str, Any]:
+    """{"raw", "decimals", "balance"} of a single ERC20 token, read in one round-trip"""
+    balances = _cached_token_balances(web3, [token_address], [holder])
+    return next(iter(next(iter(balances.values())).values()))
+
+
+def get_token_balance(web3: Web3, token_address: str, holder: str) -> Optional[float]:
+    """Balance of a single ERC20 token, reading balanceOf and decimals in one round-trip"""
+    return get_token_balance_entry(web3, token_address, holder)["balance"]
+
+
+def portfolio_balances(web3: Web3, token_addresses: List[str], holders: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Human readable balances as {holder: {token: balance}}"""
+    balances = _cached_token_balances(web3, token_addresses, holders)
+    return {
+        holder: {token: entry["balance"] for token, entry in tokens.items()}
+        for holder, tokens in balances.items()
+    }
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from web3 import Web3
+
+from src.helpers.evm.token_cache import get_token_cache
+
+logger = logging.getLogger("helpers.evm.nonce_manager")
+
+# Substrings node implementations use when a nonce has already been consumed or is out of sync
+NONCE_ERRORS = ("nonce too low", "replacement transaction underpriced", "invalid nonce")
+# Substrings meaning the node already holds this exact signed transaction
+KNOWN_TX_ERRORS = ("already known", "known transaction")
+# Seconds to wait for a transaction receipt before giving up
+DEFAULT_RECEIPT_TIMEOUT = 120
+
+
+class TransactionReverted(Exception):
+    """A mined transaction whose receipt status is not 1"""
+    def __init__(self, tx_hash: str):
+        super().__init__(f"Transaction {tx_hash} reverted")
+        self.tx_hash = tx_hash
+
+
+class NonceManager:
+    """
+    Allocates nonces locally for one (chain, account) pair.
+
+    The first allocation syncs with the node's pending transaction count; after
+    that nonces are handed out from memory, so several transactions can be
+    signed and sent back to back without waiting for each other or racing on
+    get_transaction_count.
+    """
+
+    def __init__(self, web3: Web3, address: str):
+        self.web3 = web3
+        self.address = Web3.to_checksum_address(address)
+        self._lock = threading.Lock()
+        self._next_nonce: Optional[int] = None
+        # nonce -> (tx hash, submitted at)
+        self._pending: Dict[int, Tuple[str, float]] = {}
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self.web3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def release(self, nonce: int) -> None:
+        """Give back a nonce whose transaction was never broadcast"""
+        with self._lock:
+            if self._next_nonce == nonce + 1:
+                self._next_nonce = nonce
+            else:
+                # A later nonce is already out, re-read from the node on next allocation
+                self._next_nonce = None
+
+    def resync(self) -> None:
+        """Forget the local counter, the next allocation reads it from the node again"""
+        with self._lock:
+            self._next_nonce = None
+
+    def track(self, nonce: int, tx_hash: str) -> None:
+        with self._lock:
+            self._pending[nonce] = (tx_hash, time.time())
+
+    def pending(self) -> Dict[int, Dict[str, Any]]:
+        """Transactions sent from this account that are not mined yet"""
+        confirmed = self.web3.eth.get_transaction_count(self.address, "latest")
+        with self._lock:
+            for nonce in [nonce for nonce in self._pending if nonce < confirmed]:
+                del self._pending[nonce]
+            return {
+                nonce: {"tx_hash": tx_hash, "age": time.time() - submitted_at}
+                for nonce, (tx_hash, submitted_at) in sorted(self._pending.items())
+            }
+
+
+_managers: Dict[Tuple[int, str], NonceManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(web3: Web3, address: str) -> NonceManager:
+    """Get the shared nonce manager for an account on the chain web3 is connected to"""
+    key = (get_token_cache().chain_id(web3), Web3.to_checksum_address(address))
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = NonceManager(web3, address)
+        return _managers[key]
+
+
+def _is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+def _is_known_tx_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(text in message for text in KNOWN_TX_ERRORS)
+
+
+def send_transaction(web3: Web3, account, tx: Dict[str, Any]) -> bytes:
+    """
+    Sign and broadcast a transaction with a locally allocated nonce.
+
+    Any nonce already in tx is replaced. On a nonce error the manager resyncs
+    with the node and the transaction is retried once. A node that already
+    holds the signed transaction counts as a successful send.
+
+    The nonce is only handed back when the node answered with an error, so the
+    transaction is known not to be out. After a timeout or connection error it
+    may have been broadcast, and the manager resyncs instead.
+
+    Returns:
+        The transaction hash
+    """
+    manager = get_nonce_manager(web3, account.address)
+    for attempt in range(2):
+        tx["nonce"] = manager.allocate()
+        try:
+            signed = account.sign_transaction(tx)
+        except Exception:
+            manager.release(tx["nonce"])
+            raise
+        try:
+            tx_hash = web3.eth.send_raw_transaction(signed.rawTransaction)
+        except Exception as e:
+            if _is_known_tx_error(e):
+                tx_hash = Web3.keccak(signed.rawTransaction)
+                logger.info(f"Transaction {tx_hash.hex()} already known to the node")
+            elif _is_nonce_error(e):
+                manager.resync()
+                if attempt == 0:
+                    logger.warning(f"Nonce {tx['nonce']} rejected ({e}), resyncing with node")
+                    continue
+                raise
+            elif isinstance(e, ValueError):
+                # web3 raises ValueError for JSON-RPC error responses, the node refused the transaction
+                manager.release(tx["nonce"])
+                raise
+            else:
+                logger.warning(f"Unknown outcome for nonce {tx['nonce']} ({e}), resyncing with node")
+                manager.resync()
+                raise
+        manager.track(tx["nonce"], tx_hash.hex())
+        return tx_hash
+
+
+def confirm_transaction(web3: Web3, address: str, tx_hash, timeout: float = DEFAULT_RECEIPT_TIMEOUT) -> Dict[str, Any]:
+    """
+    Wait for a transaction to be mined and check that it succeeded.
+
+    Transactions sent after it from the same account may be built on its
+    result, so a revert resyncs the account's nonce with the node before
+    TransactionReverted is raised.
+
+    Returns:
+        The transaction receipt
+    """
+    receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+    if receipt["status"] != 1:
+        get_nonce_manager(web3, address).resync()
+        raise TransactionReverted(tx_hash if isinstance(tx_hash, str) else tx_hash.hex())
+    return receipt
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from web3 import Web3
+from web3.contract import Contract
+
+from src.constants.abi import ERC20_ABI
+
+logger = logging.getLogger("helpers.evm.token_cache")
+
+DEFAULT_CACHE_PATH = Path.home() / ".zerepy" / "token_metadata.json"
+
+
+@dataclass
+class TokenMetadata:
+    chain_id: int
+    address: str
+    decimals: int
+    symbol: Optional[str] = None
+    name: Optional[str] = None
+    # Only decimals are known (learned from a batched read), symbol and name are fetched on the next get()
+    partial: bool = False
+
+
+class TokenMetadataCache:
+    """
+    Process-wide cache of ERC20 metadata keyed by (chain_id, checksum address).
+
+    Decimals, symbol and name never change for a deployed token, so they are
+    fetched once, persisted to disk and shared by every EVM connection. Prebuilt
+    contract objects are kept in memory with the same key, one per token, and
+    rebuilt when asked for through a different Web3 instance.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._tokens: Optional[Dict[Tuple[int, str], TokenMetadata]] = None
+        self._contracts: Dict[Tuple[int, str], Contract] = {}
+        self._chain_ids: Dict[str, int] = {}
+
+    def _load(self) -> Dict[Tuple[int, str], TokenMetadata]:
+        if self._tokens is None:
+            self._tokens = {}
+            try:
+                with open(self.path, "r") as f:
+                    for entry in json.load(f):
+                        if "partial" not in entry and entry.get("symbol") is None and entry.get("name") is None:
+                            # Written before partial entries were marked
+                            entry["partial"] = True
+                        token = TokenMetadata(**entry)
+                        self._tokens[(token.chain_id, token.address)] = token
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable token metadata cache {self.path}: {e}")
+        return self._tokens
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump([asdict(token) for token in self._tokens.values()], f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist token metadata cache: {e}")
+
+    def chain_id(self, web3: Web3) -> int:
+        """Chain ID of a Web3 instance, fetched once per RPC endpoint"""
+        endpoint = getattr(web3.provider, "endpoint_uri", None)
+        if endpoint is None:
+            # No stable key to remember it under
+            return web3.eth.chain_id
+        with self._lock:
+            chain_id = self._chain_ids.get(endpoint)
+        if chain_id is None:
+            chain_id = web3.eth.chain_id
+            with self._lock:
+                self._chain_ids[endpoint] = chain_id
+        return chain_id
+
+    def contract(self, web3: Web3, token_address: str) -> Contract:
+        """Prebuilt ERC20 contract object for a token, bound to the caller's Web3 instance"""
+        address = Web3.to_checksum_address(token_address)
+        key = (self.chain_id(web3), address)
+        with self._lock:
+            contract = self._contracts.get(key)
+            if contract is None or contract.w3 is not web3:
+                contract = web3.eth.contract(address=address, abi=ERC20_ABI)
+                self._contracts[key] = contract
+        return contract
+
+    def get(self, web3: Web3, token_address: str) -> TokenMetadata:
+        """Get metadata for a token, reading it from chain the first time only"""
+        address = Web3.to_checksum_address(token_address)
+        key = (self.chain_id(web3), address)
+        with self._lock:
+            token = self._load().get(key)
+        if token is not None and not token.partial:
+            return token
+
+        contract = self.contract(web3, address)
+        token = TokenMetadata(
+            chain_id=key[0],
+            address=address,
+            decimals=token.decimals if token is not None else contract.functions.decimals().call(),
+            symbol=self._optional_call(contract, "symbol"),
+            name=self._optional_call(contract, "name")
+        )
+        with self._lock:
+            self._load()[key] = token
+            self._save()
+        return token
+
+    @staticmethod
+    def _optional_call(contract: Contract, function_name: str) -> Optional[str]:
+        # Some tokens return bytes32 instead of string for symbol/name
+        try:
+            return getattr(contract.functions, function_name)().call()
+        except Exception:
+            return None
+
+    def decimals(self, web3: Web3, token_address: str) -> int:
+        """Decimals of a token, a partial entry is enough and is not completed here"""
+        address = Web3.to_checksum_address(token_address)
+        key = (self.chain_id(web3), address)
+        with self._lock:
+            token = self._load().get(key)
+        if token is not None:
+            return token.decimals
+        return self.get(web3, address).decimals
+
+    def known_decimals(self, web3: Web3, token_addresses: Iterable[str]) -> Dict[str, int]:
+        """Decimals of the given tokens that are already cached, without any RPC call for tokens"""
+        chain_id = self.chain_id(web3)
+        with self._lock:
+            tokens = self._load()
+            known = {}
+            for token_address in token_addresses:
+                address = Web3.to_checksum_address(token_address)
+                token = tokens.get((chain_id, address))
+                if token is not None:
+                    known[address] = token.decimals
+        return known
+
+    def remember_decimals(self, web3: Web3, decimals: Dict[str, Any]) -> None:
+        """Store decimals learned elsewhere (e.g. from a multicall read) as partial entries"""
+        chain_id = self.chain_id(web3)
+        with self._lock:
+            tokens = self._load()
+            changed = False
+            for token_address, value in decimals.items():
+                address = Web3.to_checksum_address(token_address)
+                if value is None or (chain_id, address) in tokens:
+                    continue
+                tokens[(chain_id, address)] = TokenMetadata(chain_id, address, value, partial=True)
+                changed = True
+            if changed:
+                self._save()
+
+
+_cache: Optional[TokenMetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenMetadataCache:
+    """Get the shared token metadata cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TokenMetadataCache()
+        return _cache
@@ -0,0 +1,142 @@
+import logging
+import os
+from http.cookiejar import DefaultCookiePolicy
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("helpers.http_pool")
+
+# Number of distinct hosts kept in the pool, and keep-alive connections kept per host
+DEFAULT_POOL_HOSTS = int(os.getenv("ZEREPY_HTTP_POOL_HOSTS", "32"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("ZEREPY_HTTP_POOL_MAXSIZE", "16"))
+# (connect, read) timeout applied when a caller does not pass one
+DEFAULT_TIMEOUT = (
+    float(os.getenv("ZEREPY_HTTP_CONNECT_TIMEOUT", "10")),
+    float(os.getenv("ZEREPY_HTTP_READ_TIMEOUT", "60"))
+)
+
+
+class HTTPPool:
+    """
+    Process-wide keep-alive HTTP client shared by every REST connection.
+
+    Every thread gets its own requests.Session (Session is not documented as
+    thread-safe), but all of them are mounted on one HTTPAdapter whose urllib3
+    pool keeps up to pool_maxsize open connections per host, so repeated calls
+    to the same API reuse a warm TCP+TLS connection instead of opening a new
+    one each time. The sessions never store cookies, so a Set-Cookie from one
+    agent's API is not replayed on another agent's requests.
+    """
+
+    def __init__(
+        self,
+        pool_hosts: int = DEFAULT_POOL_HOSTS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        timeout: Any = DEFAULT_TIMEOUT
+    ):
+        self.timeout = timeout
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "total_time": 0.0}
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session, created on first use"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Same signature as requests.request, but served from the shared pool"""
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        start = time.monotonic()
+        failed = False
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                stats = self._stats[host]
+                stats["requests"] += 1
+                stats["total_time"] += time.monotonic() - start
+                if failed:
+                    stats["errors"] += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request counts and latency, plus open connection counts from the pool"""
+        with self._lock:
+            result = {
+                host: {
+                    "requests": int(stats["requests"]),
+                    "errors": int(stats["errors"]),
+                    "avg_latency": stats["total_time"] / stats["requests"] if stats["requests"] else 0.0
+                }
+                for host, stats in self._stats.items()
+            }
+
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            host = key.key_host if key.key_port in (None, 80, 443) else f"{key.key_host}:{key.key_port}"
+            entry = result.setdefault(host, {"requests": 0, "errors": 0, "avg_latency": 0.0})
+            entry["connections_opened"] = pool.num_connections
+            entry["idle_connections"] = pool.pool.qsize() if pool.pool else 0
+        return result
+
+    def close(self) -> None:
+        # Closing the shared adapter drops the pooled connections of every thread's session
+        self._adapter.close()
+
+
+_pool: Optional[HTTPPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HTTPPool:
+    """Get or create the shared HTTP pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HTTPPool()
+        return _pool
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_pool().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_pool().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_pool().post(url, **kwargs)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return get_pool().stats()
@@ -0,0 +1,176 @@
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger("helpers.llm_cache")
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 60 * 60
+# Actions whose output should be fresh every time, they never read from or write to the cache.
+# Actions registered with posts_content=True are skipped as well, whether listed here or not
+DEFAULT_SKIP_ACTIONS = ("post-tweet", "reply-to-tweet", "reply-to-mention", "post-echochambers", "reply-echochambers")
+
+# Name of the registered action currently running, set by the action handler
+current_action: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_action", default=None)
+# False while an action that publishes its output is running
+cache_allowed: contextvars.ContextVar[bool] = contextvars.ContextVar("cache_allowed", default=True)
+
+
+@contextmanager
+def action_context(action_name: str, posts_content: bool = False) -> Iterator[None]:
+    """Mark LLM calls made inside the block as belonging to action_name"""
+    token = current_action.set(action_name)
+    # Once inside a posting action, nested actions can not re-enable the cache
+    allowed_token = cache_allowed.set(cache_allowed.get() and not posts_content)
+    try:
+        yield
+    finally:
+        cache_allowed.reset(allowed_token)
+        current_action.reset(token)
+
+
+def _normalize(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+class LLMResponseCache:
+    """
+    Response cache in front of the generate-text action of LLM connections.
+
+    Keys are a SHA-256 over connection, model, system prompt, prompt and any
+    extra parameters. In normalized mode whitespace and case are folded first,
+    so trivially different prompts share an entry. Entries live in an
+    in-memory LRU and, when sqlite_path is set, in a SQLite table that
+    survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        normalize: bool = False,
+        sqlite_path: Optional[str] = None,
+        skip_actions: Tuple[str, ...] = DEFAULT_SKIP_ACTIONS
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.normalize = normalize
+        self.skip_actions = set(skip_actions)
+        self._lock = threading.Lock()
+        # key -> (response, expires_at)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["LLMResponseCache"]:
+        """Build a cache from the agent's "llm_cache" section, None when disabled"""
+        config = config or {}
+        if not config.get("enabled", False):
+            return None
+        return cls(
+            max_entries=config.get("max_entries", DEFAULT_MAX_ENTRIES),
+            ttl=config.get("ttl", DEFAULT_TTL),
+            normalize=config.get("normalize", False),
+            sqlite_path=config.get("sqlite_path"),
+            skip_actions=tuple(config.get("skip_actions", DEFAULT_SKIP_ACTIONS))
+        )
+
+    def make_key(self, connection_name: str, model: Optional[str], kwargs: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a generate-text call, or None when the current action opted out"""
+        if not cache_allowed.get() or current_action.get() in self.skip_actions:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        params = dict(kwargs)
+        prompt = params.pop("prompt", "")
+        system_prompt = params.pop("system_prompt", "")
+        model = params.pop("model", None) or model
+        if self.normalize:
+            prompt, system_prompt = _normalize(prompt), _normalize(system_prompt)
+
+        payload = json.dumps(
+            [connection_name, model, system_prompt, prompt, params],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+            if entry is not None:
+                self._memory.pop(key, None)
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        if not isinstance(response, str) or not response:
+            return
+        entry = (response, time.time() + self.ttl)
+        with self._lock:
+            self._remember(key, entry)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, entry[0], entry[1])
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: Tuple[str, float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._memory),
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0
+            )
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("helpers.metrics")
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds of the payload size histogram buckets, in bytes
+DEFAULT_SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# How a call ended: it returned, it raised, or it was refused before running
+# (missing parameters, connection not configured, unknown action)
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_REJECTED = "rejected"
+OUTCOMES = (OUTCOME_OK, OUTCOME_ERROR, OUTCOME_REJECTED)
+
+
+def _payload_size(result: Any) -> Optional[int]:
+    """
+    Size of a text or binary action result, None for anything else. Text is
+    measured in characters, and structured results are not serialized just
+    to be measured, so sizing stays O(1) on the action path.
+    """
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if isinstance(result, str):
+        return len(result)
+    return None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+class Histogram:
+    """Per-bucket counts, made cumulative on export as Prometheus expects"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        separator = "," if labels else ""
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class ActionSeries:
+    """Everything recorded for one label combination"""
+
+    def __init__(self):
+        self.latency = Histogram(DEFAULT_LATENCY_BUCKETS)
+        self.payload = Histogram(DEFAULT_SIZE_BUCKETS)
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.in_flight = 0
+
+
+class TrackedStream:
+    """
+    Iterator over a streamed action result whose call ends when the stream
+    is used up, raises or is closed, so latency covers the whole stream.
+    """
+
+    def __init__(self, metrics: "ActionMetrics", token: Tuple[ActionSeries, float], stream: Iterator[Any]):
+        self._metrics = metrics
+        self._token = token
+        self._stream = stream
+        self._size = 0
+        self._done = False
+
+    def __iter__(self) -> "TrackedStream":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._finish(OUTCOME_OK)
+            raise
+        except BaseException:
+            self._finish(OUTCOME_ERROR)
+            raise
+        self._size += _payload_size(chunk) or 0
+        return chunk
+
+    def _finish(self, outcome: str) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._metrics.end(self._token, size=self._size, outcome=outcome)
+
+    def close(self) -> None:
+        """Stop reading early, the call counts as successful up to here"""
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish(OUTCOME_OK)
+
+    def __del__(self):
+        # An abandoned stream must not stay in flight forever
+        self._finish(OUTCOME_OK)
+
+
+class ActionMetrics:
+    """
+    Latency, outcome, payload size and in-flight series of one family of
+    actions, keyed by label values. Recording is a dict lookup and a few
+    integer updates under one lock, cheap enough for every action call.
+    """
+
+    def __init__(self, prefix: str, label_names: Tuple[str, ...], description: str):
+        self.prefix = prefix
+        self.label_names = label_names
+        self.description = description
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], ActionSeries] = {}
+
+    def begin(self, *label_values: str) -> Tuple[ActionSeries, float]:
+        """Mark a call as in flight, pass the returned token to end()"""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ActionSeries()
+            series.in_flight += 1
+        return series, time.perf_counter()
+
+    def end(
+        self,
+        token: Tuple[ActionSeries, float],
+        result: Any = None,
+        outcome: str = OUTCOME_OK,
+        size: Optional[int] = None
+    ) -> None:
+        """Record a finished call, size overrides the one measured from result"""
+        series, started = token
+        elapsed = time.perf_counter() - started
+        if outcome != OUTCOME_OK:
+            size = None
+        elif size is None:
+            size = _payload_size(result)
+        with self._lock:
+            series.in_flight -= 1
+            series.latency.observe(elapsed)
+            series.outcomes[outcome] = series.outcomes.get(outcome, 0) + 1
+            if size is not None:
+                series.payload.observe(size)
+
+    def track_stream(self, token: Tuple[ActionSeries, float], stream: Iterator[Any]) -> TrackedStream:
+        """End the call begun with token once the stream is consumed instead of now"""
+        return TrackedStream(self, token, stream)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [
+                (
+                    ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)),
+                    series
+                )
+                for values, series in sorted(self._series.items())
+            ]
+            duration, payload = f"{self.prefix}_duration_seconds", f"{self.prefix}_payload_bytes"
+            calls, in_flight = f"{self.prefix}_calls_total", f"{self.prefix}_in_flight"
+
+            lines = [f"# HELP {duration} Latency of {self.description}", f"# TYPE {duration} histogram"]
+            for labels, series in snapshot:
+                lines.extend(series.latency.render(duration, labels))
+
+            lines += [
+                f"# HELP {payload} Text or binary result size of successful {self.description}",
+                f"# TYPE {payload} histogram"
+            ]
+            for labels, series in snapshot:
+                lines.extend(series.payload.render(payload, labels))
+
+            lines += [f"# HELP {calls} Finished {self.description} by outcome", f"# TYPE {calls} counter"]
+            for labels, series in snapshot:
+                separator = "," if labels else ""
+                lines.extend(
+                    f'{calls}{{{labels}{separator}outcome="{outcome}"}} {count}'
+                    for outcome, count in series.outcomes.items()
+                )
+
+            lines += [f"# HELP {in_flight} {self.description.capitalize()} currently running", f"# TYPE {in_flight} gauge"]
+            lines.extend(f"{in_flight}{{{labels}}} {series.in_flight}" for labels, series in snapshot)
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide action instrumentation, exported in the Prometheus text format"""
+
+    def __init__(self):
+        self.connection_actions = ActionMetrics(
+            "zerepy_connection_action", ("connection", "action"), "connection actions"
+        )
+        self.agent_actions = ActionMetrics(
+            "zerepy_agent_action", ("agent", "action"), "agent actions"
+        )
+
+    def render(self) -> str:
+        lines = self.connection_actions.render() + self.agent_actions.render()
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get or create the shared metrics registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
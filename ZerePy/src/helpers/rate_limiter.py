@@ -0,0 +1,147 @@
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger("helpers.rate_limiter")
+
+# Longest a caller is held back waiting for a window to reset before the call fails instead
+DEFAULT_MAX_WAIT = 60.0
+# Window assumed when a 429 arrives without a reset header (Twitter windows are 15 minutes)
+DEFAULT_WINDOW = 15 * 60.0
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an endpoint's budget is exhausted for longer than the caller may wait"""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit for {key} exhausted, resets in {retry_after:.0f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class EndpointBucket:
+    """Budget of one endpoint within its current rate-limit window"""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        # Epoch seconds at which the window resets and the budget is full again
+        self.reset_at = 0.0
+
+    def refresh(self, now: float) -> None:
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+    def wait_time(self, now: float) -> float:
+        self.refresh(now)
+        if self.remaining is not None and self.remaining <= 0:
+            return max(0.0, self.reset_at - now)
+        return 0.0
+
+
+class RateLimiter:
+    """
+    Per-endpoint token buckets learned from x-rate-limit-* response headers.
+
+    Nothing is assumed about an endpoint until a response reports its limit.
+    From then on every call takes a token locally, so concurrent callers do
+    not overshoot the budget between responses, and a call against an empty
+    bucket waits precisely until the window resets instead of hitting a 429.
+    """
+
+    def __init__(self, max_wait: float = DEFAULT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, EndpointBucket] = {}
+
+    @staticmethod
+    def endpoint_key(method: str, endpoint: str) -> str:
+        """Limits apply per endpoint template, so numeric IDs in the path are folded"""
+        segments = [":id" if _ID_SEGMENT.match(part) else part for part in endpoint.strip("/").split("/")]
+        return f"{method.upper()} {'/'.join(segments)}"
+
+    def _bucket(self, key: str) -> EndpointBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = EndpointBucket()
+        return bucket
+
+    def acquire(self, key: str, max_wait: Optional[float] = None) -> None:
+        """Take a token for key, sleeping until the window resets if needed"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        while True:
+            with self._lock:
+                bucket = self._bucket(key)
+                wait = bucket.wait_time(time.time())
+                if wait <= 0:
+                    if bucket.remaining is not None:
+                        bucket.remaining -= 1
+                    return
+            if wait > max_wait:
+                raise RateLimitExceeded(key, wait)
+            logger.info(f"Rate limit for {key} exhausted, waiting {wait:.1f}s for reset")
+            time.sleep(wait)
+
+    def update(self, key: str, headers: Mapping[str, Any]) -> None:
+        """Learn the endpoint's limit, remaining budget and reset time from a response"""
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.limit = limit
+            # Other calls may already hold tokens the server has not counted yet
+            if bucket.remaining is None or bucket.reset_at != reset_at:
+                bucket.remaining = remaining
+            else:
+                bucket.remaining = min(bucket.remaining, remaining)
+            bucket.reset_at = reset_at
+
+    def exhaust(self, key: str, headers: Mapping[str, Any]) -> float:
+        """Record a 429 for key, returns the seconds until the window resets"""
+        now = time.time()
+        try:
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            reset_at = now + DEFAULT_WINDOW
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.remaining = 0
+            bucket.reset_at = max(reset_at, now)
+            return bucket.reset_at - now
+
+    def wait_time(self, key: str) -> float:
+        """Seconds until key can be called again, 0 when it has budget or is unknown"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return bucket.wait_time(time.time()) if bucket else 0.0
+
+    def remaining(self, key: str) -> Optional[int]:
+        """Calls left in the current window, None until a response reported the limit"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return None
+            bucket.refresh(time.time())
+            return bucket.remaining
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            result = {}
+            for key, bucket in self._buckets.items():
+                bucket.refresh(now)
+                result[key] = {
+                    "limit": bucket.limit,
+                    "remaining": bucket.remaining,
+                    "resets_in": max(0.0, bucket.reset_at - now) if bucket.reset_at else None
+                }
+            return result
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger("helpers.seen_index")
+
+# IDs remembered before the oldest ones are forgotten
+DEFAULT_CAPACITY = 10000
+# Unsaved additions after which the index is written to disk
+DEFAULT_FLUSH_EVERY = 20
+
+
+class SeenIndex:
+    """
+    Bounded set of IDs that survives restarts.
+
+    IDs are kept in insertion order and the oldest are evicted once capacity
+    is reached, so memory stays flat however long the agent runs. The index,
+    together with a small meta dict for cursors, is written atomically to a
+    JSON file every flush_every additions and on flush()/close().
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        capacity: int = DEFAULT_CAPACITY,
+        flush_every: int = DEFAULT_FLUSH_EVERY
+    ):
+        self.path = Path(path) if path else None
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self.meta: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self._dirty = 0
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            for item in saved.get("ids", [])[-self.capacity:]:
+                self._ids[item] = None
+            self.meta = saved.get("meta", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable seen index {self.path}: {e}")
+
+    def __contains__(self, item: object) -> bool:
+        with self._lock:
+            return str(item) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        """IDs oldest first, over a copy so adds while iterating are safe"""
+        with self._lock:
+            return iter(list(self._ids))
+
+    def add(self, item: str) -> None:
+        with self._lock:
+            key = str(item)
+            if key in self._ids:
+                self._ids.move_to_end(key)
+                return
+            self._ids[key] = None
+            while len(self._ids) > self.capacity:
+                self._ids.popitem(last=False)
+            self._dirty += 1
+            flush = self._dirty >= self.flush_every
+        if flush:
+            self.flush()
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._lock:
+            if self.meta.get(key) != value:
+                self.meta[key] = value
+                self._dirty += 1
+
+    def flush(self) -> None:
+        """Write the index to disk if anything changed since the last write"""
+        if self.path is None:
+            return
+        # Snapshot and write under one lock so an older snapshot never overwrites a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = {"ids": list(self._ids), "meta": dict(self.meta)}
+                self._dirty = 0
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Could not persist seen index {self.path}: {e}")
+
+    def close(self) -> None:
+        self.flush()
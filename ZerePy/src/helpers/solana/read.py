@@ -5,11 +5,12 @@ from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
 
 from src.constants import LAMPORTS_PER_SOL
-from src.types import JupiterTokenData
 
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
-import requests
+from src.helpers import http_pool
+from src.helpers.ticker_cache import resolve_ticker
+from src.helpers.solana.token_registry import get_token_registry
 
 from spl.token.async_client import AsyncToken
 from spl.token.instructions import get_associated_token_address
@@ -58,7 +59,7 @@ class SolanaReadHelper:
         url = f"https://api.jup.ag/price/v2?ids={token_address}"
 
         try:
-            with requests.get(url) as response:
+            with http_pool.get(url) as response:
                 response.raise_for_status()
                 data = response.json()
                 price = data.get("data", {}).get(token_address, {}).get("price")
@@ -75,29 +76,14 @@ class SolanaReadHelper:
         ticker: str,
     ) -> str:
         try:
-            response = requests.get(
-                f"https://api.dexscreener.com/latest/dex/search?q={ticker}"
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            if not data.get("pairs"):
-                return None
-
-            solana_pairs = [
-                pair for pair in data["pairs"] if pair.get("chainId") == "solana"
-            ]
-            solana_pairs.sort(key=lambda x: x.get("fdv", 0), reverse=True)
-
-            solana_pairs = [
-                pair
-                for pair in solana_pairs
-                if pair.get("baseToken", {}).get("symbol", "").lower() == ticker.lower()
-            ]
-
-            if solana_pairs:
-                return solana_pairs[0].get("baseToken", {}).get("address")
-            return None
+            # Unambiguous verified symbols are answered from the local index
+            try:
+                mint = get_token_registry().get_by_symbol(ticker)
+                if mint:
+                    return mint
+            except Exception as error:
+                logger.warning(f"Jupiter token registry unavailable: {str(error)}")
+            return resolve_ticker("solana", ticker)
         except Exception as error:
             logger.error(
                 f"Error fetching token address from DexScreener: {str(error)}",
@@ -110,20 +96,6 @@ class SolanaReadHelper:
         address: str,
     ) -> str:
         try:
-            response = requests.get(
-                "https://tokens.jup.ag/tokens?tags=verified",
-                headers={"Content-Type": "application/json"},
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            for token in data:
-                if token.get("address") == str(address):
-                    return JupiterTokenData(
-                        address=token.get("address"),
-                        symbol=token.get("symbol"),
-                        name=token.get("name"),
-                    )
-            return None
+            return get_token_registry().get_by_address(address)
         except Exception as error:
             raise Exception(f"Error fetching token data: {str(error)}")
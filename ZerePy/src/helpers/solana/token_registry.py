@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.helpers import http_pool
+from src.types import JupiterTokenData
+
+logger = logging.getLogger("helpers.solana.token_registry")
+
+JUPITER_VERIFIED_TOKENS_URL = "https://tokens.jup.ag/tokens?tags=verified"
+DEFAULT_SNAPSHOT_PATH = Path.home() / ".zerepy" / "jupiter_tokens.json"
+# Seconds before the list is revalidated against Jupiter (a 304 only costs one small request)
+DEFAULT_TTL = float(os.getenv("ZEREPY_JUPITER_TOKENS_TTL", str(60 * 60)))
+
+
+class JupiterTokenRegistry:
+    """
+    Indexed copy of Jupiter's verified token list.
+
+    The list is downloaded once and kept as two dicts, by mint and by
+    lowercase symbol, so lookups never scan it. A snapshot on disk makes the
+    registry usable at startup without a download. Once the TTL passes, the
+    list is revalidated in the background with If-None-Match while lookups keep
+    being served from the current copy.
+    """
+
+    def __init__(self, snapshot_path: Path = DEFAULT_SNAPSHOT_PATH, ttl: float = DEFAULT_TTL):
+        self.snapshot_path = Path(snapshot_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False
+        self._etag: Optional[str] = None
+        self._fetched_at = 0.0
+        # mint -> (symbol, name, decimals)
+        self._by_mint: Dict[str, Tuple[str, str, Optional[int]]] = {}
+        # lowercase symbol -> mints
+        self._by_symbol: Dict[str, List[str]] = {}
+
+    def _index(self, tokens: List[List]) -> None:
+        by_mint = {}
+        by_symbol: Dict[str, List[str]] = {}
+        for mint, symbol, name, decimals in tokens:
+            by_mint[mint] = (symbol, name, decimals)
+            if symbol:
+                by_symbol.setdefault(symbol.lower(), []).append(mint)
+        self._by_mint = by_mint
+        self._by_symbol = by_symbol
+
+    def _compact(self) -> List[List]:
+        return [[mint, symbol, name, decimals] for mint, (symbol, name, decimals) in self._by_mint.items()]
+
+    def _load_snapshot(self) -> None:
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            self._index(snapshot["tokens"])
+            self._etag = snapshot.get("etag")
+            self._fetched_at = snapshot.get("fetched_at", 0.0)
+            logger.debug(f"Loaded {len(self._by_mint)} Jupiter tokens from {self.snapshot_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Jupiter token snapshot {self.snapshot_path}: {e}")
+
+    def _save_snapshot(self) -> None:
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"etag": self._etag, "fetched_at": self._fetched_at, "tokens": self._compact()}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Could not persist Jupiter token snapshot: {e}")
+
+    def refresh(self) -> None:
+        """Download the list, or just revalidate it when Jupiter answers 304 Not Modified"""
+        headers = {"Content-Type": "application/json"}
+        if self._etag and self._by_mint:
+            headers["If-None-Match"] = self._etag
+        response = http_pool.get(JUPITER_VERIFIED_TOKENS_URL, headers=headers)
+        if response.status_code == 304:
+            with self._lock:
+                self._fetched_at = time.time()
+                self._save_snapshot()
+            return
+        response.raise_for_status()
+
+        tokens = [
+            [token.get("address"), token.get("symbol"), token.get("name"), token.get("decimals")]
+            for token in response.json()
+            if token.get("address")
+        ]
+        with self._lock:
+            self._index(tokens)
+            self._etag = response.headers.get("ETag")
+            self._fetched_at = time.time()
+            self._save_snapshot()
+        logger.info(f"Indexed {len(tokens)} verified Jupiter tokens")
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Jupiter token list refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_fresh(self) -> None:
+        """Block only when nothing is loaded yet, otherwise refresh stale data in the background"""
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+                self._loaded = True
+            empty = not self._by_mint
+            stale = time.time() - self._fetched_at > self.ttl
+            if not empty and stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+        if empty:
+            self.refresh()
+
+    def get_by_address(self, mint: str) -> Optional[JupiterTokenData]:
+        self._ensure_fresh()
+        entry = self._by_mint.get(str(mint))
+        if entry is None:
+            return None
+        return JupiterTokenData(address=str(mint), symbol=entry[0], name=entry[1])
+
+    def mints_for_symbol(self, symbol: str) -> List[str]:
+        """Every verified mint using a symbol, there can be more than one"""
+        self._ensure_fresh()
+        return list(self._by_symbol.get(symbol.strip().lower(), []))
+
+    def get_by_symbol(self, symbol: str) -> Optional[str]:
+        """Mint for a symbol, only when exactly one verified token uses it"""
+        mints = self.mints_for_symbol(symbol)
+        return mints[0] if len(mints) == 1 else None
+
+    def decimals(self, mint: str) -> Optional[int]:
+        self._ensure_fresh()
+        entry = self._by_mint.get(str(mint))
+        return entry[2] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._by_mint)
+
+
+_registry: Optional[JupiterTokenRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_token_registry() -> JupiterTokenRegistry:
+    """Get the shared Jupiter token registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = JupiterTokenRegistry()
+        return _registry
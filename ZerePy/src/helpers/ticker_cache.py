@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from src.helpers import http_pool
+
+logger = logging.getLogger("helpers.ticker_cache")
+
+DEXSCREENER_SEARCH_URL = "https://api.dexscreener.com/latest/dex/search"
+DEFAULT_CACHE_PATH = Path.home() / ".zerepy" / "ticker_cache.json"
+# Per-chain token lists, <chain>.json holding {"SYMBOL": "address"} or [{"symbol": ..., "address": ...}]
+DEFAULT_TOKEN_LIST_DIR = Path.home() / ".zerepy" / "token_lists"
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("ZEREPY_TICKER_CACHE_SIZE", "2048"))
+# How long a resolved ticker is trusted, and how long a ticker with no match is remembered
+DEFAULT_TTL = float(os.getenv("ZEREPY_TICKER_CACHE_TTL", str(6 * 60 * 60)))
+DEFAULT_NEGATIVE_TTL = float(os.getenv("ZEREPY_TICKER_CACHE_NEGATIVE_TTL", str(10 * 60)))
+
+
+def rank_by_fdv(pair: Dict[str, Any]) -> float:
+    return float(pair.get("fdv") or 0)
+
+
+def rank_by_liquidity_volume(pair: Dict[str, Any]) -> float:
+    return float((pair.get("liquidity") or {}).get("usd") or 0) * float((pair.get("volume") or {}).get("h24") or 0)
+
+
+class TickerResolver:
+    """
+    Resolves (chain, ticker) to a token address through DexScreener, with caching.
+
+    Lookups are served from an in-memory LRU first, then from preloaded
+    per-chain token lists, then from the on-disk cache. Only on a miss is the
+    DexScreener search hit; the result, including "no match", is cached with a
+    TTL so repeated prompts mentioning the same ticker never go to the network.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        token_list_dir: Path = DEFAULT_TOKEN_LIST_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    ):
+        self.path = Path(path)
+        self.token_list_dir = Path(token_list_dir)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # (chain, ticker) -> (address or None, expires_at)
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[Optional[str], float]]" = OrderedDict()
+        self._disk: Optional[Dict[str, Dict[str, Any]]] = None
+        self._token_lists: Dict[str, Dict[str, str]] = {}
+        self._stats = {"memory_hits": 0, "list_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(chain: str, ticker: str) -> Tuple[str, str]:
+        return chain.lower(), ticker.strip().lower()
+
+    def _load_disk(self) -> Dict[str, Dict[str, Any]]:
+        if self._disk is None:
+            self._disk = {}
+            try:
+                with open(self.path, "r") as f:
+                    self._disk = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable ticker cache {self.path}: {e}")
+        return self._disk
+
+    def _save_disk(self) -> None:
+        try:
+            now = time.time()
+            entries = {key: entry for key, entry in self._disk.items() if entry["expires_at"] > now}
+            self._disk = entries
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist ticker cache: {e}")
+
+    def _remember(self, key: Tuple[str, str], address: Optional[str], expires_at: float) -> None:
+        self._memory[key] = (address, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def load_token_list(self, chain: str, tokens: Union[Dict[str, str], Iterable[Dict[str, str]]]) -> None:
+        """Preload symbol -> address pairs for a chain; these never expire"""
+        if isinstance(tokens, dict):
+            items = tokens.items()
+        else:
+            items = ((token.get("symbol"), token.get("address")) for token in tokens)
+        with self._lock:
+            token_list = self._token_lists.setdefault(chain.lower(), {})
+            for symbol, address in items:
+                if symbol and address:
+                    token_list.setdefault(symbol.strip().lower(), address)
+
+    def _token_list(self, chain: str) -> Dict[str, str]:
+        """Token list for a chain, read from token_list_dir the first time the chain is used"""
+        if chain not in self._token_lists:
+            self._token_lists[chain] = {}
+            list_path = self.token_list_dir / f"{chain}.json"
+            if list_path.exists():
+                try:
+                    with open(list_path, "r") as f:
+                        tokens = json.load(f)
+                    items = tokens.items() if isinstance(tokens, dict) else (
+                        (token.get("symbol"), token.get("address")) for token in tokens
+                    )
+                    for symbol, address in items:
+                        if symbol and address:
+                            self._token_lists[chain].setdefault(symbol.strip().lower(), address)
+                    logger.info(f"Loaded {len(self._token_lists[chain])} tokens for {chain} from {list_path}")
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable token list {list_path}: {e}")
+        return self._token_lists[chain]
+
+    def lookup(self, chain: str, ticker: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check the caches without touching the network.
+
+        Returns:
+            (found, address): found is False on a cache miss; address is None
+            when the ticker is cached as having no match.
+        """
+        key = self._key(chain, ticker)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return True, entry[0]
+
+            address = self._token_list(key[0]).get(key[1])
+            if address:
+                self._remember(key, address, float("inf"))
+                self._stats["list_hits"] += 1
+                return True, address
+
+            disk_entry = self._load_disk().get(":".join(key))
+            if disk_entry is not None and disk_entry["expires_at"] > now:
+                self._remember(key, disk_entry["address"], disk_entry["expires_at"])
+                self._stats["disk_hits"] += 1
+                return True, disk_entry["address"]
+
+            self._stats["misses"] += 1
+            return False, None
+
+    def store(self, chain: str, ticker: str, address: Optional[str]) -> None:
+        """Cache a resolution result, a None address is cached for negative_ttl"""
+        key = self._key(chain, ticker)
+        expires_at = time.time() + (self.ttl if address else self.negative_ttl)
+        with self._lock:
+            self._remember(key, address, expires_at)
+            self._load_disk()[":".join(key)] = {"address": address, "expires_at": expires_at}
+            self._save_disk()
+
+    def resolve(
+        self,
+        chain: str,
+        ticker: str,
+        rank: Callable[[Dict[str, Any]], float] = rank_by_fdv
+    ) -> Optional[str]:
+        """
+        Resolve a ticker to a token address on a DexScreener chain ID.
+
+        Args:
+            chain: DexScreener chain ID (e.g. "solana", "sonic", "ethereum")
+            ticker: Token symbol, matched case-insensitively
+            rank: Scores candidate pairs, the best scoring exact symbol match wins
+
+        Returns:
+            The token address, or None when no pair matches
+        """
+        found, address = self.lookup(chain, ticker)
+        if found:
+            return address
+
+        response = http_pool.get(DEXSCREENER_SEARCH_URL, params={"q": ticker})
+        response.raise_for_status()
+        pairs = response.json().get("pairs") or []
+
+        chain_id = chain.lower()
+        symbol = ticker.strip().lower()
+        candidates = [
+            pair for pair in pairs
+            if (pair.get("chainId") or "").lower() == chain_id
+            and (pair.get("baseToken", {}).get("symbol") or "").lower() == symbol
+        ]
+        address = max(candidates, key=rank).get("baseToken", {}).get("address") if candidates else None
+
+        self.store(chain, ticker, address)
+        return address
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._disk = {}
+            self._save_disk()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._memory))
+
+
+_resolver: Optional[TickerResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_ticker_resolver() -> TickerResolver:
+    """Get the shared ticker resolver"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = TickerResolver()
+        return _resolver
+
+
+def resolve_ticker(
+    chain: str,
+    ticker: str,
+    rank: Callable[[Dict[str, Any]], float] = rank_by_fdv
+) -> Optional[str]:
+    return get_ticker_resolver().resolve(chain, ticker, rank)
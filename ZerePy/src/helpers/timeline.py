@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from src.helpers.seen_index import SeenIndex
+
+logger = logging.getLogger("helpers.timeline")
+
+DEFAULT_CAPACITY = 100
+# Refill once fewer than this many unhandled tweets are queued
+DEFAULT_LOW_WATERMARK = 3
+# Never read the timeline more often than this, in seconds
+DEFAULT_MIN_INTERVAL = 60.0
+# Handled tweet IDs remembered for deduplication
+DEFAULT_SEEN_CAPACITY = 5000
+
+
+class TimelineQueue:
+    """
+    Bounded queue of timeline tweets the agent has not handled yet.
+
+    Consumers pop from the front without ever touching the network. When the
+    queue runs low a background thread reads the timeline again, asking only
+    for tweets newer than the last one seen (since_id) and dropping any tweet
+    that is already queued or was handled before.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Optional[str]], Optional[List[Dict[str, Any]]]],
+        capacity: int = DEFAULT_CAPACITY,
+        low_watermark: int = DEFAULT_LOW_WATERMARK,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        seen_capacity: int = DEFAULT_SEEN_CAPACITY,
+        on_change: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            fetch: Called with the newest tweet ID seen so far (or None), returns tweets newest first
+            on_change: Called after tweets are queued or handled, e.g. to persist the queue
+        """
+        self._fetch = fetch
+        self.low_watermark = low_watermark
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._tweets: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._queued_ids = set()
+        # Persisted with the agent state through dump(), so the index itself has no file
+        self._seen = SeenIndex(capacity=seen_capacity)
+        self._since_id: Optional[str] = None
+        self._last_fetch = 0.0
+        self._has_fetched = False
+        self._fetching = False
+        self._on_change = on_change
+
+    def __len__(self) -> int:
+        return len(self._tweets)
+
+    @property
+    def has_fetched(self) -> bool:
+        return self._has_fetched
+
+    @property
+    def since_id(self) -> Optional[str]:
+        return self._since_id
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            try:
+                self._on_change()
+            except Exception as e:
+                logger.warning(f"Timeline change callback failed: {e}")
+
+    def extend(self, tweets: Iterable[Dict[str, Any]]) -> int:
+        """Queue tweets that are neither queued nor handled yet, returns how many were added"""
+        added = 0
+        with self._lock:
+            for tweet in tweets or []:
+                tweet_id = str(tweet.get("id", ""))
+                if not tweet_id or tweet_id in self._queued_ids or tweet_id in self._seen:
+                    continue
+                if len(self._tweets) == self._tweets.maxlen:
+                    dropped = self._tweets.popleft()
+                    self._queued_ids.discard(str(dropped.get("id", "")))
+                self._tweets.append(tweet)
+                self._queued_ids.add(tweet_id)
+                added += 1
+        if added:
+            self._changed()
+        return added
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        """Next unhandled tweet, or None when the queue is empty. Triggers a refill when running low"""
+        with self._lock:
+            tweet = self._tweets.popleft() if self._tweets else None
+            if tweet is not None:
+                tweet_id = str(tweet.get("id", ""))
+                self._queued_ids.discard(tweet_id)
+                self._seen.add(tweet_id)
+        if tweet is not None:
+            self._changed()
+        self.maybe_refill()
+        return tweet
+
+    def refill(self) -> int:
+        """Read new timeline tweets now, returns how many were queued"""
+        self._last_fetch = time.monotonic()
+        self._has_fetched = True
+        tweets = self._fetch(self._since_id) or []
+        if tweets:
+            newest = max((str(tweet["id"]) for tweet in tweets if tweet.get("id")), key=int, default=None)
+            with self._lock:
+                if newest and (self._since_id is None or int(newest) > int(self._since_id)):
+                    self._since_id = newest
+        added = self.extend(tweets)
+        logger.debug(f"Timeline refill queued {added} new tweets")
+        return added
+
+    def dump(self) -> Dict[str, Any]:
+        """Queued tweets, handled IDs and cursor, for restoring after a restart"""
+        with self._lock:
+            return {
+                "tweets": list(self._tweets),
+                "seen": list(self._seen),
+                "since_id": self._since_id,
+                "fetched_ago": time.monotonic() - self._last_fetch if self._has_fetched else None
+            }
+
+    def restore(self, data: Optional[Dict[str, Any]]) -> None:
+        """Resume from dump() output, so a restarted agent neither refetches nor re-handles tweets"""
+        if not data:
+            return
+        with self._lock:
+            self._seen.update(data.get("seen", [])[-self._seen.capacity:])
+            self._since_id = data.get("since_id")
+            fetched_ago = data.get("fetched_ago")
+            if fetched_ago is not None:
+                self._has_fetched = True
+                self._last_fetch = time.monotonic() - fetched_ago
+        self.extend(data.get("tweets", []))
+
+    def _background_refill(self) -> None:
+        try:
+            self.refill()
+        except Exception as e:
+            logger.warning(f"Timeline refill failed: {e}")
+        finally:
+            with self._lock:
+                self._fetching = False
+
+    def maybe_refill(self) -> bool:
+        """Start a background refill if the queue is low, returns True if one was started"""
+        with self._lock:
+            if (
+                self._fetching
+                or len(self._tweets) >= self.low_watermark
+                or time.monotonic() - self._last_fetch < self.min_interval
+            ):
+                return False
+            self._fetching = True
+        threading.Thread(target=self._background_refill, daemon=True).start()
+        return True
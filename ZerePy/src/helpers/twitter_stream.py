@@ -0,0 +1,133 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("helpers.twitter_stream")
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 100
+# How long the reader waits for room in a full queue before dropping a tweet
+DEFAULT_PUT_TIMEOUT = 30.0
+
+# Reconnect backoff following Twitter's filtered stream guidance
+NETWORK_BACKOFF = (0.25, 16.0)
+HTTP_BACKOFF = (5.0, 320.0)
+RATE_LIMIT_BACKOFF = (60.0, 960.0)
+
+
+def _backoff_bounds(error: Exception):
+    message = str(error)
+    if "429" in message:
+        return RATE_LIMIT_BACKOFF
+    if "status" in message:
+        return HTTP_BACKOFF
+    return NETWORK_BACKOFF
+
+
+class StreamConsumer:
+    """
+    Long-running consumer of a Twitter filtered stream.
+
+    A reader thread keeps the stream connected, reconnecting with backoff
+    whenever it drops, and puts every tweet on a bounded queue. When the
+    workers fall behind the reader blocks on the full queue (backpressure) and
+    only drops a tweet after put_timeout. A pool of workers takes tweets off
+    the queue and passes each one to the handler.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Iterator[Dict[str, Any]]],
+        handler: Callable[[Dict[str, Any]], Any],
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        put_timeout: float = DEFAULT_PUT_TIMEOUT,
+        name: str = "twitter-stream"
+    ):
+        """
+        Args:
+            connect: Opens the stream and yields tweets until it disconnects
+            handler: Called on a worker thread for every received tweet
+        """
+        self._connect = connect
+        self._handler = handler
+        self._worker_count = workers
+        self._put_timeout = put_timeout
+        self.name = name
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._stats = {"received": 0, "processed": 0, "failed": 0, "dropped": 0, "reconnects": 0}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads) and not self._stop.is_set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._read, name=f"{self.name}-reader", daemon=True)]
+        self._threads.extend(
+            threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True)
+            for i in range(self._worker_count)
+        )
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.name} with {self._worker_count} workers")
+
+    def stop(self) -> None:
+        """Stop reading and processing. The reader exits at the next tweet or keep-alive"""
+        self._stop.set()
+
+    def _read(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                for tweet in self._connect():
+                    if self._stop.is_set():
+                        return
+                    failures = 0
+                    self._count("received")
+                    try:
+                        self._queue.put(tweet, timeout=self._put_timeout)
+                    except queue.Full:
+                        logger.warning(f"{self.name} queue full, dropping tweet {tweet.get('id')}")
+                        self._count("dropped")
+                # A clean end of stream still means the connection dropped
+                raise ConnectionError("stream closed by server")
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                low, high = _backoff_bounds(e)
+                delay = min(low * (2 ** failures), high)
+                failures += 1
+                self._count("reconnects")
+                logger.warning(f"{self.name} disconnected ({e}), reconnecting in {delay:.2f}s")
+                self._stop.wait(delay)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                tweet = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._handler(tweet)
+                self._count("processed")
+            except Exception as e:
+                self._count("failed")
+                logger.error(f"{self.name} failed to handle tweet {tweet.get('id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats, queued=self._queue.qsize(), running=self.running)
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.prompts import POST_TWEET_PROMPT
+
+logger = logging.getLogger("prompt_builder")
+
+DEFAULT_PROMPT_DIR = Path.home() / ".zerepy" / "prompts"
+# Seconds before example-account tweets are fetched again, in the background
+DEFAULT_EXAMPLES_TTL = float(os.getenv("ZEREPY_PROMPT_EXAMPLES_TTL", str(6 * 60 * 60)))
+
+
+class SystemPromptBuilder:
+    """
+    Builds and caches an agent's system prompt.
+
+    The bio/traits/examples part is assembled once. Tweets of example
+    accounts are fetched concurrently and persisted per agent, so a restarted
+    agent has its full prompt immediately; once older than the TTL they are
+    refreshed on a background thread while the cached prompt keeps being served.
+    """
+
+    def __init__(
+        self,
+        agent_name: str,
+        bio: List[str],
+        traits: List[str],
+        examples: List[str],
+        example_accounts: List[str],
+        connection_manager,
+        ttl: float = DEFAULT_EXAMPLES_TTL,
+        prompt_dir: Path = DEFAULT_PROMPT_DIR
+    ):
+        self.agent_name = agent_name
+        self.bio = bio
+        self.traits = traits
+        self.examples = examples
+        self.example_accounts = list(example_accounts or [])
+        self.connection_manager = connection_manager
+        self.ttl = ttl
+        self.path = Path(prompt_dir) / f"{agent_name}.json"
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._built = threading.Event()
+        self._example_tweets: Optional[Dict[str, List[str]]] = None
+        self._fetched_at = 0.0
+        self._prompt: Optional[str] = None
+        self._post_tweet_prompt: Optional[str] = None
+        self._fingerprint = hashlib.sha256(
+            json.dumps([bio, traits, examples, self.example_accounts]).encode("utf-8")
+        ).hexdigest()
+        self._load()
+
+    def _load(self) -> None:
+        """Reuse persisted example tweets when the agent's prompt configuration is unchanged"""
+        if not self.example_accounts:
+            return
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            if saved.get("fingerprint") == self._fingerprint:
+                self._example_tweets = saved["example_tweets"]
+                self._fetched_at = saved["fetched_at"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable prompt cache {self.path}: {e}")
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "fingerprint": self._fingerprint,
+                    "fetched_at": self._fetched_at,
+                    "example_tweets": self._example_tweets,
+                    "system_prompt": self._prompt
+                }, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist prompt cache: {e}")
+
+    def _fetch_account(self, account: str) -> List[str]:
+        tweets = self.connection_manager.perform_action(
+            connection_name="twitter",
+            action_name="get-latest-tweets",
+            params=[account]
+        )
+        return [tweet["text"] for tweet in tweets or []]
+
+    def _fetch_example_tweets(self) -> Dict[str, List[str]]:
+        """Fetch every example account at once instead of one after another"""
+        with ThreadPoolExecutor(max_workers=min(8, len(self.example_accounts))) as pool:
+            results = pool.map(self._fetch_account, self.example_accounts)
+            return dict(zip(self.example_accounts, results))
+
+    def _assemble(self) -> str:
+        prompt_parts = []
+        prompt_parts.extend(self.bio)
+
+        if self.traits:
+            prompt_parts.append("\nYour key traits are:")
+            prompt_parts.extend(f"- {trait}" for trait in self.traits)
+
+        if self.examples or self.example_accounts:
+            prompt_parts.append("\nHere are some examples of your style (Please avoid repeating any of these):")
+            if self.examples:
+                prompt_parts.extend(f"- {example}" for example in self.examples)
+
+            for account in self.example_accounts:
+                prompt_parts.extend(f"- {text}" for text in (self._example_tweets or {}).get(account, []))
+
+        return "\n".join(prompt_parts)
+
+    def refresh(self) -> str:
+        """Fetch example tweets now and rebuild the prompt"""
+        example_tweets = self._fetch_example_tweets() if self.example_accounts else {}
+        with self._lock:
+            # Keep the previous tweets of accounts that returned nothing this time
+            previous = self._example_tweets or {}
+            self._example_tweets = {
+                account: tweets or previous.get(account, [])
+                for account, tweets in example_tweets.items()
+            }
+            self._fetched_at = time.time()
+            self._prompt = self._assemble()
+            if self.example_accounts:
+                self._save()
+            self._built.set()
+            return self._prompt
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Refreshing example tweets failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _start_background_refresh(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def warm(self) -> None:
+        """Build the prompt in the background so the first action does not wait for it"""
+        if self._prompt is None and self._example_tweets is None and self.example_accounts:
+            self._start_background_refresh()
+
+    def get(self) -> str:
+        """The system prompt, built on first use and refreshed in the background once stale"""
+        with self._lock:
+            if self._prompt is None and (self._example_tweets is not None or not self.example_accounts):
+                self._prompt = self._assemble()
+            prompt = self._prompt
+            warming = self._refreshing
+
+        if prompt is None and warming and self._built.wait(timeout=30):
+            prompt = self._prompt
+        if prompt is None:
+            return self.refresh()
+        if self.example_accounts and time.time() - self._fetched_at > self.ttl:
+            self._start_background_refresh()
+        return prompt
+
+    @property
+    def post_tweet_prompt(self) -> str:
+        """POST_TWEET_PROMPT only depends on the agent name, so it is formatted once"""
+        if self._post_tweet_prompt is None:
+            self._post_tweet_prompt = POST_TWEET_PROMPT.format(agent_name=self.agent_name)
+        return self._post_tweet_prompt
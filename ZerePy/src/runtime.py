@@ -0,0 +1,116 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger("runtime")
+
+# Worker threads shared by every blocking connection call made from the event loop
+DEFAULT_MAX_WORKERS = int(os.getenv("ZEREPY_MAX_WORKERS", "32"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the process-wide thread pool used for sync fallbacks"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS,
+                thread_name_prefix="zerepy-worker"
+            )
+        return _executor
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking callable on the shared thread pool without blocking the event loop.
+    Context variables of the caller are visible inside the callable."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), lambda: context.run(func, *args, **kwargs))
+
+
+async def iterate_sync(iterable: Iterable) -> AsyncIterator[Any]:
+    """Consume a blocking iterator (e.g. a token stream) from the event loop, one item per pool hop"""
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await run_sync(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the shared thread pool, a new one is created on next use"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+class AgentRuntime:
+    """
+    Drives any number of agents concurrently in a single event loop.
+
+    Each agent runs its own run_async() coroutine as an asyncio task. Blocking
+    connection calls and sync action handlers are dispatched to the shared
+    thread pool, so one agent waiting on the network never stalls the others.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._stop_events: Dict[str, asyncio.Event] = {}
+
+    def start(self, agent, key: Optional[str] = None) -> asyncio.Task:
+        """Schedule an agent on the running event loop"""
+        key = key or agent.name
+        if self.is_running(key):
+            raise ValueError(f"Agent {key} already running")
+
+        stop_event = asyncio.Event()
+        task = asyncio.get_running_loop().create_task(
+            agent.run_async(stop_event), name=f"agent:{key}"
+        )
+        task.add_done_callback(lambda t, key=key: self._on_done(key, t))
+        self.tasks[key] = task
+        self._stop_events[key] = stop_event
+        return task
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self.tasks.get(key) is task:
+            self.tasks.pop(key, None)
+            self._stop_events.pop(key, None)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Agent {key} stopped with an error: {task.exception()}")
+
+    def is_running(self, key: str) -> bool:
+        task = self.tasks.get(key)
+        return task is not None and not task.done()
+
+    async def stop(self, key: str, timeout: float = 5) -> None:
+        """Ask an agent to stop after its current step, cancelling it if it does not finish in time"""
+        task = self.tasks.get(key)
+        if task is None:
+            return
+        self._stop_events[key].set()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        except Exception:
+            pass
+
+    async def stop_all(self, timeout: float = 5) -> None:
+        await asyncio.gather(*(self.stop(key, timeout) for key in list(self.tasks)))
+
+    async def wait(self) -> None:
+        """Wait until every running agent has finished"""
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
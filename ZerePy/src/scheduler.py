@@ -0,0 +1,114 @@
+import heapq
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("scheduler")
+
+# Seconds a task is held back after it reports failure, so other ready tasks run instead
+DEFAULT_FAILURE_BACKOFF = 60.0
+
+
+class TaskScheduler:
+    """
+    Deadline-aware selection of the agent's loop tasks.
+
+    Every task sits in a min-heap keyed by the moment it next becomes
+    eligible (tweet interval elapsed, rate-limit window reset, ...). Tasks
+    whose time has come form the ready set, and one of them is drawn by
+    weight. When nothing is ready the caller learns exactly how long to
+    sleep instead of running an action that would only decline.
+
+    Heap entries are lower bounds: a task's eligibility only moves later as
+    actions run, so an entry is re-checked when it reaches the top and pushed
+    back if its task turned out to need more time.
+    """
+
+    def __init__(
+        self,
+        tasks: List[dict],
+        eligible_in: Callable[[str], float],
+        weights: Callable[[], List[float]],
+        failure_backoff: float = DEFAULT_FAILURE_BACKOFF
+    ):
+        """
+        Args:
+            tasks: The agent's task entries ({"name": ..., "weight": ...})
+            eligible_in: Seconds until a task can do useful work, 0 when it can run now
+            weights: Current weight of every task, in the order of tasks
+        """
+        self.tasks = tasks
+        self._eligible_in = eligible_in
+        self._weights = weights
+        self.failure_backoff = failure_backoff
+        self._not_before: Dict[str, float] = {}
+        # (eligible_at, task index)
+        self._heap: List[Tuple[float, int]] = []
+        now = time.monotonic()
+        for index, task in enumerate(tasks):
+            heapq.heappush(self._heap, (now, index))
+
+    def _eligible_at(self, index: int, now: float) -> float:
+        name = self.tasks[index]["name"]
+        return max(now + self._eligible_in(name), self._not_before.get(name, 0.0))
+
+    def _collect_ready(self, now: float) -> List[int]:
+        """Pop every task that is eligible now, re-queueing entries that were optimistic"""
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            _, index = heapq.heappop(self._heap)
+            eligible_at = self._eligible_at(index, now)
+            if eligible_at > now:
+                heapq.heappush(self._heap, (eligible_at, index))
+            else:
+                ready.append(index)
+        return ready
+
+    def next_task(self) -> Tuple[Optional[int], float]:
+        """
+        Index (into tasks) of the task to run now and 0, or None and the seconds
+        until a task becomes eligible. Pass the index to complete() once it has run.
+        """
+        now = time.monotonic()
+        ready = self._collect_ready(now)
+        weights = self._weights()
+        candidates = [index for index in ready if weights[index] > 0]
+
+        chosen = random.choices(candidates, weights=[weights[i] for i in candidates], k=1)[0] if candidates else None
+        for index in ready:
+            if index != chosen:
+                # Weights can change with the hour, so zero-weight tasks are looked at again later
+                heapq.heappush(self._heap, (now if weights[index] > 0 else now + self.failure_backoff, index))
+        if chosen is not None:
+            return chosen, 0.0
+
+        return None, self.time_until_next()
+
+    def complete(self, index: int, success: bool) -> None:
+        """Re-queue the task whose index was returned by next_task once it has run"""
+        # By index, two identical task entries are still two heap entries
+        name = self.tasks[index]["name"]
+        now = time.monotonic()
+        if not success:
+            self._not_before[name] = now + self.failure_backoff
+        heapq.heappush(self._heap, (self._eligible_at(index, now), index))
+
+    def time_until_next(self) -> float:
+        """Seconds until the earliest queued task becomes eligible, per the current heap"""
+        now = time.monotonic()
+        while self._heap:
+            eligible_at, index = self._heap[0]
+            actual = self._eligible_at(index, now)
+            if actual <= eligible_at:
+                return max(0.0, eligible_at - now)
+            heapq.heapreplace(self._heap, (actual, index))
+        return 0.0
+
+    def snapshot(self) -> List[Dict[str, float]]:
+        now = time.monotonic()
+        return sorted(
+            ({"task": self.tasks[index]["name"], "eligible_in": max(0.0, eligible_at - now)}
+             for eligible_at, index in self._heap),
+            key=lambda entry: entry["eligible_in"]
+        )
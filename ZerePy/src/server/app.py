@@ -1,21 +1,22 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel,Field
 from typing import Optional, List, Dict, Any
 import logging
 import asyncio
-import signal
-import threading
 from pathlib import Path
-from src.cli import ZerePyCLI
+from src.agent import ZerePyAgent
+from src.agent_catalog import get_agent_catalog
+from src.runtime import AgentRuntime, iterate_sync, run_sync
+from src.helpers import http_pool
+from src.helpers.credentials import get_credentials_store
+from src.helpers.metrics import get_metrics
 import os, json
-from dotenv import set_key
 # import atexit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("server/app")
-AGENT_FOLDER = "C:/Users/gouta/Documents/Projects/Plutus-ZerePy/plutus/ZerePy/agents"
-# os.makedirs(AGENT_FOLDER, exist_ok=True)
 
 class AgentConfig(BaseModel):
     name: str = Field(..., description="Unique name of the agent")
@@ -41,54 +42,86 @@ class ConfigureRequest(BaseModel):
     params: Optional[Dict[str, Any]] = {}
 
 class ServerState:
-    """Simple state management for the server"""
+    """Hosts any number of loaded agents, each scheduled as a task on a shared AgentRuntime"""
     def __init__(self):
-        self.cli = ZerePyCLI()
-        self.agent_running = False
-        self.agent_task = None
-        self._stop_event = threading.Event()
+        self.agents: Dict[str, ZerePyAgent] = {}
+        # Agent targeted by the single-agent endpoints (/agent/*, /connections/*, /chat)
+        self.current_agent: Optional[str] = None
+        self.runtime = AgentRuntime()
 
-    def _run_agent_loop(self):
-        """Run agent loop in a separate thread"""
+    @property
+    def agent(self) -> Optional[ZerePyAgent]:
+        return self.agents.get(self.current_agent) if self.current_agent else None
+
+    @property
+    def agent_running(self) -> bool:
+        return self.current_agent is not None and self.runtime.is_running(self.current_agent)
+
+    def get_agent(self, name: Optional[str] = None) -> ZerePyAgent:
+        name = name or self.current_agent
+        if not name or name not in self.agents:
+            raise ValueError(f"Agent {name} not loaded" if name else "No agent loaded")
+        return self.agents[name]
+
+    async def load_agent(self, name: str) -> ZerePyAgent:
+        """Load (or reload) an agent definition and make it the current agent"""
+        if self.runtime.is_running(name):
+            raise ValueError("Agent already running")
+
+        # Close first, the new agent restores from the state the previous one persists on close
+        previous = self.agents.pop(name, None)
+        if previous is not None:
+            await run_sync(previous.close)
         try:
-            log_once = False
-            while not self._stop_event.is_set():
-                if self.cli.agent:
-                    try:
-                        if not log_once:
-                            logger.info("Loop logic not implemented")
-                            log_once = True
-
-                    except Exception as e:
-                        logger.error(f"Error in agent action: {e}")
-                        if self._stop_event.wait(timeout=30):
-                            break
-        except Exception as e:
-            logger.error(f"Error in agent loop thread: {e}")
-        finally:
-            self.agent_running = False
-            logger.info("Agent loop stopped")
-
-    async def start_agent_loop(self):
-        """Start the agent loop in background thread"""
-        if not self.cli.agent:
-            raise ValueError("No agent loaded")
-        
-        if self.agent_running:
+            agent = await run_sync(ZerePyAgent, name)
+        except Exception:
+            if previous is not None:
+                try:
+                    self.agents[name] = await run_sync(ZerePyAgent, name, previous.definition)
+                except Exception as e:
+                    logger.error(f"Could not reload previous definition of agent {name}: {e}")
+                    if self.current_agent == name:
+                        self.current_agent = next(iter(self.agents), None)
+            raise
+        self.agents[name] = agent
+        self.current_agent = name
+        return agent
+
+    async def unload_agent(self, name: str) -> None:
+        self.get_agent(name)
+        await self.runtime.stop(name)
+        agent = self.agents.pop(name)
+        await run_sync(agent.close)
+        if self.current_agent == name:
+            self.current_agent = next(iter(self.agents), None)
+
+    async def start_agent_loop(self, name: Optional[str] = None):
+        """Schedule the agent loop on the server's event loop"""
+        agent = self.get_agent(name)
+        name = name or self.current_agent
+
+        if self.runtime.is_running(name):
             raise ValueError("Agent already running")
 
-        self.agent_running = True
-        self._stop_event.clear()
-        self.agent_task = threading.Thread(target=self._run_agent_loop)
-        self.agent_task.start()
+        self.runtime.start(agent, key=name)
 
-    async def stop_agent_loop(self):
+    async def stop_agent_loop(self, name: Optional[str] = None):
         """Stop the agent loop"""
-        if self.agent_running:
-            self._stop_event.set()
-            if self.agent_task:
-                self.agent_task.join(timeout=5)
-            self.agent_running = False
+        name = name or self.current_agent
+        if name:
+            await self.runtime.stop(name)
+
+    def agent_status(self, name: str) -> Dict[str, Any]:
+        agent = self.get_agent(name)
+        return {
+            "agent": name,
+            "name": agent.name,
+            "running": self.runtime.is_running(name),
+            "current": name == self.current_agent,
+            "model_provider": getattr(agent, "model_provider", None),
+            "connections": list(agent.connection_manager.connections)
+        }
+
 # Auto-deletion mechanism 
 # def auto_delete_old_agents(threshold_seconds: int = 7 * 24 * 60 * 60):
     # """
@@ -96,8 +129,8 @@ class ServerState:
     # Default threshold is 1 week (7 days).
     # """
     # now = time.time()
-    # for filename in os.listdir(AGENT_FOLDER):
-        # file_path = os.path.join(AGENT_FOLDER, filename)
+    # for filename in os.listdir(get_agent_catalog().directory):
+        # file_path = os.path.join(get_agent_catalog().directory, filename)
         # if os.path.isfile(file_path):
             # file_age = now - os.path.getmtime(file_path)
             # if file_age > threshold_seconds:
@@ -123,40 +156,69 @@ class ZerePyServer:
     )
 
         self.state = ServerState()
+        # Agent definitions are indexed once and kept current by watching the directory
+        self.catalog = get_agent_catalog()
+        self.catalog.start_watching()
         self.setup_routes()
 
     def setup_routes(self):
+        @self.app.on_event("shutdown")
+        async def shutdown():
+            await self.state.runtime.stop_all()
+            for agent in self.state.agents.values():
+                await run_sync(agent.close)
+            self.catalog.stop_watching()
+
         @self.app.get("/")
         async def root():
             """Server status endpoint"""
             return {
                 "status": "running",
-                "agent": self.state.cli.agent.name if self.state.cli.agent else None,
-                "agent_running": self.state.agent_running
+                "agent": self.state.agent.name if self.state.agent else None,
+                "agent_running": self.state.agent_running,
+                "loaded_agents": list(self.state.agents),
+                "running_agents": list(self.state.runtime.tasks)
             }
         
+        @self.app.get("/http/stats")
+        async def http_stats():
+            """Per-host statistics of the shared HTTP connection pool"""
+            return {"hosts": http_pool.pool_stats()}
+
+        @self.app.get("/metrics", response_class=PlainTextResponse)
+        async def metrics():
+            """Per-action latency, outcome, payload size and in-flight metrics in the Prometheus text format"""
+            return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+        @self.app.get("/llm/cache")
+        async def llm_cache_stats():
+            """Hit-rate statistics of each loaded agent's LLM response cache"""
+            return {
+                name: agent.connection_manager.llm_cache.stats()
+                for name, agent in self.state.agents.items()
+                if agent.connection_manager.llm_cache is not None
+            }
+
         @self.app.post("/agents/create")
         async def create_agent(agent_config: AgentConfig):
-            # Use the name from the JSON to create the file name.
-            file_name = f"{agent_config.name}.json"
-            agent_path = os.path.join(AGENT_FOLDER, file_name)
-            if os.path.exists(agent_path):
-                raise HTTPException(status_code=400, detail="Agent already exists")
             try:
-                with open(agent_path, "w") as f:
-                    json.dump(agent_config.model_dump(), f, indent=2)
+                await run_sync(self.catalog.save, agent_config.model_dump())
+            except FileExistsError:
+                raise HTTPException(status_code=400, detail="Agent already exists")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error saving agent: {str(e)}")
             return {"message": "Agent created successfully", "agent": agent_config.dict()}
         
         @self.app.delete("/agents/{agent_name}")
         async def delete_agent(agent_name: str):
-            file_name = f"{agent_name}.json"
-            agent_path = os.path.join(AGENT_FOLDER, file_name)
-            if not os.path.exists(agent_path):
-                raise HTTPException(status_code=404, detail="Agent not found")
             try:
-                os.remove(agent_path)
+                await run_sync(self.catalog.delete, agent_name)
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error deleting agent: {str(e)}")
             return {"message": "Agent deleted successfully", "agent": agent_name}
@@ -165,13 +227,7 @@ class ZerePyServer:
         async def list_agents():
             """List available agents"""
             try:
-                agents = []
-                agents_dir = Path("agents")
-                if agents_dir.exists():
-                    for agent_file in agents_dir.glob("*.json"):
-                        if agent_file.stem != "general":
-                            agents.append(agent_file.stem)
-                return {"agents": agents}
+                return {"agents": self.catalog.names()}
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
@@ -179,7 +235,7 @@ class ZerePyServer:
         async def load_agent(name: str):
             """Load a specific agent"""
             try:
-                self.state.cli._load_agent_from_file(name)
+                await self.state.load_agent(name)
                 return {
                     "status": "success",
                     "agent": name
@@ -187,17 +243,57 @@ class ZerePyServer:
             except Exception as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
+        @self.app.get("/agents/loaded")
+        async def list_loaded_agents():
+            """Status of every agent hosted by this server"""
+            return {"agents": [self.state.agent_status(name) for name in self.state.agents]}
+
+        @self.app.post("/agents/{name}/unload")
+        async def unload_agent(name: str):
+            """Stop an agent if it is running and remove it from the server"""
+            try:
+                await self.state.unload_agent(name)
+                return {"status": "success", "agent": name}
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.get("/agents/{name}/status")
+        async def agent_status(name: str):
+            """Status of a single hosted agent"""
+            try:
+                return self.state.agent_status(name)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+
+        @self.app.post("/agents/{name}/start")
+        async def start_named_agent(name: str):
+            """Start the loop of a specific hosted agent"""
+            try:
+                await self.state.start_agent_loop(name)
+                return {"status": "success", "message": f"Agent {name} loop started"}
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.post("/agents/{name}/stop")
+        async def stop_named_agent(name: str):
+            """Stop the loop of a specific hosted agent"""
+            try:
+                await self.state.stop_agent_loop(name)
+                return {"status": "success", "message": f"Agent {name} loop stopped"}
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
         @self.app.get("/connections")
         async def list_connections():
             """List all available connections"""
-            if not self.state.cli.agent:
+            if not self.state.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
             
             try:
                 connections = {}
-                for name, conn in self.state.cli.agent.connection_manager.connections.items():
+                for name, conn in self.state.agent.connection_manager.connections.items():
                     connections[name] = {
-                        "configured": conn.is_configured(),
+                        "configured": conn.is_configured_cached(),
                         "is_llm_provider": conn.is_llm_provider
                     }
                 return {"connections": connections}
@@ -207,12 +303,11 @@ class ZerePyServer:
         @self.app.post("/agent/action")
         async def agent_action(action_request: ActionRequest):
             """Execute a single agent action"""
-            if not self.state.cli.agent:
+            if not self.state.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
             
             try:
-                result = await asyncio.to_thread(
-                    self.state.cli.agent.perform_action,
+                result = await self.state.agent.perform_action_async(
                     connection=action_request.connection,
                     action=action_request.action,
                     params=action_request.params
@@ -224,7 +319,7 @@ class ZerePyServer:
         @self.app.post("/agent/start")
         async def start_agent():
             """Start the agent loop"""
-            if not self.state.cli.agent:
+            if not self.state.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
             
             try:
@@ -244,19 +339,17 @@ class ZerePyServer:
         
         @self.app.post("/connections/{name}/configure")
         async def configure_connection(name: str, config: ConfigureRequest):
-            """Save multiple environment variables from JSON payload to .env using python-dotenv's set_key."""
-            if not self.state.cli.agent:
+            """Save multiple environment variables from JSON payload to .env in one write, live connections are notified."""
+            if not self.state.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
             
             try:
-                connection = self.state.cli.agent.connection_manager.connections.get(name)
+                connection = self.state.agent.connection_manager.connections.get(name)
                 if not connection:
                     raise HTTPException(status_code=404, detail=f"Connection {name} not found")
                 
-                # Loop through each key-value pair and update the .env file.
-                for key, value in config.params.items():
-                    # Using QuoteMode.ALWAYS ensures the value is enclosed in quotes.
-                    set_key(".env", key, value, quote_mode="always")
+                # All keys land in a single atomic rewrite of .env, values are always quoted
+                await run_sync(get_credentials_store().update, config.params)
                 
                 return {
                     "status": "success",
@@ -275,10 +368,10 @@ class ZerePyServer:
             """
             try:
                 # Retrieve the connection object using the provided name
-                connection = self.state.cli.agent.connection_manager.connections[connection_name]
+                connection = self.state.agent.connection_manager.connections[connection_name]
         
                 # Check if the connection is configured
-                configured = connection.is_configured()
+                configured = connection.is_configured_cached()
                 if configured:
                     logger.info(
                         f"\n✅ {connection_name} is configured. You can use any of its actions."
@@ -326,17 +419,17 @@ class ZerePyServer:
         @self.app.get("/connections/{name}/status")
         async def connection_status(name: str):
             """Get configuration status of a connection"""
-            if not self.state.cli.agent:
+            if not self.state.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
                 
             try:
-                connection = self.state.cli.agent.connection_manager.connections.get(name)
+                connection = self.state.agent.connection_manager.connections.get(name)
                 if not connection:
                     raise HTTPException(status_code=404, detail=f"Connection {name} not found")
                     
                 return {
                     "name": name,
-                    "configured": connection.is_configured(verbose=True),
+                    "configured": connection.is_configured_cached(verbose=True),
                     "is_llm_provider": connection.is_llm_provider
                 }
                 
@@ -345,13 +438,17 @@ class ZerePyServer:
 
         @self.app.websocket("/chat")
         async def chat_websocket(websocket: WebSocket):
-            if not self.state.cli.agent:
+            # With ?stream=true each reply is sent as JSON frames: {"type": "chunk", "content": ...}
+            # as tokens arrive, then {"type": "end"}. Otherwise one text frame per reply.
+            stream = websocket.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+            if not self.state.agent:
                  await websocket.close(code=4000, reason="No agent loaded")
                  return
             
             # Ensure the agent has its LLM provider set up
-            if not self.state.cli.agent.is_llm_set:
-                 self.state.cli.agent._setup_llm_provider()
+            if not self.state.agent.is_llm_set:
+                 await run_sync(self.state.agent._setup_llm_provider)
             
             try:
                  await websocket.accept()
@@ -362,15 +459,24 @@ class ZerePyServer:
                      if message.lower() == 'exit':
                          break
                      
+                     if stream:
+                         async for chunk in iterate_sync(self.state.agent.prompt_llm_stream(message)):
+                             await websocket.send_json({"type": "chunk", "content": chunk})
+                         await websocket.send_json({"type": "end"})
+                         continue
+
                      # Run the synchronous prompt_llm call in a separate thread
-                     response = await asyncio.to_thread(self.state.cli.agent.prompt_llm, message)
+                     response = await asyncio.to_thread(self.state.agent.prompt_llm, message)
                      
                      await websocket.send_text(response)
                      
             except Exception as e:
                  logger.error(f"Chat error: {e}")
                  # Optionally, send an error message back to the client
-                 await websocket.send_text(f"Error: {e}")
+                 if stream:
+                     await websocket.send_json({"type": "error", "content": str(e)})
+                 else:
+                     await websocket.send_text(f"Error: {e}")
             finally:
                  await websocket.close()
 
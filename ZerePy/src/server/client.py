@@ -47,4 +47,25 @@ class ZerePyClient:
 
     def stop_agent(self) -> Dict[str, Any]:
         """Stop the agent loop"""
-        return self._make_request("POST", "/agent/stop")
\ No newline at end of file
+        return self._make_request("POST", "/agent/stop")
+
+    def list_loaded_agents(self) -> List[Dict[str, Any]]:
+        """Status of every agent hosted by the server"""
+        response = self._make_request("GET", "/agents/loaded")
+        return response.get("agents", [])
+
+    def get_agent_status(self, agent_name: str) -> Dict[str, Any]:
+        """Get the status of a hosted agent"""
+        return self._make_request("GET", f"/agents/{agent_name}/status")
+
+    def start_named_agent(self, agent_name: str) -> Dict[str, Any]:
+        """Start the loop of a specific hosted agent"""
+        return self._make_request("POST", f"/agents/{agent_name}/start")
+
+    def stop_named_agent(self, agent_name: str) -> Dict[str, Any]:
+        """Stop the loop of a specific hosted agent"""
+        return self._make_request("POST", f"/agents/{agent_name}/stop")
+
+    def unload_agent(self, agent_name: str) -> Dict[str, Any]:
+        """Stop and remove a hosted agent"""
+        return self._make_request("POST", f"/agents/{agent_name}/unload")
\ No newline at end of file
@@ -0,0 +1,255 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Type
+
+logger = logging.getLogger("state_store")
+
+DEFAULT_STATE_DIR = Path.home() / ".zerepy" / "state"
+# Seconds between write-behind flushes of changed keys
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Seconds between full snapshots, which also capture registered providers
+DEFAULT_SNAPSHOT_INTERVAL = 300.0
+# Keys that are cheap to rebuild and could go stale, they are never persisted
+DEFAULT_TRANSIENT_KEYS = ("room_info",)
+
+
+class StateBackend(ABC):
+    """Where agent state is persisted. Values are JSON strings keyed by state key"""
+
+    @abstractmethod
+    def load(self) -> Dict[str, str]:
+        """Every stored key and value, read at once"""
+        pass
+
+    @abstractmethod
+    def write(self, items: Dict[str, str], deleted: Iterable[str]) -> None:
+        """Store and delete keys in one batch"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """Keeps nothing across restarts, for agents that opt out of persistence"""
+
+    def load(self) -> Dict[str, str]:
+        return {}
+
+    def write(self, items: Dict[str, str], deleted: Iterable[str]) -> None:
+        pass
+
+
+class SQLiteStateBackend(StateBackend):
+    """One key/value table in a SQLite file, written in a single transaction per batch"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS agent_state (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+    def load(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._db.execute("SELECT key, value FROM agent_state").fetchall())
+
+    def write(self, items: Dict[str, str], deleted: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO agent_state (key, value) VALUES (?, ?)", list(items.items())
+            )
+            self._db.executemany("DELETE FROM agent_state WHERE key = ?", [(key,) for key in deleted])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+STATE_BACKENDS: Dict[str, Type[StateBackend]] = {
+    "sqlite": SQLiteStateBackend,
+    "memory": MemoryStateBackend,
+}
+
+
+class AgentState(MutableMapping):
+    """
+    The agent's state dict, persisted behind its back.
+
+    Reads and writes hit an in-memory dict. Changed keys are written to the
+    backend in batches by a background thread (write-behind), so actions never
+    wait on disk. Every snapshot_interval, and on close, the whole state is
+    written, including values produced by registered providers (e.g. the
+    timeline queue), which also catches in-place mutations of stored values.
+    Restoring at load is a single read of the backend.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        transient_keys: Iterable[str] = DEFAULT_TRANSIENT_KEYS
+    ):
+        self._backend = backend or MemoryStateBackend()
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.transient_keys = set(transient_keys)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._dirty = set()
+        self._deleted = set()
+        self._providers: Dict[str, Callable[[], Any]] = {}
+        # Provider keys to refresh at the next flush rather than waiting for the snapshot
+        self._stale_providers = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._restore()
+
+    @classmethod
+    def from_config(cls, agent_name: str, config: Optional[Dict[str, Any]]) -> "AgentState":
+        """Build the state from the agent's "state_store" section, SQLite under ~/.zerepy/state by default"""
+        config = config or {}
+        backend_name = config.get("backend", "sqlite")
+        if backend_name not in STATE_BACKENDS:
+            raise ValueError(f"Unknown state backend: {backend_name}")
+        try:
+            if backend_name == "sqlite":
+                backend = SQLiteStateBackend(config.get("path") or DEFAULT_STATE_DIR / f"{agent_name}.db")
+            else:
+                backend = STATE_BACKENDS[backend_name]()
+        except Exception as e:
+            logger.warning(f"Could not open {backend_name} state backend, state will not persist: {e}")
+            backend = MemoryStateBackend()
+        return cls(
+            backend,
+            flush_interval=config.get("flush_interval", DEFAULT_FLUSH_INTERVAL),
+            snapshot_interval=config.get("snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL),
+            transient_keys=config.get("transient_keys", DEFAULT_TRANSIENT_KEYS)
+        )
+
+    def _restore(self) -> None:
+        try:
+            stored = self._backend.load()
+        except Exception as e:
+            logger.warning(f"Could not restore agent state: {e}")
+            return
+        for key, value in stored.items():
+            try:
+                self._data[key] = json.loads(value)
+            except ValueError:
+                logger.warning(f"Ignoring unreadable state key {key}")
+        if stored:
+            logger.info(f"Restored {len(self._data)} state keys")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._dirty.add(key)
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._data[key]
+            self._dirty.discard(key)
+            self._deleted.add(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def register_provider(self, key: str, provider: Callable[[], Any]) -> None:
+        """Store provider() under key at every snapshot, for state kept outside this dict"""
+        self._providers[key] = provider
+
+    def mark_dirty(self, key: str) -> None:
+        """Persist a provider's value with the next flush, for changes that must survive a crash"""
+        with self._lock:
+            self._stale_providers.add(key)
+
+    def _refresh_provider(self, key: str) -> None:
+        try:
+            self[key] = self._providers[key]()
+        except Exception as e:
+            logger.warning(f"State provider {key} failed: {e}")
+
+    def start(self) -> None:
+        """Start the write-behind thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="agent-state", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        last_snapshot = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                if time.monotonic() - last_snapshot >= self.snapshot_interval:
+                    self.snapshot()
+                    last_snapshot = time.monotonic()
+                else:
+                    self.flush()
+            except Exception as e:
+                logger.warning(f"Persisting agent state failed: {e}")
+
+    def _encode(self, keys: Iterable[str]) -> Dict[str, str]:
+        encoded = {}
+        for key in keys:
+            if key not in self._data or key in self.transient_keys:
+                continue
+            try:
+                encoded[key] = json.dumps(self._data[key])
+            except (TypeError, ValueError):
+                logger.debug(f"State key {key} is not JSON serializable, keeping it in memory only")
+        return encoded
+
+    def flush(self) -> None:
+        """Write keys changed since the last flush, and providers marked dirty"""
+        with self._lock:
+            stale = [key for key in self._stale_providers if key in self._providers]
+            self._stale_providers.clear()
+        for key in stale:
+            self._refresh_provider(key)
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                return
+            items = self._encode(self._dirty)
+            deleted = list(self._deleted)
+            self._dirty.clear()
+            self._deleted.clear()
+        self._backend.write(items, deleted)
+
+    def snapshot(self) -> None:
+        """Write the whole state, with provider values refreshed first"""
+        for key in list(self._providers):
+            self._refresh_provider(key)
+        with self._lock:
+            self._stale_providers.clear()
+            self._dirty.update(self._data)
+        self.flush()
+
+    def close(self) -> None:
+        """Stop the write-behind thread and persist everything"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.warning(f"Persisting agent state on close failed: {e}")
+        self._backend.close()
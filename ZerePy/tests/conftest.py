@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+
+class FakeClock:
+    """Stands in for time.time and time.monotonic, sleep() advances the clock instead of blocking"""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
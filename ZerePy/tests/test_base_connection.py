@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src.connections.base_connection import BaseConnection
+
+
+class SlowCheckConnection(BaseConnection):
+    """is_configured() reports `configured` as it was when the check started, optionally blocking until released"""
+
+    def __init__(self):
+        self.configured = False
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.block = False
+        super().__init__({})
+
+    @property
+    def is_llm_provider(self):
+        return False
+
+    def validate_config(self, config):
+        return config
+
+    def register_actions(self):
+        pass
+
+    def configure(self, **kwargs):
+        return True
+
+    def is_configured(self, verbose=False):
+        result = self.configured
+        if self.block:
+            self.started.set()
+            self.release.wait(5)
+        return result
+
+    def perform_action(self, action_name, kwargs):
+        pass
+
+
+def test_result_is_cached():
+    connection = SlowCheckConnection()
+    assert connection.is_configured_cached() is False
+
+    connection.configured = True
+    assert connection.is_configured_cached() is False
+
+
+def test_refresh_started_before_invalidation_does_not_overwrite_it():
+    connection = SlowCheckConnection()
+    connection.block = True
+    stale = threading.Thread(target=connection._refresh_configured)
+    stale.start()
+    assert connection.started.wait(5)
+
+    # Credentials change while the old check is still running
+    connection.configured = True
+    connection.invalidate_configured()
+    connection.release.set()
+    stale.join(5)
+
+    assert connection._configured_state is None
+    assert connection.is_configured_cached() is True
+
+
+def test_invalidation_allows_a_new_background_refresh():
+    connection = SlowCheckConnection()
+    connection._configured_refreshing = True
+
+    connection.invalidate_configured()
+
+    assert connection._configured_refreshing is False
@@ -0,0 +1,171 @@
+import gc
+import os
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import src.helpers.credentials as credentials_module
+from src.helpers.credentials import CredentialsStore
+
+KEYS = ("ZEREPY_TEST_API_KEY", "ZEREPY_TEST_SECRET", "ZEREPY_TEST_NEW")
+
+
+@pytest.fixture(autouse=True)
+def clean_environ(monkeypatch):
+    for key in KEYS:
+        monkeypatch.delenv(key, raising=False)
+    yield
+    # The store writes os.environ directly, which monkeypatch does not track
+    for key in KEYS:
+        os.environ.pop(key, None)
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("# credentials\nZEREPY_TEST_API_KEY='first'\nOTHER=value\n")
+    return path
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def on_change(self, keys):
+        self.calls.append(set(keys))
+
+
+def test_load_exports_values_without_overriding_environment(env_file, monkeypatch):
+    monkeypatch.setenv("OTHER", "from-shell")
+    store = CredentialsStore(env_file)
+
+    store.load()
+
+    assert os.environ["ZEREPY_TEST_API_KEY"] == "first"
+    assert os.environ["OTHER"] == "from-shell"
+    assert store.get("ZEREPY_TEST_API_KEY") == "first"
+    assert store.get("ZEREPY_TEST_MISSING", "default") == "default"
+
+
+def test_file_is_read_only_once(env_file):
+    store = CredentialsStore(env_file)
+    store.load()
+
+    env_file.write_text("ZEREPY_TEST_API_KEY='second'\n")
+    store.load()
+    assert os.environ["ZEREPY_TEST_API_KEY"] == "first"
+
+    store.load(force=True)
+    assert os.environ["ZEREPY_TEST_API_KEY"] == "second"
+
+
+def test_update_writes_all_keys_at_once_and_keeps_other_lines(env_file):
+    store = CredentialsStore(env_file)
+
+    changed = store.update({"ZEREPY_TEST_API_KEY": "rotated", "ZEREPY_TEST_NEW": "it's new"})
+
+    assert changed == {"ZEREPY_TEST_API_KEY", "ZEREPY_TEST_NEW"}
+    assert env_file.read_text().splitlines() == [
+        "# credentials",
+        "ZEREPY_TEST_API_KEY='rotated'",
+        "OTHER=value",
+        "ZEREPY_TEST_NEW='it\\'s new'",
+    ]
+    assert os.environ["ZEREPY_TEST_API_KEY"] == "rotated"
+    assert os.environ["ZEREPY_TEST_NEW"] == "it's new"
+    # Written atomically, no temp file is left behind
+    assert sorted(path.name for path in env_file.parent.iterdir()) == [".env"]
+
+
+def test_update_creates_missing_file(tmp_path):
+    path = tmp_path / ".env"
+    store = CredentialsStore(path)
+
+    store.update({"ZEREPY_TEST_API_KEY": "value"})
+
+    assert path.read_text() == "ZEREPY_TEST_API_KEY='value'\n"
+
+
+def test_written_values_are_read_back_by_a_new_store(env_file):
+    CredentialsStore(env_file).update({"ZEREPY_TEST_SECRET": "s3cr3t"})
+    os.environ.pop("ZEREPY_TEST_SECRET")
+
+    store = CredentialsStore(env_file)
+    store.load()
+
+    assert os.environ["ZEREPY_TEST_SECRET"] == "s3cr3t"
+
+
+def test_subscribers_get_only_changed_keys(env_file):
+    store = CredentialsStore(env_file)
+    recorder = Recorder()
+    store.subscribe(recorder.on_change)
+
+    store.update({"ZEREPY_TEST_API_KEY": "first", "ZEREPY_TEST_SECRET": "new"})
+    store.update({"ZEREPY_TEST_SECRET": "new"})
+
+    assert recorder.calls == [{"ZEREPY_TEST_SECRET"}]
+
+
+def test_forced_reload_notifies_changed_keys(env_file):
+    store = CredentialsStore(env_file)
+    store.load()
+    calls = []
+    store.subscribe(calls.append)
+
+    env_file.write_text("ZEREPY_TEST_API_KEY='second'\nOTHER=value\n")
+    store.load(force=True)
+
+    assert calls == [{"ZEREPY_TEST_API_KEY"}]
+
+
+def test_bound_method_subscribers_are_held_weakly(env_file):
+    store = CredentialsStore(env_file)
+    recorder = Recorder()
+    store.subscribe(recorder.on_change)
+
+    del recorder
+    gc.collect()
+    store.update({"ZEREPY_TEST_SECRET": "value"})
+
+    assert store._subscribers == []
+
+
+def test_failing_subscriber_does_not_stop_the_others(env_file):
+    store = CredentialsStore(env_file)
+    recorder = Recorder()
+
+    def broken(keys):
+        raise RuntimeError("boom")
+
+    store.subscribe(broken)
+    store.subscribe(recorder.on_change)
+    store.update({"ZEREPY_TEST_SECRET": "value"})
+
+    assert recorder.calls == [{"ZEREPY_TEST_SECRET"}]
+
+
+def test_default_path_is_searched_for_like_load_dotenv(tmp_path, monkeypatch):
+    found = tmp_path / "project" / ".env"
+    monkeypatch.delenv("ZEREPY_ENV_FILE", raising=False)
+    monkeypatch.setattr(credentials_module, "find_dotenv", lambda: str(found))
+    assert CredentialsStore().path == found
+
+    monkeypatch.setattr(credentials_module, "find_dotenv", lambda: "")
+    assert CredentialsStore().path.name == ".env"
+
+    monkeypatch.setenv("ZEREPY_ENV_FILE", str(tmp_path / "custom.env"))
+    assert CredentialsStore().path == tmp_path / "custom.env"
+
+
+def test_dead_subscribers_are_pruned_on_subscribe(env_file):
+    store = CredentialsStore(env_file)
+    for _ in range(3):
+        store.subscribe(Recorder().on_change)
+    gc.collect()
+
+    recorder = Recorder()
+    store.subscribe(recorder.on_change)
+
+    assert len(store._subscribers) == 1
@@ -0,0 +1,125 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+import src.connections.echochambers_connection as echochambers_module
+from src.connections.echochambers_connection import EchochambersConnection
+
+
+def message(number: int, sender: str = "someone") -> dict:
+    return {
+        "id": f"m{number:03d}",
+        "content": f"message {number}",
+        "sender": {"username": sender, "model": "model"},
+        "timestamp": f"2024-01-01T00:{number // 60:02d}:{number % 60:02d}Z",
+        "roomId": "general"
+    }
+
+
+class FakeRoom:
+    """History endpoint returning the newest `limit` messages, newest first"""
+
+    def __init__(self, messages, supports_before: bool = True):
+        self.messages = messages
+        self.supports_before = supports_before
+        self.requests = []
+
+    def __call__(self, method, url, params=None, **kwargs):
+        params = params or {}
+        self.requests.append(params)
+        selected = [msg for msg in self.messages if not params.get("since") or msg["timestamp"] >= params["since"]]
+        if self.supports_before and params.get("before"):
+            selected = [msg for msg in selected if msg["timestamp"] < params["before"]]
+        selected = sorted(selected, key=lambda msg: msg["timestamp"], reverse=True)
+        return {"messages": selected[:params.get("limit", len(selected))]}
+
+
+@pytest.fixture
+def connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(echochambers_module, "DEFAULT_STATE_DIR", tmp_path)
+    return EchochambersConnection({
+        "api_url": "https://echochambers.example",
+        "api_key": "key",
+        "room": "general",
+        "sender_username": "agent",
+        "sender_model": "model",
+        "history_read_count": 10,
+        "post_history_track": 10
+    })
+
+
+def test_first_read_queues_one_page_and_sets_cursor(connection, monkeypatch):
+    room = FakeRoom([message(i) for i in range(5)])
+    monkeypatch.setattr(connection, "_make_request", room)
+
+    assert connection.process_room_history() == 5
+
+    assert [msg["id"] for msg in connection.message_queue] == [f"m{i:03d}" for i in range(5)]
+    assert connection.processed_messages.meta["cursor"] == message(4)["timestamp"]
+
+
+def test_own_and_already_processed_messages_are_skipped(connection, monkeypatch):
+    room = FakeRoom([message(0), message(1, sender="agent"), message(2)])
+    monkeypatch.setattr(connection, "_make_request", room)
+
+    assert connection.process_room_history() == 2
+    assert connection.process_room_history() == 0
+
+
+def test_backlog_larger_than_a_page_is_read_back_to_the_cursor(connection, monkeypatch):
+    room = FakeRoom([message(i) for i in range(3)])
+    monkeypatch.setattr(connection, "_make_request", room)
+    connection.process_room_history()
+    connection.drain_message_queue()
+
+    # 25 messages arrive between passes, more than history_read_count
+    room.messages += [message(i) for i in range(3, 28)]
+
+    assert connection.process_room_history() == 25
+    assert [msg["id"] for msg in connection.message_queue] == [f"m{i:03d}" for i in range(3, 28)]
+    assert connection.processed_messages.meta["cursor"] == message(27)["timestamp"]
+    assert any("before" in params for params in room.requests)
+
+
+def test_cursor_stays_at_oldest_read_when_server_cannot_page_back(connection, monkeypatch):
+    room = FakeRoom([message(i) for i in range(3)], supports_before=False)
+    monkeypatch.setattr(connection, "_make_request", room)
+    connection.process_room_history()
+
+    room.messages += [message(i) for i in range(3, 28)]
+
+    assert connection.process_room_history() == 10
+    # The newest page was read, but the cursor does not skip the unread messages before it
+    assert connection.processed_messages.meta["cursor"] == message(18)["timestamp"]
+
+
+def test_full_queue_leaves_the_rest_for_the_next_pass(connection, monkeypatch):
+    room = FakeRoom([message(i) for i in range(5)])
+    monkeypatch.setattr(connection, "_make_request", room)
+    connection.max_queue_size = 3
+
+    assert connection.process_room_history() == 3
+    assert connection.processed_messages.meta["cursor"] == message(2)["timestamp"]
+
+    connection.drain_message_queue()
+    assert connection.process_room_history() == 2
+
+
+def test_queued_messages_survive_a_restart_until_saved_as_handled(connection, monkeypatch):
+    room = FakeRoom([message(i) for i in range(3)])
+    monkeypatch.setattr(connection, "_make_request", room)
+    connection.process_room_history()
+
+    # Drained but not yet replied to when the agent stops
+    handled = connection.drain_message_queue(limit=1)
+    restarted = EchochambersConnection(connection.config)
+    assert [msg["id"] for msg in restarted.message_queue] == ["m000", "m001", "m002"]
+
+    restarted.drain_message_queue(limit=1)
+    restarted.replied_messages.add(handled[0]["id"])
+    restarted.save_queue()
+
+    again = EchochambersConnection(connection.config)
+    assert [msg["id"] for msg in again.message_queue] == ["m001", "m002"]
+    assert "m000" in again.replied_messages
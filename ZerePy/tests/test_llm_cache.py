@@ -0,0 +1,163 @@
+from types import SimpleNamespace
+
+import pytest
+
+import src.helpers.llm_cache as llm_cache_module
+from src.action_handler import action_registry, content_actions, execute_action, register_action
+from src.helpers.llm_cache import LLMResponseCache, action_context
+
+
+@pytest.fixture
+def registered_actions():
+    """Remove actions registered by a test from the global registry afterwards"""
+    names = []
+    yield names
+    for name in names:
+        action_registry.pop(name, None)
+        content_actions.discard(name)
+
+
+def prompt(text, system_prompt="You are a bot", **extra):
+    return dict(prompt=text, system_prompt=system_prompt, **extra)
+
+
+def test_from_config_is_opt_in():
+    assert LLMResponseCache.from_config(None) is None
+    assert LLMResponseCache.from_config({"ttl": 10}) is None
+    assert LLMResponseCache.from_config({"enabled": True, "ttl": 10}).ttl == 10
+
+
+def test_key_depends_on_connection_model_prompts_and_params():
+    cache = LLMResponseCache()
+    key = cache.make_key("openai", "gpt-4", prompt("hi"))
+
+    assert key == cache.make_key("openai", "gpt-4", prompt("hi"))
+    assert key != cache.make_key("groq", "gpt-4", prompt("hi"))
+    assert key != cache.make_key("openai", "gpt-3.5", prompt("hi"))
+    assert key != cache.make_key("openai", "gpt-4", prompt("hi", system_prompt="other"))
+    assert key != cache.make_key("openai", "gpt-4", prompt("hi", temperature=0.5))
+    # A model passed with the call wins over the connection's configured model
+    assert cache.make_key("openai", "gpt-3.5", prompt("hi", model="gpt-4")) == key
+
+
+def test_normalized_keys_fold_whitespace_and_case():
+    strict = LLMResponseCache()
+    normalized = LLMResponseCache(normalize=True)
+
+    assert strict.make_key("openai", None, prompt("Hello  World")) != strict.make_key("openai", None, prompt("hello world"))
+    assert normalized.make_key("openai", None, prompt("Hello  World\n")) == normalized.make_key("openai", None, prompt("hello world"))
+
+
+def test_hit_after_put_and_miss_after_ttl(clock):
+    cache = LLMResponseCache(ttl=60)
+    key = cache.make_key("openai", None, prompt("hi"))
+
+    assert cache.get(key) is None
+    cache.put(key, "hello")
+    assert cache.get(key) == "hello"
+
+    clock.now += 61
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_empty_or_non_text_responses_are_not_stored():
+    cache = LLMResponseCache()
+
+    cache.put("a", "")
+    cache.put("b", None)
+    cache.put("c", {"text": "hi"})
+
+    assert cache.stats()["stores"] == 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMResponseCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_skip_actions_bypass_the_cache():
+    cache = LLMResponseCache(skip_actions=("post-tweet",))
+
+    with action_context("post-tweet"):
+        assert cache.make_key("openai", None, prompt("hi")) is None
+    with action_context("like-tweet"):
+        assert cache.make_key("openai", None, prompt("hi")) is not None
+
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_posting_actions_bypass_the_cache_including_nested_calls():
+    cache = LLMResponseCache(skip_actions=())
+
+    with action_context("publish", posts_content=True):
+        assert cache.make_key("openai", None, prompt("hi")) is None
+        # A nested action can not re-enable the cache
+        with action_context("summarize"):
+            assert cache.make_key("openai", None, prompt("hi")) is None
+
+    assert cache.make_key("openai", None, prompt("hi")) is not None
+
+
+def test_actions_registered_as_posting_content_bypass_the_cache(registered_actions):
+    cache = LLMResponseCache(skip_actions=())
+    keys = {}
+
+    def capture(name):
+        def handler(agent, **kwargs):
+            keys[name] = cache.make_key("openai", None, prompt("hi"))
+            return True
+        return handler
+
+    registered_actions.extend(["test-post-content", "test-read-content"])
+    register_action("test-post-content", posts_content=True)(capture("post"))
+    register_action("test-read-content")(capture("read"))
+
+    agent = SimpleNamespace(name="test-agent")
+    execute_action(agent, "test-post-content")
+    execute_action(agent, "test-read-content")
+
+    assert keys["post"] is None
+    assert keys["read"] is not None
+
+
+def test_default_skip_actions_include_every_posting_action():
+    for name in ("post-tweet", "reply-to-tweet", "reply-to-mention", "post-echochambers", "reply-echochambers"):
+        assert name in llm_cache_module.DEFAULT_SKIP_ACTIONS
+
+
+def test_sqlite_entries_survive_restart(tmp_path, clock):
+    path = str(tmp_path / "llm_cache.db")
+    cache = LLMResponseCache(sqlite_path=path, ttl=60)
+    key = cache.make_key("openai", None, prompt("hi"))
+    cache.put(key, "hello")
+    cache.close()
+
+    restarted = LLMResponseCache(sqlite_path=path, ttl=60)
+    assert restarted.get(key) == "hello"
+
+    clock.now += 61
+    assert LLMResponseCache(sqlite_path=path, ttl=60).get(key) is None
+
+
+def test_clear_and_stats():
+    cache = LLMResponseCache()
+    cache.put("a", "A")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+    cache.clear()
+    assert cache.get("a") is None
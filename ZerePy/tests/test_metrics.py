@@ -0,0 +1,129 @@
+import pytest
+
+from src.helpers.metrics import (
+    OUTCOME_ERROR,
+    OUTCOME_REJECTED,
+    ActionMetrics,
+    Histogram,
+    MetricsRegistry,
+)
+
+
+@pytest.fixture
+def metrics():
+    return ActionMetrics("test_action", ("connection", "action"), "test actions")
+
+
+def metric_lines(lines, name):
+    return [line for line in lines if line.startswith(name)]
+
+
+def test_histogram_buckets_are_upper_bounds_and_cumulative_on_render():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    # A value equal to a bound falls in that bucket
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.render("latency", 'action="a"') == [
+        'latency_bucket{action="a",le="1"} 2',
+        'latency_bucket{action="a",le="10"} 3',
+        'latency_bucket{action="a",le="+Inf"} 4',
+        'latency_sum{action="a"} 56.5',
+        'latency_count{action="a"} 4',
+    ]
+
+
+def test_histogram_render_without_labels():
+    histogram = Histogram((0.5,))
+    histogram.observe(0.25)
+
+    assert histogram.render("latency", "")[:2] == ['latency_bucket{le="0.5"} 1', 'latency_bucket{le="+Inf"} 1']
+
+
+def test_render_reports_every_series_with_escaped_labels(metrics):
+    metrics.end(metrics.begin("twitter", "post-tweet"), "hello")
+    metrics.begin("say \"hi\"", "read")
+
+    lines = metrics.render()
+
+    assert "# TYPE test_action_duration_seconds histogram" in lines
+    assert "# TYPE test_action_calls_total counter" in lines
+    assert "# TYPE test_action_in_flight gauge" in lines
+    assert 'test_action_calls_total{connection="twitter",action="post-tweet",outcome="ok"} 1' in lines
+    assert 'test_action_in_flight{connection="twitter",action="post-tweet"} 0' in lines
+    assert 'test_action_in_flight{connection="say \\"hi\\"",action="read"} 1' in lines
+    assert 'test_action_payload_bytes_sum{connection="twitter",action="post-tweet"} 5.0' in lines
+
+
+def test_outcomes_are_counted_separately(metrics):
+    metrics.end(metrics.begin("openai", "generate-text"), "text")
+    metrics.end(metrics.begin("openai", "generate-text"), outcome=OUTCOME_ERROR)
+    metrics.end(metrics.begin("openai", "generate-text"), outcome=OUTCOME_REJECTED)
+    metrics.end(metrics.begin("openai", "generate-text"), outcome=OUTCOME_REJECTED)
+
+    lines = metric_lines(metrics.render(), "test_action_calls_total{")
+
+    assert lines == [
+        'test_action_calls_total{connection="openai",action="generate-text",outcome="ok"} 1',
+        'test_action_calls_total{connection="openai",action="generate-text",outcome="error"} 1',
+        'test_action_calls_total{connection="openai",action="generate-text",outcome="rejected"} 2',
+    ]
+
+
+def test_only_text_and_binary_results_are_sized(metrics):
+    token = metrics.begin("sonic", "get-balance")
+    metrics.end(token, {"balance": "1" * 100})
+    token = metrics.begin("sonic", "get-balance")
+    metrics.end(token, b"\x00" * 3)
+
+    series = metrics._series[("sonic", "get-balance")]
+    assert series.payload.count == 1
+    assert series.payload.sum == 3
+
+
+def test_stream_is_timed_until_exhausted(metrics):
+    def chunks():
+        yield "ab"
+        yield "cde"
+
+    stream = metrics.track_stream(metrics.begin("openai", "generate-text-stream"), chunks())
+    series = metrics._series[("openai", "generate-text-stream")]
+    assert series.in_flight == 1
+
+    assert list(stream) == ["ab", "cde"]
+    assert series.in_flight == 0
+    assert series.latency.count == 1
+    assert series.payload.sum == 5
+    assert series.outcomes["ok"] == 1
+
+
+def test_closed_or_failing_stream_ends_the_call_once(metrics):
+    def chunks():
+        yield "a"
+        raise RuntimeError("provider went away")
+
+    stream = metrics.track_stream(metrics.begin("openai", "stream"), chunks())
+    assert next(stream) == "a"
+    with pytest.raises(RuntimeError):
+        next(stream)
+    stream.close()
+
+    closed = metrics.track_stream(metrics.begin("openai", "stream"), iter(["a", "b"]))
+    next(closed)
+    closed.close()
+
+    series = metrics._series[("openai", "stream")]
+    assert series.in_flight == 0
+    assert series.outcomes == {"ok": 1, "error": 1, "rejected": 0}
+
+
+def test_registry_renders_both_families():
+    registry = MetricsRegistry()
+    registry.agent_actions.end(registry.agent_actions.begin("shadow", "post-tweet"))
+
+    text = registry.render()
+
+    assert text.endswith("\n")
+    assert "# HELP zerepy_connection_action_duration_seconds" in text
+    assert 'zerepy_agent_action_calls_total{agent="shadow",action="post-tweet",outcome="ok"} 1' in text
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("web3")
+
+import src.helpers.evm.nonce_manager as nonce_manager_module
+from src.helpers.evm.nonce_manager import NonceManager, send_transaction
+
+ADDRESS = "0x" + "11" * 20
+
+
+class FakeHash(bytes):
+    def hex(self) -> str:
+        return "0x" + super().hex()
+
+
+class FakeEth:
+    """Node whose send_raw_transaction answers with queued outcomes, a hash on success"""
+
+    def __init__(self, outcomes, transaction_count=5):
+        self.outcomes = list(outcomes)
+        self.transaction_count = transaction_count
+        self.sent = []
+
+    def get_transaction_count(self, address, block):
+        return self.transaction_count
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeHash(outcome)
+
+
+class FakeAccount:
+    address = ADDRESS
+
+    def sign_transaction(self, tx):
+        return SimpleNamespace(rawTransaction=f"signed-{tx['nonce']}".encode())
+
+
+@pytest.fixture
+def node(monkeypatch):
+    def make(*outcomes, transaction_count=5):
+        web3 = SimpleNamespace(eth=FakeEth(outcomes, transaction_count))
+        manager = NonceManager(web3, ADDRESS)
+        monkeypatch.setattr(nonce_manager_module, "get_nonce_manager", lambda web3, address: manager)
+        return web3, manager
+    return make
+
+
+def test_sent_transaction_is_tracked(node):
+    web3, manager = node(b"\x01")
+
+    tx_hash = send_transaction(web3, FakeAccount(), {"to": ADDRESS})
+
+    assert tx_hash == b"\x01"
+    assert manager._pending[5][0] == "0x01"
+    assert manager.allocate() == 6
+
+
+def test_already_known_counts_as_sent_and_is_not_resent(node):
+    web3, manager = node(ValueError({"code": -32000, "message": "already known"}))
+    tx = {"to": ADDRESS}
+
+    tx_hash = send_transaction(web3, FakeAccount(), tx)
+
+    assert web3.eth.sent == [b"signed-5"]
+    assert tx_hash == nonce_manager_module.Web3.keccak(b"signed-5")
+    assert tx["nonce"] == 5
+    assert 5 in manager._pending
+    assert manager.allocate() == 6
+
+
+def test_nonce_too_low_resyncs_and_retries_once(node):
+    web3, manager = node(ValueError({"message": "nonce too low"}), b"\x02")
+    # Another process used nonce 5 since the local counter was read
+    manager._next_nonce = 5
+    web3.eth.transaction_count = 6
+
+    tx = {"to": ADDRESS}
+    assert send_transaction(web3, FakeAccount(), tx) == b"\x02"
+
+    assert web3.eth.sent == [b"signed-5", b"signed-6"]
+    assert tx["nonce"] == 6
+
+
+def test_repeated_nonce_error_is_raised(node):
+    web3, manager = node(ValueError("nonce too low"), ValueError("nonce too low"))
+
+    with pytest.raises(ValueError):
+        send_transaction(web3, FakeAccount(), {"to": ADDRESS})
+
+    assert len(web3.eth.sent) == 2
+    assert manager._next_nonce is None
+
+
+def test_rejected_transaction_gives_its_nonce_back(node):
+    web3, manager = node(ValueError({"message": "insufficient funds for gas"}))
+
+    with pytest.raises(ValueError):
+        send_transaction(web3, FakeAccount(), {"to": ADDRESS})
+
+    assert manager._next_nonce == 5
+
+
+def test_timeout_resyncs_instead_of_reusing_the_nonce(node):
+    web3, manager = node(TimeoutError("read timed out"))
+
+    with pytest.raises(TimeoutError):
+        send_transaction(web3, FakeAccount(), {"to": ADDRESS})
+
+    # The transaction may be out, the next nonce comes from the node
+    assert manager._next_nonce is None
+    web3.eth.transaction_count = 6
+    assert manager.allocate() == 6
@@ -0,0 +1,104 @@
+import pytest
+
+from src.helpers.rate_limiter import DEFAULT_WINDOW, RateLimiter, RateLimitExceeded
+
+
+def headers(limit, remaining, reset_at):
+    return {
+        "x-rate-limit-limit": str(limit),
+        "x-rate-limit-remaining": str(remaining),
+        "x-rate-limit-reset": str(reset_at)
+    }
+
+
+def test_endpoint_key_folds_numeric_ids():
+    assert RateLimiter.endpoint_key("get", "/users/12345/tweets") == "GET users/:id/tweets"
+    assert RateLimiter.endpoint_key("POST", "tweets") == "POST tweets"
+
+
+def test_unknown_endpoint_is_not_limited(clock):
+    limiter = RateLimiter()
+
+    for _ in range(100):
+        limiter.acquire("GET tweets")
+
+    assert limiter.remaining("GET tweets") is None
+    assert limiter.wait_time("GET tweets") == 0.0
+    assert clock.slept == []
+
+
+def test_acquire_takes_tokens_learned_from_headers(clock):
+    limiter = RateLimiter()
+    limiter.update("GET tweets", headers(15, 2, clock.now + 900))
+
+    limiter.acquire("GET tweets")
+    limiter.acquire("GET tweets")
+
+    assert limiter.remaining("GET tweets") == 0
+    assert limiter.wait_time("GET tweets") == pytest.approx(900)
+
+
+def test_empty_bucket_waits_for_reset_then_refills(clock):
+    limiter = RateLimiter(max_wait=60)
+    limiter.update("GET tweets", headers(15, 0, clock.now + 30))
+
+    limiter.acquire("GET tweets")
+
+    assert clock.slept == [pytest.approx(30)]
+    # The window reset to the full limit, and the call took one token
+    assert limiter.remaining("GET tweets") == 14
+
+
+def test_wait_longer_than_max_wait_raises(clock):
+    limiter = RateLimiter(max_wait=60)
+    limiter.update("GET tweets", headers(15, 0, clock.now + 600))
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.acquire("GET tweets")
+
+    assert excinfo.value.key == "GET tweets"
+    assert excinfo.value.retry_after == pytest.approx(600)
+    assert clock.slept == []
+
+
+def test_update_keeps_local_count_within_the_same_window(clock):
+    limiter = RateLimiter()
+    reset_at = clock.now + 900
+    limiter.update("GET tweets", headers(15, 10, reset_at))
+    for _ in range(5):
+        limiter.acquire("GET tweets")
+
+    # A response for a call made before the five above reports more budget than is left
+    limiter.update("GET tweets", headers(15, 9, reset_at))
+    assert limiter.remaining("GET tweets") == 5
+
+    # A new window replaces the local count
+    limiter.update("GET tweets", headers(15, 15, reset_at + 900))
+    assert limiter.remaining("GET tweets") == 15
+
+
+def test_update_ignores_missing_or_malformed_headers(clock):
+    limiter = RateLimiter()
+
+    limiter.update("GET tweets", {})
+    limiter.update("GET tweets", {"x-rate-limit-limit": "x", "x-rate-limit-remaining": "1", "x-rate-limit-reset": "1"})
+
+    assert limiter.remaining("GET tweets") is None
+
+
+def test_exhaust_uses_reset_header_or_default_window(clock):
+    limiter = RateLimiter()
+
+    assert limiter.exhaust("GET tweets", {"x-rate-limit-reset": str(clock.now + 120)}) == pytest.approx(120)
+    assert limiter.wait_time("GET tweets") == pytest.approx(120)
+
+    assert limiter.exhaust("GET users/me", {}) == pytest.approx(DEFAULT_WINDOW)
+
+
+def test_snapshot_reports_every_bucket(clock):
+    limiter = RateLimiter()
+    limiter.update("GET tweets", headers(15, 3, clock.now + 100))
+
+    assert limiter.snapshot() == {
+        "GET tweets": {"limit": 15, "remaining": 3, "resets_in": pytest.approx(100)}
+    }
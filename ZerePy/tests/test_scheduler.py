@@ -0,0 +1,95 @@
+import pytest
+
+from src.scheduler import TaskScheduler
+
+
+def make_scheduler(tasks, waits=None, failure_backoff=60.0):
+    waits = waits if waits is not None else {}
+    return TaskScheduler(
+        tasks,
+        eligible_in=lambda name: waits.get(name, 0.0),
+        weights=lambda: [task["weight"] for task in tasks],
+        failure_backoff=failure_backoff
+    )
+
+
+def test_ready_task_is_returned_by_index(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}]
+    scheduler = make_scheduler(tasks)
+
+    assert scheduler.next_task() == (0, 0.0)
+
+
+def test_identical_tasks_are_both_rescheduled(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}, {"name": "post-tweet", "weight": 1}]
+    scheduler = make_scheduler(tasks)
+
+    chosen = set()
+    for _ in range(50):
+        index, _ = scheduler.next_task()
+        assert index is not None
+        chosen.add(index)
+        scheduler.complete(index, True)
+        # Every task keeps exactly one heap entry
+        assert len(scheduler.snapshot()) == 2
+
+    assert chosen == {0, 1}
+
+
+def test_waits_until_first_task_is_eligible(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}, {"name": "like-tweet", "weight": 1}]
+    scheduler = make_scheduler(tasks, waits={"post-tweet": 30.0, "like-tweet": 90.0})
+
+    index, wait = scheduler.next_task()
+
+    assert index is None
+    assert wait == pytest.approx(30.0)
+
+
+def test_optimistic_entry_is_pushed_back(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}]
+    waits = {}
+    scheduler = make_scheduler(tasks, waits=waits)
+    # The entry was queued as eligible now, but the task needs more time by the time it is looked at
+    waits["post-tweet"] = 10.0
+
+    assert scheduler.next_task() == (None, pytest.approx(10.0))
+    assert scheduler.snapshot() == [{"task": "post-tweet", "eligible_in": pytest.approx(10.0)}]
+
+    clock.now += 10.0
+    waits["post-tweet"] = 0.0
+    assert scheduler.next_task() == (0, 0.0)
+
+
+def test_failed_task_is_backed_off(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}]
+    scheduler = make_scheduler(tasks, failure_backoff=60.0)
+
+    index, _ = scheduler.next_task()
+    scheduler.complete(index, False)
+
+    assert scheduler.next_task() == (None, pytest.approx(60.0))
+    clock.now += 60.0
+    assert scheduler.next_task() == (0, 0.0)
+
+
+def test_zero_weight_task_is_never_chosen(clock):
+    tasks = [{"name": "post-tweet", "weight": 0}, {"name": "like-tweet", "weight": 1}]
+    scheduler = make_scheduler(tasks)
+
+    for _ in range(20):
+        index, _ = scheduler.next_task()
+        assert index == 1
+        scheduler.complete(index, True)
+
+
+def test_time_until_next_refreshes_stale_entries(clock):
+    tasks = [{"name": "post-tweet", "weight": 1}]
+    waits = {}
+    scheduler = make_scheduler(tasks, waits=waits)
+    index, _ = scheduler.next_task()
+    scheduler.complete(index, True)
+
+    waits["post-tweet"] = 45.0
+
+    assert scheduler.time_until_next() == pytest.approx(45.0)
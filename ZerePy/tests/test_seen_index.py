@@ -0,0 +1,116 @@
+import json
+
+from src.helpers.seen_index import SeenIndex
+
+
+def test_add_and_contains_normalizes_ids_to_strings():
+    index = SeenIndex()
+
+    index.add(42)
+
+    assert 42 in index
+    assert "42" in index
+    assert "43" not in index
+
+
+def test_oldest_ids_are_evicted_at_capacity():
+    index = SeenIndex(capacity=3)
+
+    index.update(["a", "b", "c", "d"])
+
+    assert len(index) == 3
+    assert "a" not in index
+    assert all(item in index for item in ("b", "c", "d"))
+
+
+def test_re_adding_refreshes_an_id():
+    index = SeenIndex(capacity=3)
+    index.update(["a", "b", "c"])
+
+    index.add("a")
+    index.add("d")
+
+    assert "a" in index
+    assert "b" not in index
+
+
+def test_flushes_every_n_additions(tmp_path):
+    path = tmp_path / "seen.json"
+    index = SeenIndex(path, flush_every=3)
+
+    index.update(["a", "b"])
+    assert not path.exists()
+
+    index.add("c")
+    assert json.loads(path.read_text())["ids"] == ["a", "b", "c"]
+
+
+def test_survives_restart_with_meta(tmp_path):
+    path = tmp_path / "seen.json"
+    index = SeenIndex(path)
+    index.update(["a", "b"])
+    index.set_meta("cursor", "2024-01-01T00:00:00Z")
+    index.close()
+
+    restored = SeenIndex(path)
+
+    assert "a" in restored and "b" in restored
+    assert restored.meta == {"cursor": "2024-01-01T00:00:00Z"}
+
+
+def test_restore_keeps_only_the_newest_ids_within_capacity(tmp_path):
+    path = tmp_path / "seen.json"
+    path.write_text(json.dumps({"ids": ["a", "b", "c", "d"], "meta": {}}))
+
+    index = SeenIndex(path, capacity=2)
+
+    assert len(index) == 2
+    assert "c" in index and "d" in index
+
+
+def test_write_is_atomic_and_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "seen.json"
+    index = SeenIndex(path)
+    index.add("a")
+
+    index.flush()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["seen.json"]
+
+
+def test_flush_without_changes_does_not_write(tmp_path):
+    path = tmp_path / "seen.json"
+    index = SeenIndex(path)
+
+    index.flush()
+    index.set_meta("cursor", None)
+
+    assert not path.exists()
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "seen.json"
+    path.write_text("{not json")
+
+    index = SeenIndex(path)
+
+    assert len(index) == 0
+    assert index.meta == {}
+
+
+def test_in_memory_index_never_touches_disk(tmp_path):
+    index = SeenIndex(flush_every=1)
+
+    index.add("a")
+    index.close()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_iterates_oldest_first_without_a_file():
+    index = SeenIndex(capacity=2)
+    index.update(["a", "b"])
+    index.add("a")
+    index.add("c")
+
+    assert list(index) == ["a", "c"]
@@ -0,0 +1,183 @@
+import json
+import time
+
+import pytest
+
+import src.state_store as state_store_module
+from src.state_store import AgentState, MemoryStateBackend, SQLiteStateBackend, StateBackend
+
+
+class RecordingBackend(StateBackend):
+    """In-memory backend that remembers every batch it was asked to write"""
+
+    def __init__(self, stored=None):
+        self.stored = dict(stored or {})
+        self.batches = []
+        self.closed = False
+
+    def load(self):
+        return dict(self.stored)
+
+    def write(self, items, deleted):
+        deleted = list(deleted)
+        self.batches.append((dict(items), deleted))
+        self.stored.update(items)
+        for key in deleted:
+            self.stored.pop(key, None)
+
+    def close(self):
+        self.closed = True
+
+
+def test_reads_and_writes_stay_in_memory_until_flush():
+    backend = RecordingBackend()
+    state = AgentState(backend)
+
+    state["last_tweet_time"] = 123
+    assert state["last_tweet_time"] == 123
+    assert backend.batches == []
+
+    state.flush()
+    assert backend.batches == [({"last_tweet_time": "123"}, [])]
+
+
+def test_flush_writes_only_changed_keys_in_one_batch():
+    backend = RecordingBackend()
+    state = AgentState(backend)
+    state["a"] = 1
+    state["b"] = 2
+    state.flush()
+
+    state["b"] = 3
+    del state["a"]
+    state.flush()
+    state.flush()
+
+    assert backend.batches[1:] == [({"b": "3"}, ["a"])]
+
+
+def test_transient_and_unserializable_keys_are_not_persisted():
+    backend = RecordingBackend()
+    state = AgentState(backend, transient_keys=("room_info",))
+
+    state["room_info"] = {"topic": "x"}
+    state["client"] = object()
+    state["count"] = 1
+    state.flush()
+
+    assert backend.stored == {"count": "1"}
+    assert "client" in state
+
+
+def test_state_is_restored_and_unreadable_keys_are_skipped():
+    backend = RecordingBackend({"count": "5", "seen": '["a", "b"]', "broken": "{nope"})
+
+    state = AgentState(backend)
+
+    assert dict(state) == {"count": 5, "seen": ["a", "b"]}
+
+
+def test_snapshot_captures_providers_and_in_place_mutations():
+    backend = RecordingBackend()
+    state = AgentState(backend)
+    state["seen"] = []
+    state.flush()
+    queue = ["t1", "t2"]
+    state.register_provider("timeline", lambda: list(queue))
+
+    # Mutating a stored value in place does not mark it dirty
+    state["seen"].append("x")
+    state.flush()
+    assert json.loads(backend.stored["seen"]) == []
+
+    state.snapshot()
+    assert json.loads(backend.stored["seen"]) == ["x"]
+    assert json.loads(backend.stored["timeline"]) == ["t1", "t2"]
+
+
+def test_failing_provider_does_not_stop_the_snapshot():
+    backend = RecordingBackend()
+    state = AgentState(backend)
+    state["count"] = 1
+
+    def broken():
+        raise RuntimeError("boom")
+
+    state.register_provider("broken", broken)
+    state.snapshot()
+
+    assert backend.stored == {"count": "1"}
+
+
+def test_close_persists_everything_and_closes_backend():
+    backend = RecordingBackend()
+    state = AgentState(backend, flush_interval=0.01)
+    state.start()
+
+    state["count"] = 7
+    state.close()
+
+    assert backend.stored == {"count": "7"}
+    assert backend.closed
+
+
+def test_background_thread_flushes_changes():
+    backend = RecordingBackend()
+    state = AgentState(backend, flush_interval=0.01)
+    state.start()
+    try:
+        state["count"] = 1
+        for _ in range(200):
+            if backend.stored:
+                break
+            time.sleep(0.01)
+        assert backend.stored == {"count": "1"}
+    finally:
+        state.close()
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    path = tmp_path / "state" / "agent.db"
+    state = AgentState(SQLiteStateBackend(path))
+    state["count"] = 3
+    state["seen"] = ["a"]
+    state.close()
+
+    restored = AgentState(SQLiteStateBackend(path))
+
+    assert dict(restored) == {"count": 3, "seen": ["a"]}
+    restored.close()
+
+
+def test_from_config_defaults_to_sqlite_under_state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store_module, "DEFAULT_STATE_DIR", tmp_path)
+
+    state = AgentState.from_config("shadow", None)
+    state["count"] = 1
+    state.close()
+
+    assert (tmp_path / "shadow.db").exists()
+
+
+def test_from_config_memory_backend_and_unknown_backend():
+    state = AgentState.from_config("shadow", {"backend": "memory", "flush_interval": 1})
+
+    assert isinstance(state._backend, MemoryStateBackend)
+    assert state.flush_interval == 1
+    with pytest.raises(ValueError):
+        AgentState.from_config("shadow", {"backend": "redis"})
+
+
+def test_marked_provider_is_persisted_by_the_next_flush():
+    backend = RecordingBackend()
+    state = AgentState(backend)
+    queue = ["t1"]
+    state.register_provider("timeline", lambda: list(queue))
+
+    state.flush()
+    assert backend.stored == {}
+
+    queue.append("t2")
+    state.mark_dirty("timeline")
+    state.flush()
+    assert json.loads(backend.stored["timeline"]) == ["t1", "t2"]
@@ -0,0 +1,168 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+
+import src.helpers.ticker_cache as ticker_cache_module
+from src.helpers.ticker_cache import TickerResolver, rank_by_liquidity_volume
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSearch:
+    """DexScreener search returning a fixed list of pairs"""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.queries = []
+
+    def get(self, url, params=None, **kwargs):
+        self.queries.append(params["q"])
+        return FakeResponse({"pairs": self.pairs})
+
+
+def pair(symbol, address, chain="sonic", fdv=0, liquidity=0, volume=0):
+    return {
+        "chainId": chain,
+        "baseToken": {"symbol": symbol, "address": address},
+        "fdv": fdv,
+        "liquidity": {"usd": liquidity},
+        "volume": {"h24": volume}
+    }
+
+
+@pytest.fixture
+def search(monkeypatch):
+    search = FakeSearch([
+        pair("WETH", "0xsmall", fdv=10, liquidity=900, volume=900),
+        pair("WETH", "0xbig", fdv=1000, liquidity=10, volume=10),
+        pair("WETH", "0xother-chain", chain="ethereum", fdv=10_000),
+        pair("WETHX", "0xlookalike", fdv=100_000),
+    ])
+    monkeypatch.setattr(ticker_cache_module, "http_pool", SimpleNamespace(get=search.get))
+    return search
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return TickerResolver(path=tmp_path / "ticker_cache.json", token_list_dir=tmp_path / "token_lists")
+
+
+def test_resolve_picks_exact_symbol_on_chain_and_caches_it(resolver, search, clock):
+    assert resolver.resolve("sonic", "weth") == "0xbig"
+    assert resolver.resolve("Sonic", " WETH ") == "0xbig"
+
+    assert search.queries == ["weth"]
+    assert resolver.stats()["memory_hits"] == 1
+
+
+def test_rank_is_configurable(resolver, search, clock):
+    assert resolver.resolve("sonic", "WETH", rank=rank_by_liquidity_volume) == "0xsmall"
+
+
+def test_resolved_ticker_expires_after_ttl(tmp_path, search, clock):
+    resolver = TickerResolver(path=tmp_path / "ticker_cache.json", token_list_dir=tmp_path, ttl=60)
+    resolver.resolve("sonic", "WETH")
+
+    clock.now += 59
+    resolver.resolve("sonic", "WETH")
+    assert len(search.queries) == 1
+
+    clock.now += 2
+    resolver.resolve("sonic", "WETH")
+    assert len(search.queries) == 2
+
+
+def test_no_match_is_cached_for_negative_ttl(tmp_path, search, clock):
+    resolver = TickerResolver(path=tmp_path / "ticker_cache.json", token_list_dir=tmp_path, negative_ttl=30)
+
+    assert resolver.resolve("sonic", "NOPE") is None
+    assert resolver.lookup("sonic", "NOPE") == (True, None)
+    assert resolver.resolve("sonic", "NOPE") is None
+    assert search.queries == ["NOPE"]
+
+    clock.now += 31
+    assert resolver.lookup("sonic", "NOPE") == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    resolver = TickerResolver(path=tmp_path / "ticker_cache.json", token_list_dir=tmp_path, max_entries=2)
+    resolver.store("sonic", "A", "0xa")
+    resolver.store("sonic", "B", "0xb")
+    resolver.lookup("sonic", "A")
+    resolver.store("sonic", "C", "0xc")
+
+    assert list(resolver._memory) == [("sonic", "a"), ("sonic", "c")]
+    # Evicted from memory, but still served from the disk cache
+    assert resolver.lookup("sonic", "B") == (True, "0xb")
+    assert resolver.stats()["disk_hits"] == 1
+
+
+def test_preloaded_token_list_is_used_before_the_network(resolver, search, clock):
+    resolver.load_token_list("sonic", [{"symbol": "WETH", "address": "0xlisted"}, {"symbol": "BAD"}])
+
+    assert resolver.resolve("sonic", "weth") == "0xlisted"
+    assert resolver.lookup("sonic", "BAD") == (False, None)
+    assert search.queries == []
+
+    # Token list entries never expire
+    clock.now += 10 * 365 * 24 * 60 * 60
+    assert resolver.lookup("sonic", "WETH") == (True, "0xlisted")
+
+
+def test_token_list_file_is_read_on_first_use(tmp_path, search, clock):
+    token_lists = tmp_path / "token_lists"
+    token_lists.mkdir()
+    (token_lists / "sonic.json").write_text(json.dumps({"wS": "0xws"}))
+    resolver = TickerResolver(path=tmp_path / "ticker_cache.json", token_list_dir=token_lists)
+
+    assert resolver.resolve("sonic", "WS") == "0xws"
+    assert resolver.stats()["list_hits"] == 1
+    assert search.queries == []
+
+
+def test_disk_cache_survives_restart_without_expired_entries(tmp_path, search, clock):
+    path = tmp_path / "cache" / "ticker_cache.json"
+    resolver = TickerResolver(path=path, token_list_dir=tmp_path, ttl=60, negative_ttl=10)
+    resolver.resolve("sonic", "WETH")
+    resolver.resolve("sonic", "NOPE")
+
+    clock.now += 30
+    restarted = TickerResolver(path=path, token_list_dir=tmp_path, ttl=60, negative_ttl=10)
+    assert restarted.resolve("sonic", "WETH") == "0xbig"
+    assert search.queries == ["WETH", "NOPE"]
+
+    # Expired entries are dropped the next time the file is written
+    restarted.store("sonic", "A", "0xa")
+    assert set(json.loads(path.read_text())) == {"sonic:weth", "sonic:a"}
+    # Written atomically, no temp file is left behind
+    assert sorted(p.name for p in path.parent.iterdir()) == ["ticker_cache.json"]
+
+
+def test_unreadable_disk_cache_is_ignored(tmp_path, search, clock):
+    path = tmp_path / "ticker_cache.json"
+    path.write_text("{not json")
+    resolver = TickerResolver(path=path, token_list_dir=tmp_path)
+
+    assert resolver.resolve("sonic", "WETH") == "0xbig"
+    assert "sonic:weth" in json.loads(path.read_text())
+
+
+def test_clear_empties_memory_and_disk(resolver, search, clock):
+    resolver.resolve("sonic", "WETH")
+
+    resolver.clear()
+
+    assert resolver.lookup("sonic", "WETH") == (False, None)
+    assert json.loads(resolver.path.read_text()) == {}
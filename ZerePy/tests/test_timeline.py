@@ -0,0 +1,168 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import src.helpers.timeline as timeline_module
+from src.helpers.timeline import TimelineQueue
+
+
+class InlineThread:
+    """Runs the target on start(), so background refills finish before the test continues"""
+
+    def __init__(self, target, daemon=None):
+        self._target = target
+
+    def start(self):
+        self._target()
+
+
+@pytest.fixture(autouse=True)
+def inline_threads(monkeypatch):
+    monkeypatch.setattr(timeline_module, "threading", SimpleNamespace(Lock=threading.Lock, Thread=InlineThread))
+
+
+class FakeTimeline:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.calls = []
+
+    def __call__(self, since_id):
+        self.calls.append(since_id)
+        return self.pages.pop(0) if self.pages else []
+
+
+def tweets(*ids):
+    return [{"id": str(tweet_id), "text": f"tweet {tweet_id}"} for tweet_id in ids]
+
+
+def test_refill_queues_tweets_and_tracks_newest_id(clock):
+    fetch = FakeTimeline([tweets(12, 11, 10), tweets(13)])
+    queue = TimelineQueue(fetch)
+
+    assert queue.refill() == 3
+    assert queue.since_id == "12"
+    assert queue.refill() == 1
+
+    assert fetch.calls == [None, "12"]
+    assert queue.since_id == "13"
+    assert queue.has_fetched
+
+
+def test_since_id_compares_numerically(clock):
+    queue = TimelineQueue(FakeTimeline([tweets(9), tweets(10)]))
+
+    queue.refill()
+    queue.refill()
+
+    assert queue.since_id == "10"
+
+
+def test_queued_and_handled_tweets_are_not_queued_again(clock):
+    queue = TimelineQueue(FakeTimeline([]), min_interval=3600)
+    queue.extend(tweets(1, 2))
+
+    assert queue.pop()["id"] == "1"
+    assert queue.extend(tweets(1, 2, 3)) == 1
+    assert [queue.pop()["id"], queue.pop()["id"]] == ["2", "3"]
+
+
+def test_capacity_drops_oldest_queued_tweet(clock):
+    queue = TimelineQueue(FakeTimeline([]), capacity=2, min_interval=3600)
+
+    queue.extend(tweets(1, 2, 3))
+
+    assert len(queue) == 2
+    assert queue.pop()["id"] == "2"
+    # A dropped tweet was never handled, so it can be queued again
+    assert queue.extend(tweets(1)) == 1
+
+
+def test_seen_ids_are_bounded(clock):
+    queue = TimelineQueue(FakeTimeline([]), seen_capacity=2, min_interval=3600)
+    queue.extend(tweets(1, 2, 3))
+    for _ in range(3):
+        queue.pop()
+
+    # Only the two most recently handled IDs are remembered
+    assert queue.extend(tweets(1, 2, 3)) == 1
+
+
+def test_pop_refills_in_background_when_low(clock):
+    fetch = FakeTimeline([tweets(2, 1), tweets(3)])
+    queue = TimelineQueue(fetch, low_watermark=2, min_interval=60)
+    queue.refill()
+
+    clock.now += 60
+    assert queue.pop()["id"] == "2"
+
+    assert fetch.calls == [None, "2"]
+    assert len(queue) == 2
+
+
+def test_maybe_refill_respects_watermark_and_interval(clock):
+    fetch = FakeTimeline([tweets(3, 2, 1)])
+    queue = TimelineQueue(fetch, low_watermark=2, min_interval=60)
+
+    assert queue.maybe_refill()
+    # Above the watermark
+    assert not queue.maybe_refill()
+
+    queue.pop()
+    queue.pop()
+    # Below the watermark, but the last read was too recent
+    assert not queue.maybe_refill()
+    clock.now += 60
+    assert queue.maybe_refill()
+
+
+def test_failed_background_refill_can_be_retried(clock):
+    def failing_fetch(since_id):
+        raise RuntimeError("timeline unavailable")
+
+    queue = TimelineQueue(failing_fetch, min_interval=0)
+
+    assert queue.maybe_refill()
+    assert queue.maybe_refill()
+
+
+def test_dump_and_restore_round_trip(clock):
+    queue = TimelineQueue(FakeTimeline([tweets(3, 2, 1)]), min_interval=3600)
+    queue.refill()
+    queue.pop()
+    clock.now += 30
+
+    data = queue.dump()
+    restored = TimelineQueue(FakeTimeline([]), min_interval=3600)
+    restored.restore(data)
+
+    assert restored.since_id == "3"
+    assert restored.has_fetched
+    assert [tweet["id"] for tweet in data["tweets"]] == ["2", "1"]
+    assert len(restored) == 2
+    # The handled tweet stays handled after the restart
+    assert restored.extend(tweets(3)) == 0
+    # The refill interval carries over, so the restarted agent does not read the timeline at once
+    assert not restored.maybe_refill()
+
+
+def test_restore_ignores_empty_data(clock):
+    queue = TimelineQueue(FakeTimeline([]))
+
+    queue.restore(None)
+
+    assert len(queue) == 0
+    assert not queue.has_fetched
+
+
+def test_queueing_and_handling_tweets_report_a_change(clock):
+    changes = []
+    queue = TimelineQueue(FakeTimeline([]), min_interval=3600, on_change=lambda: changes.append(len(queue)))
+
+    queue.extend(tweets(1, 2))
+    queue.extend(tweets(1))
+    queue.pop()
+    queue.pop()
+    queue.pop()
+
+    assert changes == [2, 1, 0]
@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("web3")
+
+from web3 import Web3
+
+from src.helpers.evm.token_cache import TokenMetadataCache
+
+TOKEN = "0x" + "22" * 20
+
+
+class FakeCall:
+    def __init__(self, calls, name, value):
+        self.calls, self.name, self.value = calls, name, value
+
+    def __call__(self):
+        return self
+
+    def call(self):
+        self.calls.append(self.name)
+        return self.value
+
+
+class FakeWeb3:
+    """Web3 whose ERC20 contracts answer with fixed metadata and record every call"""
+
+    def __init__(self, chain_id=146):
+        self.calls = []
+        self.provider = SimpleNamespace(endpoint_uri="https://rpc.example")
+        self.eth = SimpleNamespace(chain_id=chain_id, contract=self._contract)
+
+    def _contract(self, address, abi):
+        functions = SimpleNamespace(**{
+            name: FakeCall(self.calls, name, value)
+            for name, value in (("decimals", 18), ("symbol", "WS"), ("name", "Wrapped Sonic"))
+        })
+        return SimpleNamespace(w3=self, functions=functions)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TokenMetadataCache(tmp_path / "token_metadata.json")
+
+
+def test_full_lookup_is_read_once(cache):
+    web3 = FakeWeb3()
+
+    assert cache.get(web3, TOKEN).symbol == "WS"
+    cache.get(web3, TOKEN)
+
+    assert web3.calls == ["decimals", "symbol", "name"]
+
+
+def test_remembered_decimals_are_completed_on_the_next_full_lookup(cache):
+    web3 = FakeWeb3()
+    cache.remember_decimals(web3, {TOKEN: 6})
+
+    # Decimals alone are served from the partial entry
+    assert cache.decimals(web3, TOKEN) == 6
+    assert web3.calls == []
+
+    token = cache.get(web3, TOKEN)
+    assert (token.decimals, token.symbol, token.name, token.partial) == (6, "WS", "Wrapped Sonic", False)
+    assert web3.calls == ["symbol", "name"]
+
+    cache.get(web3, TOKEN)
+    assert web3.calls == ["symbol", "name"]
+
+
+def test_entries_without_symbol_or_name_from_older_files_are_partial(tmp_path):
+    path = tmp_path / "token_metadata.json"
+    address = Web3.to_checksum_address(TOKEN)
+    path.write_text(json.dumps([{"chain_id": 146, "address": address, "decimals": 6, "symbol": None, "name": None}]))
+    web3 = FakeWeb3()
+
+    assert TokenMetadataCache(path).get(web3, TOKEN).symbol == "WS"
+    assert web3.calls == ["symbol", "name"]